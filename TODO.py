@@ -1,11 +1,38 @@
-import csv
-import json
+import multiprocessing
 import os
 import re
+import sys
+import time
+from datetime import date
+from itertools import islice
 
 from colorama import Fore, init
 from prettytable import PrettyTable
 
+from todo_aggregates import HOURS, Aggregates
+from todo_archive import Archive, move_to_archive, select_for_archive
+from todo_bulk import OPERATIONS_HELP, apply_bulk, describe_errors, parse_operation, plan_bulk, preview
+from todo_computed import ComputedColumns
+from todo_calendar import CalendarIndex, parse_day, week_start
+from todo_dedupe import DedupeIndex, merge_records, resolve_key
+from todo_diff import diff_files, diff_table
+from todo_feed import FEED_SUFFIX, describe
+from todo_intervals import parse_ranges
+from todo_io import CSV_EXTS, JSON_EXTS, committer, iter_records, list_data_files, read_json, with_ext, write_csv, write_json
+from todo_metrics import metrics
+from todo_mirror import MirrorSync, load_manifest, verify_mirror
+from todo_parallel import read_csv_parallel
+from todo_query import QueryEngine, QueryError
+from todo_render import PAGE_SIZE, TableRenderer
+from todo_schedule import REPEAT_COLUMN, ReminderScheduler, parse_rule
+from todo_schema import TYPE_NAMES, ColumnType, TypedColumns, format_date, load_schema, parse_time, save_schema
+from todo_shared import SharedFile
+from todo_sort import SortCache
+from todo_stats import ColumnStats
+from todo_store import DEFAULT_HEADERS, ID_COLUMN, TaskTable
+
+# исполняемый файл pyinstaller: процесс пула разбора CSV не должен запускать программу
+multiprocessing.freeze_support()
 init()
 
 RED = "\033[0;31;40m"  # RED
@@ -14,7 +41,17 @@ YELLOW = "\033[0;33;40m"  # YELLOW
 BLUE = "\033[0;34;40m"  # BLUE
 RESET = "\033[0m"  # Reset
 
-table_of_TODO = PrettyTable(["Time: ", "TODO list:", "Comments: "])
+# общее хранилище строк; PrettyTable используется только для справки и сводок
+store = TaskTable(DEFAULT_HEADERS, id_column=ID_COLUMN)
+typed = store.add_listener(TypedColumns())
+query = QueryEngine(store, typed)
+sorter = SortCache(store, typed)
+col_stats = ColumnStats(store)
+aggregates = Aggregates(store)
+scheduler = ReminderScheduler(store)
+calendar = CalendarIndex(store, typed)
+dup_index = DedupeIndex(store)
+computed = ComputedColumns(store, typed)
 
 table_of_command = PrettyTable(["Command: ", "Do: "])
 table_of_command.add_row(
@@ -24,7 +61,10 @@ table_of_command.add_row(
     ]
 )
 table_of_command.add_row(
-    [RESET + YELLOW + "print_table" + RESET, RESET + BLUE + "Выводим таблицу" + RESET]
+    [
+        RESET + YELLOW + "print_table" + RESET,
+        RESET + BLUE + "Выводим таблицу (--from N --limit M --time 09:00-12:00 --all)" + RESET,
+    ]
 )
 table_of_command.add_row(
     [
@@ -83,12 +123,75 @@ table_of_command.add_row(
 table_of_command.add_row(
     [RESET + YELLOW + "find" + RESET, RESET + BLUE + "Поиск по задачам и комментариям" + RESET]
 )
+table_of_command.add_row(
+    [RESET + YELLOW + "bulk" + RESET, RESET + BLUE + "Изменить все найденные задачи одной операцией (set, replace, shift)" + RESET]
+)
 table_of_command.add_row(
     [RESET + YELLOW + "export_json" + RESET, RESET + BLUE + "Экспорт таблицы в JSON" + RESET]
 )
 table_of_command.add_row(
     [RESET + YELLOW + "import_json" + RESET, RESET + BLUE + "Импорт таблицы из JSON" + RESET]
 )
+table_of_command.add_row(
+    [RESET + YELLOW + "column_type" + RESET, RESET + BLUE + "Задать тип столбца (int, float, time, date, enum, text)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "computed_column" + RESET, RESET + BLUE + "Вычисляемый столбец: выражение над другими столбцами (time + 30, upper(todo_list))" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "column_info" + RESET, RESET + BLUE + "Сводка по типизированному столбцу" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "column_stats" + RESET, RESET + BLUE + "Ширина, пустые и различные значения по столбцам" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "stats" + RESET, RESET + BLUE + "Задачи по часам; stats <столбец> — число задач по значениям столбца" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "duplicates" + RESET, RESET + BLUE + "Найти дубликаты (duplicates Time:, TODO list: — по этим столбцам)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "dedupe" + RESET, RESET + BLUE + "Удалить дубликаты, оставив первую копию" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "merge_file" + RESET, RESET + BLUE + "Добавить задачи из файла CSV/JSON, пропуская дубликаты" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "diff" + RESET, RESET + BLUE + "Сравнить файл с таблицей (diff файл) или два файла (diff старый новый)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "io_stats" + RESET, RESET + BLUE + "Время записи на диск и число fsync" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "watch" + RESET, RESET + BLUE + "Следить за изменениями из других окон (--since N, --once)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "upcoming" + RESET, RESET + BLUE + "Ближайшие задачи с учётом повторов (столбец Repeat)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "day" + RESET, RESET + BLUE + "Задачи на день по столбцу Date (day, day завтра, day 2024-05-01)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "week" + RESET, RESET + BLUE + "Задачи на неделю (week, week +7)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "overdue" + RESET, RESET + BLUE + "Просроченные задачи" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "purge_before" + RESET, RESET + BLUE + "Удалить задачи с датой раньше указанной" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "archive" + RESET, RESET + BLUE + "Перенести старые и выполненные задачи в архив, показать разделы" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "history" + RESET, RESET + BLUE + "Поиск по архиву (history 2024-05)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "mirror" + RESET, RESET + BLUE + "Зеркало в каталог (mirror <каталог>, mirror off, mirror verify)" + RESET]
+)
+table_of_command.add_row(
+    [RESET + YELLOW + "sort_by" + RESET, RESET + BLUE + "Вывести таблицу, отсортированную по столбцу" + RESET]
+)
 table_of_command.add_row(
     [RESET + YELLOW + "close" + RESET, RESET + BLUE + "Выключить программу" + RESET]
 )
@@ -96,6 +199,13 @@ table_of_command.add_row(
 # автосохранение
 AUTOSAVE = True
 AUTOSAVE_FILE = "tasks_autosave.csv"
+# надёжность автосохранения: "none", "batched" (групповой fsync раз в секунду), "every-op"
+DURABILITY = "batched"
+# каталог зеркала: таблица в CSV и JSON по разделам, после изменений переписываются только
+# изменённые разделы (или --mirror <каталог>); None — зеркала нет
+MIRROR_DIR = None
+
+TIME_COLUMN = "Time: "
 
 def check_time_format(time_str):
     """
@@ -126,13 +236,11 @@ def check_time_format(time_str):
     return f"{hours:02d}:{minutes:02d}"
 
 
-def save_to_csv(filename):
+def save_to_csv(filename, durability=DURABILITY):
     try:
-        with open(filename, "w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(table_of_TODO.field_names)
-            for row in table_of_TODO._rows:
-                writer.writerow(row)
+        write_csv(filename, store.headers, store.rows, durability)
+        save_schema(filename, typed.schema)
+        computed.save(filename)
     except Exception as e:
         print("Ошибка при сохранении:", e)
 
@@ -141,13 +249,12 @@ def load_from_csv(filename):
     if not os.path.exists(filename):
         return False
     try:
-        with open(filename, "r", encoding="utf-8") as file:
-            reader = csv.reader(file)
-            cols = next(reader)
-            table_of_TODO.field_names = cols
-            table_of_TODO.clear_rows()
-            for row in reader:
-                table_of_TODO.add_row(row)
+        # большие файлы разбираются на всех ядрах, время нормализуется в HH:MM
+        cols, rows = read_csv_parallel(filename, TIME_COLUMN)
+        # значения разбираются один раз, по схеме рядом с файлом
+        typed.schema = load_schema(filename)
+        computed.load(filename)
+        store.reset(cols, rows)
         return True
     except Exception as e:
         print("Ошибка при загрузке:", e)
@@ -155,13 +262,9 @@ def load_from_csv(filename):
 
 
 def export_json(filename):
-    data = []
-    for row in table_of_TODO._rows:
-        entry = {name: value for name, value in zip(table_of_TODO.field_names, row)}
-        data.append(entry)
+    # .json — массив, .jsonl — объект на строку; .gz/.xz/.bz2 — сжатие, запись потоком
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(filename, store.headers, store.rows, "every-op")
     except Exception as e:
         print("Ошибка при экспорте в JSON:", e)
 
@@ -171,38 +274,617 @@ def import_json(filename):
         print("Файл не найден")
         return
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if not data:
+        keys, rows = read_json(filename)
+        if not rows:
             print("JSON пустой")
             return
-        # Установим поля как ключи первого объекта
-        keys = list(data[0].keys())
-        table_of_TODO.field_names = keys
-        table_of_TODO.clear_rows()
-        for item in data:
-            row = [item.get(k, "") for k in keys]
-            table_of_TODO.add_row(row)
+        typed.schema = load_schema(filename)
+        computed.load(filename)
+        store.reset(keys, rows)
     except Exception as e:
         print("Ошибка при импорте из JSON:", e)
 
 
+# файл автосохранения могут одновременно менять другие окна CLI и GUI
+shared = SharedFile(store, AUTOSAVE_FILE)
+
+
+def report_merge(merged):
+    if merged is not None:
+        print(merged)
+
+
+def autosave():
+    """Автосохранение под блокировкой файла со слиянием чужих изменений, затем зеркало."""
+    if AUTOSAVE:
+        try:
+            report_merge(shared.save(lambda: save_to_csv(AUTOSAVE_FILE)))
+        except (OSError, TimeoutError) as e:
+            print("Ошибка при автосохранении:", e)
+    sync_mirror()
+
+
+mirror = None
+
+
+def set_mirror(directory):
+    """Включить зеркало в каталог (None — выключить)."""
+    global mirror
+    if mirror is not None:
+        store.remove_listener(mirror)
+    mirror = MirrorSync(store, directory, durability=DURABILITY) if directory else None
+
+
+def sync_mirror():
+    """Записать в зеркало разделы, изменённые с прошлой синхронизации."""
+    if mirror is None:
+        return None
+    try:
+        return mirror.sync()
+    except (OSError, TimeoutError) as e:
+        # недописанные разделы допишет следующая синхронизация
+        print("Зеркало не обновлено:", e)
+        return None
+
+
+def mirror_command(args=()):
+    """mirror — синхронизировать сейчас, mirror <каталог> — включить, mirror off, mirror verify."""
+    arg = " ".join(args).strip()
+    if arg == "off":
+        set_mirror(None)
+        print("Зеркало выключено")
+        return
+    if arg == "verify":
+        if mirror is None:
+            print("Зеркало не включено")
+            return
+        problems = verify_mirror(mirror.directory)
+        print("\n".join(problems) if problems else "Файлы зеркала совпадают с манифестом")
+        return
+    if arg:
+        set_mirror(arg)
+    if mirror is None:
+        print("Зеркало не включено: mirror <каталог>")
+        return
+    result = sync_mirror()
+    if result is not None:
+        manifest = load_manifest(mirror.directory) or {}
+        print(f"Зеркало {mirror.directory}: записано разделов {result.written}, без изменений {result.unchanged}, "
+              f"удалено старых файлов {result.removed}; всего разделов {len(manifest.get('parts', {}))}, "
+              f"строк {manifest.get('rows', 0)}")
+
+
+def pull_changes():
+    """Подтягивает изменения, сделанные в файле автосохранения другими процессами."""
+    if not AUTOSAVE:
+        return
+    try:
+        report_merge(shared.pull())
+    except (OSError, TimeoutError) as e:
+        print("Не удалось прочитать изменения других процессов:", e)
+
+
+def parse_watch_args(args):
+    """Разбор аргументов watch: --since N (с какой записи журнала), --once (без ожидания)."""
+    opts = {"since": None, "once": False}
+    it = iter(args)
+    for arg in it:
+        if arg == "--once":
+            opts["once"] = True
+        elif arg == "--since":
+            value = next(it, "")
+            if not value.isdigit():
+                raise ValueError("--since: ожидается номер записи")
+            opts["since"] = int(value)
+        else:
+            raise ValueError(f"Неизвестный параметр: {arg}")
+    return opts
+
+
+def watch(args=()):
+    """Печатает изменения файла автосохранения из журнала по мере появления (Ctrl+C — выход)."""
+    try:
+        opts = parse_watch_args(args)
+    except ValueError as e:
+        print(e)
+        return
+    since = shared.log.last_seq() if opts["since"] is None else opts["since"]
+    if opts["once"]:
+        records, complete = shared.log.read_since(since)
+        if not complete:
+            print("Часть журнала уже сокращена, показаны оставшиеся записи")
+        for rec in records:
+            print("\n".join(describe(rec)))
+        return
+    print(f"Ожидание изменений после #{since} (Ctrl+C — выход)")
+    try:
+        for rec in shared.log.follow(since):
+            print("\n".join(describe(rec)))
+    except KeyboardInterrupt:
+        print()
+
+
+# старые и выполненные задачи хранятся в архиве рядом с файлом автосохранения
+archive = Archive(AUTOSAVE_FILE)
+
+
+def archive_old():
+    """Переносит старые и выполненные задачи в архив. Возвращает {раздел: число строк}."""
+    today = date.today().toordinal()
+    if not AUTOSAVE or not select_for_archive(store, calendar, today):
+        return {}
+    try:
+        # под блокировкой архива: другой процесс не перенесёт те же строки второй раз
+        with archive.lock():
+            pull_changes()
+            indices = select_for_archive(store, calendar, today)
+            if not indices:
+                return {}
+            written = move_to_archive(archive, store, calendar, indices, today)
+            autosave()
+            return written
+    except (OSError, TimeoutError) as e:
+        print("Не удалось перенести задачи в архив:", e)
+        return {}
+
+
+def history(args=()):
+    """Поиск по архиву: разделы читаются только здесь (history 2024-05 — один раздел)."""
+    names = archive.partitions()
+    if not names:
+        print("Архив пуст")
+        return
+    unknown = [a for a in args if a not in names]
+    if unknown:
+        print("Нет разделов: " + ", ".join(unknown) + ". Есть: " + ", ".join(names))
+        return
+    names = list(args) or names
+    headers, rows = archive.load(names)
+    print(f"Разделов: {len(names)}, задач: {len(rows)}")
+    q = input("Фильтр (пусто — все задачи): ").strip()
+    old = TaskTable(headers, rows)
+    old_typed = old.add_listener(TypedColumns())
+    try:
+        found = QueryEngine(old, old_typed).find(q) if q else range(len(rows))
+    except QueryError as e:
+        print("Ошибка в запросе:", e)
+        return
+    ask = ask_next_page if sys.stdin.isatty() else None
+    TableRenderer(old.headers, old.rows).render(found, ask_more=ask)
+
+
+def print_archive():
+    written = archive_old()
+    if written:
+        print("Перенесено в архив: " + ", ".join(f"{name}: {n}" for name, n in sorted(written.items())))
+    sizes = archive.sizes()
+    if not sizes:
+        print("Архив пуст")
+    for name, size in sizes:
+        print(f"{name}: {size / 1024:.1f} КБ")
+
+
 # автозагрузка при старте, если есть файл автосохранения
-if AUTOSAVE and os.path.exists(AUTOSAVE_FILE):
-    load_from_csv(AUTOSAVE_FILE)
+# (не в процессах пула разбора CSV: там модуль импортируется как __mp_main__)
+if __name__ == "__main__" and AUTOSAVE and os.path.exists(AUTOSAVE_FILE):
+    if load_from_csv(AUTOSAVE_FILE):
+        shared.mark_synced()
+        archive_old()
+if __name__ == "__main__":
+    if "--mirror" in sys.argv[1:-1]:
+        MIRROR_DIR = sys.argv[sys.argv.index("--mirror") + 1]
+    if MIRROR_DIR:
+        set_mirror(MIRROR_DIR)
+
+def prompt_row(prompt_text):
+    """Номер строки (No.) или ID задачи -> индекс строки или None с сообщением."""
+    text = input(prompt_text).strip()
+    if text.isdigit():
+        if 1 <= int(text) <= len(store):
+            return int(text) - 1
+        print("Строка с таким номером не найдена.")
+        return None
+    idx = store.slot(text)
+    if idx is None:
+        print("Задача с таким ID не найдена.")
+    return idx
+
+
+def display_order(time_from=None, time_to=None):
+    """
+    Номера строк в порядке вывода (по времени, как раньше сортировал PrettyTable)
+    и границы [start, stop) с учётом диапазона времени.
+    """
+    if TIME_COLUMN not in store.headers:
+        return range(len(store)), 0, len(store)
+    perm, start, stop = sorter.value_range(TIME_COLUMN, time_from, time_to)
+    if time_from is None and time_to is None:
+        stop = len(perm)  # строки без времени — в конце
+    return perm, start, stop
+
+
+def ask_next_page(printed):
+    answer = input(f"Показано строк: {printed}. Enter — дальше, q — выход: ")
+    return answer.strip().lower() != "q"
 
-def prompt_int(prompt_text):
+
+def show_rows(indices, paged=True):
+    """Постраничный вывод строк по номерам (0-based); ширины — из кэша статистики столбцов."""
+    renderer = TableRenderer(store.headers, store.rows, widths=col_stats.widths(store.headers))
+    ask = ask_next_page if paged and sys.stdin.isatty() else None
+    return renderer.render(indices, ask_more=ask)
+
+
+def parse_print_args(args):
+    """Разбор аргументов print_table: --from N --limit M --time HH:MM-HH:MM --all."""
+    opts = {"from": 1, "limit": None, "time_from": None, "time_to": None, "paged": True}
+    it = iter(args)
+    for arg in it:
+        if arg == "--all":
+            opts["paged"] = False
+        elif arg in ("--from", "--limit"):
+            value = next(it, "")
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"{arg}: ожидается положительное число")
+            opts[arg[2:]] = int(value)
+        elif arg == "--time":
+            lo, _, hi = next(it, "").partition("-")
+            for key, text in (("time_from", lo), ("time_to", hi)):
+                if text:
+                    minutes = parse_time(text)
+                    if minutes is None:
+                        raise ValueError(f"--time: неверное время '{text}'")
+                    opts[key] = minutes
+        else:
+            raise ValueError(f"Неизвестный параметр: {arg}")
+    return opts
+
+
+def print_table(args=()):
+    try:
+        opts = parse_print_args(args)
+    except ValueError as e:
+        print(e)
+        return
+    order, start, stop = display_order(opts["time_from"], opts["time_to"])
+    start = min(stop, start + opts["from"] - 1)
+    if opts["limit"] is not None:
+        stop = min(stop, start + opts["limit"])
+    shown = show_rows(islice(order, start, stop), paged=opts["paged"])
+    if shown < stop - start:
+        print(f"Показано {shown} из {stop - start}. Продолжить: print_table --from {opts['from'] + shown}")
+
+
+def print_around(idx, radius=5):
+    """Показывает строку idx и соседей по времени, а не всю таблицу."""
+    order, _, _ = display_order()
     try:
-        return int(input(prompt_text))
+        pos = order.index(idx)
     except ValueError:
+        pos = 0
+    show_rows(islice(order, max(0, pos - radius), pos + radius + 1), paged=False)
+
+
+def check_value(column_name, value):
+    """Сообщение об ошибке для значения столбца или None, если значение подходит."""
+    ctype = typed.column(column_name).ctype
+    if not ctype.validate(value):
+        return f"ожидается тип '{ctype.spec}'"
+    if column_name == REPEAT_COLUMN:
+        try:
+            parse_rule(value)
+        except ValueError as e:
+            return str(e)
+    return None
+
+
+def prompt_typed(column_name, prompt_text):
+    """Запрашивает значение столбца, пока оно не подойдёт под тип столбца."""
+    while True:
+        value = input(prompt_text)
+        error = check_value(column_name, value)
+        if error is None:
+            return value
+        print(f"Значение не подходит: {error}, попробуйте снова")
+
+
+def print_upcoming(args=()):
+    """Ближайшие срабатывания задач с учётом повторов."""
+    limit = int(args[0]) if args and args[0].isdigit() else 20
+    items = scheduler.upcoming(limit)
+    if not items:
+        print("Нет запланированных задач")
+    for due, idx in items:
+        print(f"{due:%d.%m %H:%M}  [{idx + 1}] {scheduler.describe(idx)}")
+    if scheduler.invalid:
+        print(f"Строк с неверным правилом повтора: {scheduler.invalid}")
+
+
+def calendar_day(args, what):
+    """День из аргумента команды (по умолчанию сегодня) или None с сообщением."""
+    if not calendar.ensure():
+        print("В таблице нет столбца 'Date' (дата задачи, YYYY-MM-DD)")
         return None
+    day = parse_day(args[0] if args else "")
+    if day is None:
+        print(f"{what}: неверная дата '{args[0]}'")
+    return day
+
+
+def print_calendar(cmd, args=()):
+    """Задачи на день или неделю: читаются только корзины нужных дней."""
+    day = calendar_day(args, cmd)
+    if day is None:
+        return
+    if cmd == "week":
+        start = week_start(day)
+        found = calendar.week(day)
+        title = f"Неделя {format_date(start)} — {format_date(start + 6)}"
+    else:
+        found = calendar.day(day)
+        title = format_date(day)
+    print(f"{title}: задач {len(found)}")
+    if found:
+        show_rows(found)
+
+
+def stats_bar(n, top, width=30):
+    return "#" * max(1 if n else 0, round(n * width / top)) if top else ""
+
+
+def print_stats(args=()):
+    """Сводки из счётчиков Aggregates: по часам или по значениям столбца, без прохода по таблице."""
+    if args:
+        name = " ".join(args)
+        col = next((h for h in store.headers if h == name or h.strip() == name.strip()), None)
+        if col is None:
+            print(f"Столбец '{name}' не найден")
+            return
+        groups = aggregates.group_by(col)
+        top = groups[0][1] if groups else 0
+        stats_table = PrettyTable([col.strip(), "Задач", ""])
+        stats_table.align = "l"
+        for value, n in groups:
+            stats_table.add_row([value or "(пусто)", n, stats_bar(n, top)])
+        print(stats_table)
+        return
+    print(f"Задач: {aggregates.count}, выполнено: {aggregates.done}, без времени: {aggregates.untimed}")
+    top = max(aggregates.hours)
+    if not top:
+        return
+    stats_table = PrettyTable(["Час", "Задач", ""])
+    stats_table.align = "l"
+    for hour in range(HOURS):
+        n = aggregates.hours[hour]
+        if n:
+            stats_table.add_row([f"{hour:02d}:00", n, stats_bar(n, top)])
+    print(stats_table)
+
+
+def print_overdue():
+    if not calendar.ensure():
+        print("В таблице нет столбца 'Date' (дата задачи, YYYY-MM-DD)")
+        return
+    found = calendar.overdue()
+    if not found:
+        print("Просроченных задач нет")
+        return
+    print(f"Просрочено: {len(found)}")
+    show_rows(found)
+
+
+def purge_before(args=()):
+    """Удаляет задачи старше указанного дня (без аргумента — спрашивает дату)."""
+    if not args:
+        args = [input("Удалить задачи с датой раньше (YYYY-MM-DD): ").strip()]
+    day = calendar_day(args, "purge_before")
+    if day is None:
+        return
+    old = calendar.before(day)
+    if not old:
+        print("Нет задач раньше " + format_date(day))
+        return
+    confirm = input(f"Удалить задач: {len(old)} (раньше {format_date(day)})? (y/n): ").strip().lower()
+    if confirm == "y":
+        store.delete(old)
+        autosave()
+        print(f"Удалено: {len(old)}")
+
+
+def dedupe_key(args):
+    """Ключевые столбцы из аргументов команды (через запятую); без аргументов — все, кроме ID."""
+    try:
+        dup_index.set_key(resolve_key(store.headers, " ".join(args)) or None)
+        return True
+    except KeyError as e:
+        print(f"Столбец {e} не найден")
+        return False
+
+
+def print_duplicates(args=()):
+    """Группы одинаковых задач: один проход по таблице (хэш ключа строки)."""
+    if not dedupe_key(args):
+        return
+    groups = dup_index.groups()
+    if not groups:
+        print("Дубликатов нет")
+        return
+    print(f"Групп дубликатов: {len(groups)}, лишних копий: {sum(len(g) - 1 for g in groups)}")
+    for group in groups:
+        print("Строки " + ", ".join(str(i + 1) for i in group) + ": " + scheduler.describe(group[0]))
+
+
+def dedupe(args=()):
+    if not dedupe_key(args):
+        return
+    extra = dup_index.extra()
+    if not extra:
+        print("Дубликатов нет")
+        return
+    confirm = input(f"Удалить лишних копий: {len(extra)}? (y/n): ").strip().lower()
+    if confirm == "y":
+        store.delete(extra)
+        autosave()
+        print(f"Удалено: {len(extra)}")
+
+
+def merge_file():
+    """Добавляет задачи из файла потоком, пропуская те, что уже есть в таблице."""
+    print("Из какого файла добавить задачи (без расширения — .csv; можно .json, .jsonl, .csv.gz...)?")
+    name = input("--> ").strip()
+    if not name:
+        return
+    filename = with_ext(name, ".csv")
+    if not os.path.exists(filename):
+        print("Файл не найден")
+        return
+    dup_index.set_key(None)
+    try:
+        added, skipped = merge_records(store, dup_index, iter_records(filename))
+    except Exception as e:
+        print("Ошибка при чтении файла:", e)
+        return
+    autosave()
+    print(f"Добавлено: {added}, пропущено дубликатов: {skipped}")
+
+
+def print_diff_changes(result, limit=20):
+    """Первые изменения отчёта diff: + добавлена, - удалена, ~ изменена (столбец: было → стало)."""
+    for change in result.changes[:limit]:
+        if change.kind == "added":
+            print(GREEN + f"+ {change.key}" + RESET)
+        elif change.kind == "removed":
+            print(RED + f"- {change.key}" + RESET)
+        else:
+            details = "; ".join(f"{h.strip()} {change.old.get(h, '')!r} → {change.new.get(h, '')!r}" for h in change.columns)
+            print(YELLOW + f"~ {change.key}: {details}" + RESET)
+    shown = min(limit, len(result.changes))
+    total = result.counts["added"] + result.counts["removed"] + result.counts["changed"]
+    if total > shown:
+        print(f"... и ещё {total - shown}")
+
+
+def diff(args=()):
+    """diff файл — что изменится в файле при сохранении таблицы; diff старый новый — сравнение двух файлов."""
+    if not args:
+        args = input("Файлы для сравнения (один — с текущей таблицей, два — между собой): ").split()
+    names = [with_ext(a, ".csv") for a in args[:2]]
+    missing = [n for n in names if not os.path.exists(n)]
+    if not names or missing:
+        print("Файл не найден: " + ", ".join(missing))
+        return
+    try:
+        if len(names) == 1:
+            result = diff_table(names[0], store.headers, store.rows)
+        else:
+            result = diff_files(names[0], names[1])
+    except Exception as e:
+        print("Ошибка при сравнении:", e)
+        return
+    if result.empty:
+        print("Различий нет")
+        return
+    print(result.summary())
+    print_diff_changes(result)
+
+
+def bulk():
+    """Одна операция над всеми задачами, подходящими под фильтр: проверка, изменение и автосохранение — по разу."""
+    print("Введите фильтр задач (как в find)")
+    q = input("--> ").strip()
+    if not q:
+        print("Пустой запрос")
+        return
+    try:
+        found = query.find(q)
+    except QueryError as e:
+        print("Ошибка в запросе:", e)
+        return
+    if not found:
+        print("Ничего не найдено")
+        return
+    print(f"Найдено: {len(found)}. Операция:")
+    print(OPERATIONS_HELP)
+    try:
+        op = parse_operation(query, input("--> "))
+    except ValueError as e:
+        print("Ошибка в операции:", e)
+        return
+    plan = plan_bulk(query, found, op)
+    if plan.errors:
+        print(f"Ничего не изменено: не подходят значения в строках ({len(plan.errors)})")
+        print(describe_errors(plan))
+        return
+    if not plan.changes:
+        print("Значения уже такие, менять нечего")
+        return
+    for idx, old, new in preview(store, plan):
+        print(f"{idx + 1}: {RED}{old}{RESET} -> {GREEN}{new}{RESET}")
+    confirm = input(f"Изменить задач: {len(plan.changes)} (без изменений: {plan.unchanged})? (y/n): ").strip().lower()
+    if confirm == "y":
+        with metrics.timer("bulk.apply"):
+            done = apply_bulk(store, plan)
+        autosave()
+        print(f"Изменено: {done}")
+
+
+def computed_column():
+    """Задать, изменить или снять определение вычисляемого столбца."""
+    for name, text, state in computed.describe():
+        print(f"{name} = {text}" + (f"  ({state})" if state else ""))
+    print("Введите название столбца (новый столбец будет добавлен)")
+    name = input("--> ").strip()
+    if not name or name == ID_COLUMN:
+        print("Неверное название столбца")
+        return
+    print("Введите выражение: имена столбцов в нижнем регистре, пробелы -> _ (todo_list), или col(\"TODO list:\");")
+    print("функции: now(), today(), hours(), hhmm(), upper(), lower(), len(), round(), min(), max(). Пусто — снять определение")
+    text = input("--> ").strip()
+    try:
+        if text:
+            with metrics.timer("computed.define"):
+                computed.define(name, text)
+        elif not computed.remove(name):
+            print("У столбца нет определения")
+            return
+    except ValueError as e:
+        print(e)
+        return
+    if AUTOSAVE:
+        computed.save(AUTOSAVE_FILE)
+    autosave()
+    print(f"Столбец '{name}': " + (text or "определение снято, значения остались"))
+    if name in computed.errors:
+        print("Столбец не вычисляется:", computed.errors[name])
+
+
+DAEMON_POLL = 30  # секунд: как часто демон проверяет файл на чужие изменения
+
+
+def run_daemon():
+    """Режим демона: печатает напоминания в момент срабатывания (Ctrl+C — выход)."""
+    print("Напоминания включены (Ctrl+C — выход)")
+    try:
+        while True:
+            pull_changes()
+            sync_mirror()
+            for due, idx in scheduler.pop_due():
+                print(f"⏰ {due:%H:%M}  {scheduler.describe(idx)}", flush=True)
+            wait = scheduler.seconds_until_next()
+            time.sleep(DAEMON_POLL if wait is None else min(wait, DAEMON_POLL))
+    except KeyboardInterrupt:
+        pass
 
 def main():
     while True:
         print("Введите команду, help - для помощи")
         comm = input("--> ").strip()
+        pull_changes()
+        # столбцы с now()/today() пересчитываются не чаще раза в минуту
+        computed.tick()
+        cmd, *args = comm.split() or [""]
 
-        match comm:
+        match cmd:
             case "add":
                 while True:
                     print("ex - для выхода")
@@ -231,65 +913,73 @@ def main():
                     if comment == "ex":
                         break
 
-                    additional_columns = []
-                    for column_name in table_of_TODO.field_names[3:]:
-                        value = (
-                            input(
-                                f"Заполните поле '{column_name}' (оставьте пустым, если ничего не вводить): "
+                    values = dict(zip(DEFAULT_HEADERS, [time_of_move_our, move, comment]))
+                    for column_name in store.headers:
+                        if column_name in values or column_name == ID_COLUMN or column_name in computed.defs:
+                            continue
+                        values[column_name] = (
+                            prompt_typed(
+                                column_name,
+                                f"Заполните поле '{column_name}' (оставьте пустым, если ничего не вводить): ",
                             )
                             or ""
                         )
-                        additional_columns.append(value)
 
-                    new_row = [time_of_move_our, move, comment] + additional_columns
-                    table_of_TODO.add_row(new_row)
-                    print(table_of_TODO)
-                    if AUTOSAVE:
-                        save_to_csv(AUTOSAVE_FILE)
+                    # ID новой строке выдаёт хранилище
+                    new_row = [values.get(h, "") for h in store.headers]
+                    print_around(store.append(new_row))
+                    autosave()
 
             case "delete":
-                print("Введите номер строки в таблице, которую нужно удалить")
-                num = prompt_int("--> ")
-                if num is None:
-                    print("Ожидалось число.")
-                else:
-                    try:
-                        table_of_TODO.del_row(num - 1)
-                        if AUTOSAVE:
-                            save_to_csv(AUTOSAVE_FILE)
-                    except IndexError:
-                        print("Строка с таким номером не найдена.")
+                print("Введите номер строки (No.) или ID задачи, которую нужно удалить (можно 1,3,5-7)")
+                try:
+                    rows = parse_ranges(input("--> "), len(store), store.slot)
+                except ValueError as e:
+                    print(e)
+                    rows = None
+                if rows and (len(rows) == 1 or input(f"Удалить строки {rows.describe()} ({len(rows)})? (y/n): ").strip().lower() == "y"):
+                    # диапазон удаляется интервалом, без разворачивания в номера
+                    store.delete(rows)
+                    autosave()
 
             case "print_table":
-                print(table_of_TODO)
+                print_table(args)
 
             case "help":
                 print(table_of_command)
 
             case "save_result":
-                print("Как будет называться файл?")
-                name_of_file = input("--> ")
-                save_to_csv(f"{name_of_file}.csv")
+                print("Как будет называться файл? (без расширения — .csv; для сжатия .csv.gz или .csv.xz)")
+                name_of_file = with_ext(input("--> "), ".csv")
+                if os.path.exists(name_of_file) and os.path.abspath(name_of_file) != os.path.abspath(AUTOSAVE_FILE):
+                    # чужой файл: сначала показываем, что в нём изменится
+                    result = diff_table(name_of_file, store.headers, store.rows)
+                    if not result.empty:
+                        print("Файл уже существует. При сохранении: " + result.summary())
+                        print_diff_changes(result, 10)
+                        if input("Перезаписать? (y/n): ").strip().lower() != "y":
+                            continue
+                # явное сохранение пользователем сразу сбрасывается на диск
+                save_to_csv(name_of_file, "every-op")
                 print("Сохранено.")
-                if AUTOSAVE:
-                    save_to_csv(AUTOSAVE_FILE)
+                autosave()
 
             case "open_file":
                 print("Введите название файла, который нужно открыть")
                 name_file = input("--> ")
-                if load_from_csv(f"{name_file}.csv"):
+                if load_from_csv(with_ext(name_file, ".csv")):
                     print("Файл загружен.")
                 else:
                     print("Не удалось открыть файл.")
-                print(table_of_TODO)
+                print_table(["--limit", str(PAGE_SIZE), "--all"])
 
             case "delete_file":
                 print("Введите название файла, который нужно удалить")
-                filename = input("--> ")
-                if os.path.exists(f"{filename}.csv"):
-                    confirm = input(f"Удалить файл {filename}.csv? (y/n): ").strip().lower()
+                filename = with_ext(input("--> "), ".csv")
+                if os.path.exists(filename):
+                    confirm = input(f"Удалить файл {filename}? (y/n): ").strip().lower()
                     if confirm == "y":
-                        os.remove(f"{filename}.csv")
+                        os.remove(filename)
                         print(f"Файл '{filename}' удалён")
                     else:
                         print("Операция отменена")
@@ -297,20 +987,19 @@ def main():
                     print("Файл не существует")
 
             case "list_files":
-                files = [f for f in os.listdir(".") if f.endswith(".csv")]
+                files = list_data_files(CSV_EXTS + JSON_EXTS, exclude=[FEED_SUFFIX])
                 if len(files) > 0:
-                    print("Доступные файлы (.csv): ")
+                    print("Доступные файлы (.csv, .json, в том числе сжатые .gz/.xz/.bz2): ")
                     for i, file in enumerate(files, start=1):
                         print(f"{i}. {file}")
                 else:
-                    print("Нет доступных .csv файлов")
+                    print("Нет доступных файлов с задачами")
 
             case "delete_all":
                 confirm = input("Удалить все строки? (y/n): ").strip().lower()
                 if confirm == "y":
-                    table_of_TODO.clear_rows()
-                    if AUTOSAVE:
-                        save_to_csv(AUTOSAVE_FILE)
+                    store.clear()
+                    autosave()
                     print("Все строки удалены.")
 
             case "add_column":
@@ -319,19 +1008,21 @@ def main():
                     print("y/n")
                     yes_or_no = input("--> ")
                     if yes_or_no == "y":
-                        table_of_TODO.clear_rows()
-                        print(table_of_TODO)
+                        store.clear()
+                        print_table(["--all"])
                         print(
                             "Введите название колонки, которую хотите добавить, ex - для выхода"
                         )
                         name_of_table = input("--> ")
                         if name_of_table == "ex":
                             break
-                        table_of_TODO.add_column(name_of_table, [])
+                        if name_of_table in store.headers:
+                            print("Такой столбец уже есть!")
+                            continue
+                        store.add_column(name_of_table)
                         print("Теперь таблица выглядит так:")
-                        print(table_of_TODO)
-                        if AUTOSAVE:
-                            save_to_csv(AUTOSAVE_FILE)
+                        print_table(["--all"])
+                        autosave()
                     else:
                         break
 
@@ -342,42 +1033,38 @@ def main():
                 )
                 col_to_delete = input("--> ")
                 if col_to_delete.lower() == "all":
-                    basic_columns = ["Time: ", "TODO list:", "Comments: "]
-                    for col in table_of_TODO.field_names[:]:
-                        if col not in basic_columns:
-                            table_of_TODO.del_column(col)
-                    if AUTOSAVE:
-                        save_to_csv(AUTOSAVE_FILE)
-                elif col_to_delete in table_of_TODO.field_names:
-                    table_of_TODO.del_column(col_to_delete)
-                    if AUTOSAVE:
-                        save_to_csv(AUTOSAVE_FILE)
+                    store.delete_columns([col for col in store.headers if col not in DEFAULT_HEADERS])
+                    autosave()
+                elif col_to_delete == ID_COLUMN:
+                    print("Столбец ID нужен для поиска задач, его нельзя удалить")
+                elif col_to_delete in store.headers:
+                    store.delete_columns([col_to_delete])
+                    autosave()
                 else:
                     print("Такого столбца не существует!")
 
             case "clear_all":
                 confirm = input("Восстановить таблицу в исходное состояние? (y/n): ").strip().lower()
                 if confirm == "y":
-                    table_of_TODO.clear()
-                    table_of_TODO.field_names = ["Time: ", "TODO list:", "Comments: "]
-                    if AUTOSAVE:
-                        save_to_csv(AUTOSAVE_FILE)
+                    store.reset(list(DEFAULT_HEADERS), [])
+                    autosave()
                     print("Таблица восстановлена в исходное состояние.")
 
             case "edit":
-                print("Введите номер строки для редактирования")
-                num = prompt_int("--> ")
-                if num is None:
-                    print("Ожидалось число.")
-                else:
-                    idx = num - 1
+                print("Введите номер строки (No.) или ID задачи для редактирования")
+                idx = prompt_row("--> ")
+                if idx is not None:
+                    task_id = store.id_of(idx)
                     try:
-                        row = table_of_TODO._rows[idx]
+                        row = store.rows[idx]
                         print("Текущая строка:", row)
                         # редактируем по полям
                         new_row = []
-                        for i, col in enumerate(table_of_TODO.field_names):
+                        for i, col in enumerate(store.headers):
                             cur = row[i] if i < len(row) else ""
+                            if col == ID_COLUMN or col in computed.defs:
+                                new_row.append(cur)
+                                continue
                             val = input(f"{col} (текущее: '{cur}') - оставить пустым для сохранения: ")
                             if val == "":
                                 new_row.append(cur)
@@ -389,56 +1076,161 @@ def main():
                                         new_row.append(cur)
                                     else:
                                         new_row.append(norm)
+                                elif (error := check_value(col, val)) is not None:
+                                    print(f"Значение не изменено ({error}).")
+                                    new_row.append(cur)
                                 else:
                                     new_row.append(val)
-                        table_of_TODO._rows[idx] = new_row
-                        if AUTOSAVE:
-                            save_to_csv(AUTOSAVE_FILE)
+                        # строку ищем заново по ID: пока шёл ввод, номера могли сдвинуться
+                        idx = store.slot(task_id)
+                        if idx is None:
+                            raise IndexError(task_id)
+                        store.update(idx, new_row)
+                        autosave()
                     except IndexError:
                         print("Строка с таким номером не найдена.")
 
             case "find":
-                print("Введите поисковую строку")
-                q = input("--> ").strip().lower()
+                print("Введите поисковую строку или фильтр")
+                print('Например: time >= 09:00 and time < 12:00 and Comments contains "deploy"')
+                q = input("--> ").strip()
                 if not q:
                     print("Пустой запрос")
                 else:
-                    results = PrettyTable(table_of_TODO.field_names)
-                    for r in table_of_TODO._rows:
-                        # ищем в каждой ячейке
-                        if any(q in str(cell).lower() for cell in r):
-                            results.add_row(r)
-                    if results.rowcount == 0:
-                        print("Ничего не найдено")
-                    else:
-                        print(results)
+                    try:
+                        found = query.find(q)
+                    except QueryError as e:
+                        print("Ошибка в запросе:", e)
+                        found = None
+                    if found is not None:
+                        if not found:
+                            print("Ничего не найдено")
+                        else:
+                            print(f"Найдено: {len(found)}")
+                            show_rows(found)
+
+            case "bulk":
+                bulk()
 
             case "export_json":
-                print("Как назвать файл для экспорта (без расширения)?")
+                print("Как назвать файл для экспорта (без расширения — .json; можно .jsonl, .json.gz, .json.xz)?")
                 name = input("--> ").strip()
                 if name:
-                    export_json(f"{name}.json")
+                    export_json(with_ext(name, ".json"))
                     print("Экспорт выполнен.")
 
             case "import_json":
-                print("Какой JSON-файл импортировать (без расширения)?")
+                print("Какой JSON-файл импортировать (без расширения — .json)?")
                 name = input("--> ").strip()
                 if name:
-                    import_json(f"{name}.json")
-                    if AUTOSAVE:
-                        save_to_csv(AUTOSAVE_FILE)
+                    import_json(with_ext(name, ".json"))
+                    autosave()
                     print("Импорт выполнен.")
 
+            case "column_type":
+                print("Введите название столбца")
+                col = input("--> ")
+                if col not in store.headers:
+                    print("Такого столбца не существует!")
+                else:
+                    print("Введите тип: " + ", ".join(TYPE_NAMES) + " (для enum можно enum:a|b|c)")
+                    spec = input("--> ").strip()
+                    try:
+                        ColumnType.from_spec(spec)
+                        typed.set_type(store, col, spec)
+                        if AUTOSAVE:
+                            save_schema(AUTOSAVE_FILE, typed.schema)
+                        print(f"Тип столбца '{col}': {spec}")
+                    except ValueError as e:
+                        print(e)
+
+            case "computed_column":
+                computed_column()
+
+            case "column_info":
+                print("Введите название столбца")
+                col = input("--> ")
+                if col not in store.headers:
+                    print("Такого столбца не существует!")
+                else:
+                    for key, value in typed.aggregate(col).items():
+                        print(f"{key}: {value}")
+
+            case "column_stats":
+                stats_table = PrettyTable(["Столбец", "Макс. ширина", "Пустых", "Различных (оценка)"])
+                for item in col_stats.summary():
+                    stats_table.add_row([item["column"], item["width"], item["empty"], item["distinct"]])
+                print(stats_table)
+
+            case "stats":
+                print_stats(args)
+
+            case "io_stats":
+                io_table = PrettyTable(["Операция", "Раз", "Всего, мс", "p50, мс", "p95, мс", "Макс, мс"])
+                for item in metrics.summary():
+                    io_table.add_row([item["name"], item["count"], item.get("total_ms", ""), item.get("p50_ms", ""),
+                                      item.get("p95_ms", ""), item.get("max_ms", "")])
+                print(f"Надёжность автосохранения: {DURABILITY}")
+                print(io_table)
+
+            case "watch":
+                watch(args)
+                pull_changes()
+
+            case "upcoming":
+                print_upcoming(args)
+
+            case "day" | "week":
+                print_calendar(cmd, args)
+
+            case "overdue":
+                print_overdue()
+
+            case "purge_before":
+                purge_before(args)
+
+            case "duplicates":
+                print_duplicates(args)
+
+            case "dedupe":
+                dedupe(args)
+
+            case "merge_file":
+                merge_file()
+
+            case "diff":
+                diff(args)
+
+            case "archive":
+                print_archive()
+
+            case "mirror":
+                mirror_command(args)
+
+            case "history":
+                history(args)
+
+            case "sort_by":
+                print("Введите название столбца для сортировки")
+                col = input("--> ")
+                if col not in store.headers:
+                    print("Такого столбца не существует!")
+                else:
+                    desc = input("По убыванию? (y/n): ").strip().lower() == "y"
+                    # порядок по разобранным значениям, таблица не переставляется
+                    show_rows(sorter.order([(col, desc)]))
+
             case "close":
                 # при выходе сохраняем автосохранение
-                if AUTOSAVE:
-                    save_to_csv(AUTOSAVE_FILE)
+                autosave()
+                committer.flush()
                 break
 
             case _:
                 print("Ошибка ввода")
 
-        table_of_TODO.sortby = "Time: "
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--daemon" in sys.argv[1:]:
+        run_daemon()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from todo_bulk import apply_bulk, parse_operation, plan_bulk
+from todo_feed import FEED_MAX_ROWS, ChangeFeed
+from todo_query import QueryEngine
+from todo_schema import TypedColumns
+from todo_sort import SortCache
+from todo_store import ID_COLUMN, TaskTable
+
+KEYS = [("Priority [int]", True), ("Time: ", False)]
+
+
+@pytest.fixture
+def setup():
+    table = TaskTable(["Time: ", "TODO list:", "Priority [int]"], id_column=ID_COLUMN)
+    typed = table.add_listener(TypedColumns())
+    sorter = SortCache(table, typed)
+    feed = ChangeFeed(table)
+    rnd = random.Random(1)
+    table.reset(list(table.headers),
+                [[f"{rnd.randrange(24):02d}:00", f"t{i}", str(rnd.randrange(10))] for i in range(2000)])
+    return table, typed, sorter, feed
+
+
+def sort_key(table, i):
+    return -int(table.rows[i][2]), table.rows[i][0]
+
+
+@pytest.mark.parametrize("n", [1, 5, 50, 1500])
+def test_update_many_one_notification(setup, n):
+    table, typed, sorter, feed = setup
+    sorter.order(KEYS)
+    rnd = random.Random(n)
+    updates = []
+    for i in rnd.sample(range(len(table.rows)), n):
+        row = list(table.rows[i])
+        row[0] = f"{rnd.randrange(24):02d}:30"
+        row[2] = str(rnd.randrange(10))
+        updates.append((i, row))
+    seq = feed.seq
+    assert table.update_many(updates) == n
+    assert feed.seq == seq + 1
+    change = feed.history[-1]
+    assert change["op"] == "updates" and change["indices"] == sorted(i for i, _ in updates)
+    assert ("rows" in change) == (n <= FEED_MAX_ROWS)
+    order = list(sorter.order(KEYS))
+    assert sorted(order) == list(range(len(table.rows)))
+    keys = [sort_key(table, i) for i in order]
+    assert keys == sorted(keys)
+    assert typed.value("Priority [int]", updates[0][0]) == int(updates[0][1][2])
+
+
+def test_update_many_keeps_ids_last_wins(setup):
+    table, _, _, _ = setup
+    task_id = table.id_of(3)
+    assert table.update_many([(3, ["01:00", "a", "1", "other"]), (3, ["02:00", "b", "2"])]) == 1
+    assert table.rows[3][:3] == ["02:00", "b", "2"]
+    assert table.id_of(3) == task_id and table.slot(task_id) == 3
+    assert table.update_many([]) == 0
+
+
+def test_apply_bulk(setup):
+    table, typed, _, feed = setup
+    engine = QueryEngine(table, typed)
+    indices = list(range(0, len(table.rows), 3))
+    plan = plan_bulk(engine, indices, parse_operation(engine, "set Priority 7"))
+    assert not plan.errors and len(plan.changes) + plan.unchanged == len(indices)
+    seq = feed.seq
+    assert apply_bulk(table, plan) == len(plan.changes)
+    assert feed.seq == seq + 1
+    assert all(table.rows[i][2] == "7" for i in indices)
+
+
+def test_bulk_validation(setup):
+    table, typed, _, _ = setup
+    engine = QueryEngine(table, typed)
+    plan = plan_bulk(engine, [0, 1], parse_operation(engine, "set Priority high"))
+    assert len(plan.errors) == 2
+    with pytest.raises(ValueError):
+        apply_bulk(table, plan)
+    with pytest.raises(ValueError):
+        parse_operation(engine, "shift Priority +1")
+    shifted = plan_bulk(engine, [0], parse_operation(engine, "shift Time +30"))
+    assert shifted.changes[0][2] == table.rows[0][0][:2] + ":30"
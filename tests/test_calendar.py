@@ -0,0 +1,87 @@
+import datetime
+import random
+
+import pytest
+
+from todo_calendar import CalendarIndex, parse_day, week_start
+from todo_schema import TypedColumns, format_date
+from todo_store import ID_COLUMN, TaskTable
+
+BASE = datetime.date(2026, 3, 1).toordinal()
+
+
+def random_row(rnd, n):
+    date = "" if rnd.random() < 0.2 else format_date(BASE + rnd.randrange(30))
+    return [date, f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}", f"task {n}", ""]
+
+
+@pytest.fixture
+def calendar():
+    table = TaskTable(["Date", "Time: ", "TODO list:", "Status"], id_column=ID_COLUMN)
+    typed = table.add_listener(TypedColumns())
+    cal = CalendarIndex(table, typed)
+    rnd = random.Random(1)
+    table.reset(list(table.headers), [random_row(rnd, n) for n in range(300)])
+    assert cal.ensure()
+    return table, cal
+
+
+def rebuilt(cal):
+    cal.dirty = True
+    cal.ensure()
+    return {day: list(rows) for day, rows in cal.buckets.items()}, list(cal.days)
+
+
+def test_incremental_matches_rebuild(calendar):
+    table, cal = calendar
+    rnd = random.Random(2)
+    for step in range(300):
+        op = rnd.random()
+        if op < 0.4 and table.rows:
+            start = rnd.randrange(len(table.rows))
+            picked = [start + k for k in range(rnd.randint(1, 5))]
+            picked += rnd.sample(range(len(table.rows)), min(3, len(table.rows)))
+            table.delete(i for i in picked if i < len(table.rows))
+            assert not cal.dirty  # удаление не перестраивает индекс
+        elif op < 0.7:
+            table.extend([random_row(rnd, step) for _ in range(rnd.randint(1, 4))])
+        elif table.rows:
+            i = rnd.randrange(len(table.rows))
+            row = list(table.rows[i])
+            row[0] = random_row(rnd, step)[0]
+            table.update(i, row)
+        if step % 25 == 0:
+            state = ({day: list(rows) for day, rows in cal.buckets.items()}, list(cal.days))
+            assert state == rebuilt(cal)
+
+
+def test_day_and_week(calendar):
+    table, cal = calendar
+    day = cal.day(BASE + 3)
+    assert day and all(table.rows[i][0] == format_date(BASE + 3) for i in day)
+    times = [table.rows[i][1] for i in day]
+    assert times == sorted(times)
+    week = cal.week(BASE + 3)
+    start = week_start(BASE + 3)
+    expected = [i for i, r in enumerate(table.rows)
+                if r[0] and start <= datetime.date.fromisoformat(r[0]).toordinal() < start + 7]
+    assert sorted(week) == expected
+
+
+def test_overdue_skips_done(calendar):
+    table, cal = calendar
+    now = datetime.datetime.combine(datetime.date.fromordinal(BASE + 10), datetime.time(12, 0))
+    late = cal.overdue(now)
+    assert late
+    row = list(table.rows[late[0]])
+    row[3] = "Готово"
+    table.update(late[0], row)
+    assert late[0] not in cal.overdue(now)
+
+
+def test_parse_day():
+    today = datetime.date(2026, 3, 1)
+    assert parse_day("завтра", today) == today.toordinal() + 1
+    assert parse_day("-7", today) == today.toordinal() - 7
+    assert parse_day("2026-03-05", today) == today.toordinal() + 4
+    assert parse_day("nonsense", today) is None
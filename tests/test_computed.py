@@ -0,0 +1,130 @@
+import datetime
+import os
+
+import pytest
+
+import todo_computed
+from todo_computed import ComputedColumns, Expression, ident
+from todo_feed import ChangeFeed
+from todo_io import read_csv, write_csv
+from todo_schema import TypedColumns
+from todo_shared import SharedFile
+from todo_store import ID_COLUMN, TaskTable
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемые "текущие минуты" для столбцов с clock()."""
+    value = [600]
+    monkeypatch.setitem(todo_computed.FUNCTIONS, "clock", (lambda: value[0], True))
+    return value
+
+
+def make_table(rows=None):
+    table = TaskTable(["Time: ", "TODO list:", "Priority [int]"], id_column=ID_COLUMN)
+    typed = table.add_listener(TypedColumns())
+    computed = ComputedColumns(table, typed)
+    table.reset(list(table.headers), rows or [["09:00", "abc", "2"], ["10:30", "de", ""], ["23:50", "f", "5"]])
+    return table, typed, computed
+
+
+def cell(table, i, header):
+    return table.rows[i][table.headers.index(header)]
+
+
+@pytest.mark.parametrize("text", [
+    "__import__('os')", "todo_list.upper()", "time.__class__", "eval('1')", "open('x')",
+    "[x for x in time]", "lambda: 1", "upper(s=todo_list)", "col(todo_list)", "time +",
+])
+def test_whitelist_rejects(text):
+    with pytest.raises(ValueError):
+        Expression(text)
+
+
+def test_whitelist_accepts():
+    e = Expression('upper(col("TODO list:")) if priority > 1 else hhmm(time + 30)')
+    assert e.columns == {"TODO list:"} and e.names == {"priority", "time"}
+    assert not e.volatile and Expression("time - now()").volatile
+    assert ident("TODO list:") == "todo_list" and ident("Priority [int]") == "priority"
+
+
+def test_values_and_dependencies():
+    table, typed, computed = make_table()
+    computed.define("End [time]", "time + 30")
+    computed.define("Score [int]", "priority * 2 + len(todo_list)")
+    computed.define("Twice [int]", "score * 2")
+    assert [cell(table, i, "End [time]") for i in range(3)] == ["09:30", "11:00", "00:20"]
+    assert cell(table, 0, "Score [int]") == "7" and cell(table, 0, "Twice [int]") == "14"
+    assert cell(table, 1, "Score [int]") == ""  # пустой вход — пустое значение
+    assert typed.value("Twice [int]", 0) == 14
+    row = list(table.rows[0])
+    row[table.headers.index("Priority [int]")] = "10"
+    table.update(0, row)
+    assert cell(table, 0, "Twice [int]") == "46"
+    table.append(["08:00", "xy", "1"])
+    assert cell(table, 3, "Score [int]") == "4"
+    with pytest.raises(ValueError):
+        computed.define("Score [int]", "twice + 1")  # цикл
+    assert cell(table, 0, "Score [int]") == "23"
+    table.delete_columns(["Twice [int]"])
+    assert "Twice [int]" not in computed.defs
+
+
+def test_tick_one_feed_entry(clock):
+    table, _, computed = make_table([[f"{h:02d}:00", f"t{h}", ""] for h in range(24)])
+    feed = ChangeFeed(table)
+    computed.define("Left [time]", "time - clock()")
+    assert cell(table, 12, "Left [time]") == "02:00"
+    clock[0] = 601
+    seq = feed.seq
+    assert computed.tick(datetime.datetime(2026, 1, 1, 10, 1)) == 24
+    assert feed.seq == seq + 1 and feed.history[-1]["op"] == "updates"
+    assert cell(table, 12, "Left [time]") == "01:59"
+    clock[0] = 700
+    assert computed.tick(datetime.datetime(2026, 1, 1, 10, 1, 30)) == 0  # та же минута
+
+
+def test_volatile_columns_stay_out_of_merge(tmp_path, clock):
+    path = str(tmp_path / "tasks.csv")
+    write_csv(path, ["Time: ", "TODO list:"], [[f"{i:02d}:00", f"t{i}"] for i in range(20)], "none")
+
+    def open_shared():
+        table = TaskTable(id_column=ID_COLUMN)
+        computed = ComputedColumns(table, table.add_listener(TypedColumns()))
+        table.reset(*read_csv(path))
+        if not computed.defs:
+            computed.define("Left [int]", "time - clock()")
+        shared = SharedFile(table, path)
+        shared.mark_synced()
+        return table, computed, shared
+
+    def save(table, shared):
+        shared.save(lambda: write_csv(path, table.headers, table.rows, "none"))
+
+    t1, c1, s1 = open_shared()
+    save(t1, s1)
+    t2, c2, s2 = open_shared()
+    for minute in range(1, 4):
+        # у процессов разное "сейчас": значения вычисляемого столбца расходятся
+        clock[0] = minute * 7
+        assert c1.tick(datetime.datetime(2026, 1, 1, 10, minute))
+        clock[0] = minute * 13
+        assert c2.tick(datetime.datetime(2026, 1, 1, 11, minute))
+        assert not s1.dirty and not s2.dirty
+        row = list(t1.rows[minute])
+        row[1] = f"edit{minute}"
+        t1.update(minute, row)
+        save(t1, s1)
+        t2.append([f"05:{minute:02d}", f"new{minute}"])
+        save(t2, s2)
+        s1.pull()
+        assert len(t1.rows) == len(t2.rows) == 20 + minute
+        assert sorted(r[:2] for r in t1.rows) == sorted(r[:2] for r in t2.rows)
+    # слияние по CSV (без журнала изменений)
+    os.remove(path + ".feed.jsonl")
+    t1.delete([0])
+    save(t1, s1)
+    clock[0] = 900
+    c2.tick(datetime.datetime(2026, 1, 1, 13, 0))
+    s2.pull()
+    assert sorted(r[:2] for r in t1.rows) == sorted(r[:2] for r in t2.rows)
@@ -0,0 +1,107 @@
+import json
+import random
+
+import pytest
+
+from todo_diff import diff_files, diff_records, diff_table, headers_of
+from todo_io import write_csv
+from todo_store import ID_COLUMN
+
+HEADERS = ["Time: ", "TODO list:", "Comments: "]
+
+
+def records(headers, rows):
+    return [dict(zip(headers, row)) for row in rows]
+
+
+def write_json_records(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False)
+    return str(path)
+
+
+def test_match_by_id(tmp_path):
+    old, new = str(tmp_path / "old.csv"), str(tmp_path / "new.csv")
+    h = HEADERS + [ID_COLUMN]
+    write_csv(old, h, [["09:00", "a", "", "1"], ["10:00", "b", "", "2"], ["11:00", "c", "", "3"]], "none")
+    write_csv(new, h, [["09:00", "a", "", "1"], ["10:30", "b", "x", "2"], ["12:00", "d", "", "4"]], "none")
+    diff = diff_files(old, new)
+    assert diff.counts == {"same": 1, "changed": 1, "removed": 1, "added": 1}
+    changed = [c for c in diff.changes if c.kind == "changed"][0]
+    assert changed.key == "2" and changed.columns == ["Time: ", "Comments: "]
+    assert not diff.added_columns and not diff.removed_columns
+
+
+def test_match_by_key_columns():
+    old = records(HEADERS, [["09:00", "a", ""], ["10:00", "b", ""]])
+    new = records(HEADERS, [["09:00", "A ", "note"], ["10:00", "c", ""]])
+    # по содержимому всех столбцов правка — это удаление и добавление
+    assert diff_records(HEADERS, old, HEADERS, new).counts == {"removed": 2, "added": 2}
+    # по ключевому столбцу (без учёта регистра и пробелов) — изменение
+    diff = diff_records(HEADERS, old, HEADERS, new, key_columns=["TODO list:"])
+    assert diff.counts == {"changed": 1, "removed": 1, "added": 1}
+    assert [c.columns for c in diff.changes if c.kind == "changed"] == [["TODO list:", "Comments: "]]
+
+
+def test_added_and_removed_columns():
+    old = records(HEADERS, [["09:00", "a", "x"]])
+    new_headers = ["Time: ", "TODO list:", "Priority [int]"]
+    new = records(new_headers, [["09:00", "a", "3"]])
+    diff = diff_records(HEADERS, old, new_headers, new)
+    assert diff.added_columns == ["Priority [int]"] and diff.removed_columns == ["Comments: "]
+    # сравниваются только общие столбцы
+    assert diff.counts == {"same": 1}
+    assert not diff.empty and "новые столбцы: Priority [int]" in diff.summary()
+
+
+def test_json_records_with_different_keys(tmp_path):
+    old = write_json_records(tmp_path / "old.json", [
+        {"Time: ": "09:00", "TODO list:": "x"},
+        {"Time: ": "10:00", "TODO list:": "y", "Comments: ": "old"},
+    ])
+    new = write_json_records(tmp_path / "new.json", [
+        {"Time: ": "09:00", "TODO list:": "x"},
+        {"Time: ": "10:00", "TODO list:": "y", "Comments: ": "new"},
+    ])
+    assert headers_of(old) == HEADERS
+    assert diff_files(old, new).counts == {"same": 1, "removed": 1, "added": 1}
+    diff = diff_files(old, new, key_columns=["TODO list:"])
+    assert diff.counts == {"same": 1, "changed": 1}
+    assert diff.changes[0].columns == ["Comments: "]
+
+
+@pytest.mark.parametrize("use_id", [True, False])
+def test_partitions_match_in_memory(use_id):
+    rnd = random.Random(use_id)
+    headers = HEADERS + ([ID_COLUMN] if use_id else [])
+    old_rows = [[f"{rnd.randrange(24):02d}:00", f"t{rnd.randrange(300)}", "", str(i)] for i in range(1000)]
+    new_rows = []
+    for row in old_rows:
+        op = rnd.random()
+        if op < 0.1:
+            continue
+        row = list(row)
+        if op < 0.3:
+            row[2] = "edited, \"quoted\"\nline"
+        new_rows.append(row)
+    new_rows += [["05:00", f"new{i}", "", f"n{i}"] for i in range(50)]
+    old = records(headers, old_rows)
+    new = records(headers, new_rows)
+    key = None if use_id else ["TODO list:", "Time: "]
+
+    def result(partitions):
+        diff = diff_records(headers, iter(old), headers, iter(new), key, partitions, limit=10 ** 6)
+        changes = sorted((c.kind, c.key, json.dumps(c.old, sort_keys=True), json.dumps(c.new, sort_keys=True))
+                         for c in diff.changes)
+        return diff.counts, changes
+
+    one = result(1)
+    assert one[0]["changed"] and one[0]["added"] and one[0]["removed"]
+    assert result(7) == one
+
+
+def test_diff_table(tmp_path):
+    path = str(tmp_path / "tasks.csv")
+    write_csv(path, HEADERS, [["09:00", "a", ""], ["10:00", "b", ""]], "none")
+    diff = diff_table(path, HEADERS, [["09:00", "a", ""], ["11:00", "c", ""]], key_columns=["TODO list:"])
+    assert diff.counts == {"same": 1, "removed": 1, "added": 1}
@@ -0,0 +1,118 @@
+import random
+from array import array
+
+import pytest
+
+import todo_store
+from todo_intervals import IntervalSet, parse_ranges
+from todo_store import ID_COLUMN, TaskTable
+
+
+def random_set(rnd, size):
+    return {v for v in range(size) if rnd.random() < 0.3}
+
+
+def test_of_merges_runs():
+    s = IntervalSet.of([5, 1, 2, 3, 7, 6, 3])
+    assert s.ranges() == [(1, 4), (5, 8)]
+    assert len(s) == 6 and list(s) == [1, 2, 3, 5, 6, 7]
+    assert IntervalSet([(4, 6), (0, 2), (1, 3), (9, 9)]).ranges() == [(0, 3), (4, 6)]
+    assert not IntervalSet() and IntervalSet.of([]) == IntervalSet()
+    assert IntervalSet.of([1, 2, 3, 5]).describe() == "2-4, 6"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_against_plain_set(seed):
+    rnd = random.Random(seed)
+    size = 200
+    values = random_set(rnd, size)
+    s = IntervalSet.of(values)
+    for v in range(-1, size + 2):
+        assert (v in s) == (v in values)
+        assert s.rank(v) == sum(1 for x in values if x < v)
+    seq = list(range(1000, 1000 + size))
+    kept = [x for i, x in enumerate(seq) if i not in values]
+    assert s.compact(seq) == kept
+    assert s.compact(array("q", seq)) == array("q", kept)
+    new = s.renumber(size)
+    assert [new[i] for i in range(size) if i not in values] == list(range(len(kept)))
+    assert all(new[i] == -1 for i in values)
+    assert [v for a, b in s.gaps(size) for v in range(a, b)] == [v for v in range(size) if v not in values]
+    other = random_set(rnd, size)
+    assert set(s.union(IntervalSet.of(other))) == values | other
+    assert set(s.clip(50, 120)) == {v for v in values if 50 <= v < 120}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_expand(seed):
+    rnd = random.Random(seed)
+    size = 300
+    first = random_set(rnd, size)
+    remaining = [v for v in range(size) if v not in first]
+    second = {i for i in range(len(remaining)) if rnd.random() < 0.3}
+    # номера второго удаления — в нумерации до первого
+    expanded = IntervalSet.of(first).expand(IntervalSet.of(second))
+    assert list(expanded) == sorted(remaining[i] for i in second)
+    assert IntervalSet().expand(IntervalSet.of([1, 2])) == IntervalSet.of([1, 2])
+
+
+def test_parse_ranges():
+    ids = {"abc": 4}
+    s = parse_ranges("1, 3-5, 5-3, abc, 10", 10, ids.get)
+    assert s.ranges() == [(0, 1), (2, 5), (9, 10)]
+    for bad in ("0", "11", "x", "2-", "1-20"):
+        with pytest.raises(ValueError):
+            parse_ranges(bad, 10)
+
+
+def make_table(n):
+    table = TaskTable(["Time", "TODO list:"], id_column=ID_COLUMN)
+    table.reset(list(table.headers), [["09:00", f"t{i}"] for i in range(n)])
+    return table
+
+
+def check_slots(table):
+    for i in range(len(table.rows)):
+        assert table.slot(table.id_of(i)) == i
+
+
+def test_slots_after_deletes():
+    rnd = random.Random(1)
+    table = make_table(2000)
+    gone = []
+    for step in range(100):
+        if rnd.random() < 0.7 and table.rows:
+            picked = random_set(rnd, min(40, len(table.rows)))
+            start = rnd.randrange(len(table.rows))
+            gone.extend(table.id_of(i + start) for i in picked if i + start < len(table.rows))
+            table.delete(i + start for i in picked)
+        else:
+            table.extend([["10:00", f"n{step}-{k}"] for k in range(rnd.randint(1, 5))])
+        if step % 10 == 0:
+            check_slots(table)
+    check_slots(table)
+    assert all(table.slot(task_id) is None for task_id in gone)
+
+
+def test_reindex_above_limit(monkeypatch):
+    monkeypatch.setattr(todo_store, "TOMBSTONE_RANGES", 8)
+    table = make_table(200)
+    for i in range(20):
+        table.delete([i * 5])
+        assert table._tombstones.range_count() <= 8
+        check_slots(table)
+
+
+def test_duplicate_ids():
+    table = make_table(10)
+    dup = table.id_of(2)
+    row = list(table.rows[2])
+    row[1] = "other version"
+    table.append(row)
+    assert table.id_of(10) == dup and table.slot(dup) == 10
+    table.delete([10])
+    assert table.slot(dup) == 2
+    table.append(row)
+    table.delete([0, 2])
+    assert table.slot(dup) == 8 and table.rows[8][1] == "other version"
+    check_slots(table)
@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import random
+
+import pytest
+
+from todo_io import (SyncCommitter, atomic_write, file_state, iter_json_array, iter_records, read_csv,
+                     read_json, write_csv, write_json)
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = str(tmp_path / "a.txt")
+    atomic_write(path, lambda f: f.write("one"), "none")
+    state = file_state(path)
+    atomic_write(path, lambda f: f.write("two"), "every-op")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "two"
+    assert file_state(path) != state  # новый inode при каждой записи
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_failed_write_keeps_old_file(tmp_path):
+    path = str(tmp_path / "a.txt")
+    atomic_write(path, lambda f: f.write("old"), "none")
+
+    def broken(f):
+        f.write("partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_write(path, broken, "none")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["a.txt"]  # временный файл удалён
+
+
+def test_interrupted_write_keeps_old_file(tmp_path):
+    path = str(tmp_path / "a.txt")
+    atomic_write(path, lambda f: f.write("old"), "none")
+
+    def interrupted(f):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        atomic_write(path, interrupted, "none")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_unknown_durability(tmp_path):
+    with pytest.raises(ValueError):
+        atomic_write(str(tmp_path / "a.txt"), lambda f: f.write("x"), "sometimes")
+    assert not os.listdir(tmp_path)
+
+
+def test_csv_roundtrip(tmp_path):
+    path = str(tmp_path / "tasks.csv")
+    rows = [["09:00", 'with "quotes", comma', "line\nbreak"], ["10:00", "", "ю"]]
+    write_csv(path, ["Time: ", "TODO list:", "Comments: "], rows, "none")
+    assert read_csv(path) == (["Time: ", "TODO list:", "Comments: "], rows)
+
+
+def test_committer_batches_files(tmp_path):
+    committer = SyncCommitter(interval=60)
+    for name in ("a", "b", "a"):
+        path = str(tmp_path / name)
+        atomic_write(path, lambda f: f.write(name), "none")
+        committer.schedule(path)
+    assert committer.flush() == 2
+    assert committer.flush() == 0
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 7, 64])
+def test_json_array_small_chunks(chunk):
+    rnd = random.Random(chunk)
+    items = [{"n": rnd.random() * 10 ** rnd.randint(-3, 9), "s": "ю\"," * rnd.randint(0, 3)}
+             for _ in range(50)] + [1.5, -12e-3, [], {}, None, True, "]"]
+    for text in (json.dumps(items), json.dumps(items, indent=2), json.dumps(items, separators=(",", ":"))):
+        assert list(iter_json_array(io.StringIO(text), chunk)) == items
+
+
+@pytest.mark.parametrize("text", ["", "{}", "[1,", "[1 2]", "[1,]", "[1]x", '["a]'])
+def test_json_array_malformed(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), 2))
+
+
+def test_json_array_empty():
+    assert list(iter_json_array(io.StringIO(" [ ] \n"), 1)) == []
+
+
+@pytest.mark.parametrize("name", ["t.json", "t.jsonl", "t.json.gz", "t.jsonl.xz", "t.json.bz2"])
+def test_json_roundtrip(tmp_path, name):
+    path = str(tmp_path / name)
+    headers = ["Time", "TODO list:"]
+    rows = [[f"{i % 24:02d}:00", f"задача {i}"] for i in range(1000)]
+    write_json(path, headers, iter(rows), "none")
+    assert read_json(path) == (headers, rows)
+    assert [list(r.values()) for r in iter_records(path)] == rows
@@ -0,0 +1,177 @@
+import csv
+import json
+import os
+import random
+
+import pytest
+
+import todo_mirror
+from todo_mirror import MirrorSync, load_manifest, verify_mirror
+from todo_store import ID_COLUMN, TaskTable
+
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(todo_mirror, "PARTITION_ROWS", 50)
+    table = TaskTable(["Time", "TODO list:", "Comments"], id_column=ID_COLUMN)
+    table.reset(list(table.headers), [[f"{i % 24:02d}:00", f"t{i}", "c"] for i in range(1000)])
+    return table
+
+
+def read_back(directory):
+    """Строки зеркала по манифесту; CSV и JSON Lines каждого раздела совпадают."""
+    manifest = load_manifest(directory)
+    rows = []
+    for part in manifest["parts"].values():
+        with open(os.path.join(directory, part["files"]["csv"]["name"]), newline="", encoding="utf-8") as f:
+            data = list(csv.reader(f))
+        assert data[0] == manifest["headers"]
+        with open(os.path.join(directory, part["files"]["jsonl"]["name"]), encoding="utf-8") as f:
+            objects = [json.loads(line) for line in f]
+        assert [[d[h] for h in manifest["headers"]] for d in objects] == data[1:]
+        rows += data[1:]
+    return manifest["headers"], rows
+
+
+def check(table, directory):
+    headers, rows = read_back(directory)
+    assert headers == table.headers
+    assert sorted(map(tuple, rows)) == sorted(map(tuple, table.rows))
+    assert verify_mirror(directory) == []
+    files = [f for f in os.listdir(directory) if f.startswith(todo_mirror.PART_PREFIX)]
+    assert len(files) == 2 * len(load_manifest(directory)["parts"])  # старые файлы удалены
+
+
+def edit(table, i, col, value):
+    row = list(table.rows[i])
+    row[col] = value
+    table.update(i, row)
+
+
+def test_sync_and_verify(table, tmp_path):
+    directory = str(tmp_path / "mirror")
+    mirror = MirrorSync(table, directory)
+    res = mirror.sync()
+    assert res.full and res.written == load_manifest(directory)["partitions"] == 32
+    check(table, directory)
+    assert mirror.pending() == 0
+    res = mirror.sync()
+    assert res.written == 0 and not res.full
+
+
+def test_incremental_sync(table, tmp_path):
+    directory = str(tmp_path / "mirror")
+    mirror = MirrorSync(table, directory)
+    mirror.sync()
+    edit(table, 10, 2, "changed")
+    assert mirror.pending() == 1
+    assert mirror.sync().written == 1
+    check(table, directory)
+    rnd = random.Random(1)
+    for step in range(150):
+        op = rnd.random()
+        if op < 0.4:
+            edit(table, rnd.randrange(len(table.rows)), 2, f"x{step}")
+        elif op < 0.6:
+            table.extend([["01:00", f"n{step}-{k}", ""] for k in range(rnd.randint(1, 5))])
+        elif op < 0.8:
+            start = rnd.randrange(len(table.rows))
+            table.delete(range(start, min(len(table.rows), start + rnd.randint(1, 4))))
+        elif op < 0.82:
+            table.add_column(f"C{step}")
+        elif op < 0.84:
+            table.reorder_columns(list(reversed(table.headers)))
+        if rnd.random() < 0.3:
+            pending = mirror.pending()
+            res = mirror.sync()
+            assert res.full or res.written <= pending
+            check(table, directory)
+    mirror.sync()
+    check(table, directory)
+
+
+def test_duplicate_ids(table, tmp_path):
+    directory = str(tmp_path / "mirror")
+    mirror = MirrorSync(table, directory)
+    mirror.sync()
+    table.append(table.rows[5])  # второй вариант строки с тем же ID
+    edit(table, len(table.rows) - 1, 2, "other version")
+    assert table.id_of(len(table.rows) - 1) == table.id_of(5)
+    mirror.sync()
+    check(table, directory)
+
+
+def test_interrupted_sync_resumes(table, tmp_path, monkeypatch):
+    directory = str(tmp_path / "mirror")
+    mirror = MirrorSync(table, directory)
+    mirror.sync()
+    before = read_back(directory)
+    for i in range(0, 300, 7):
+        edit(table, i, 1, "crash")
+    write = todo_mirror.atomic_write
+    resumed = False
+    calls = []
+
+    def flaky(path, fn, durability="batched"):
+        calls.append(path)
+        if len(calls) == 5 and not resumed:
+            raise OSError("no space")
+        return write(path, fn, durability)
+
+    monkeypatch.setattr(todo_mirror, "atomic_write", flaky)
+    with pytest.raises(OSError):
+        mirror.sync()
+    # читатель видит прежний целый снимок
+    assert verify_mirror(directory) == [] and read_back(directory) == before
+    resumed = True
+    written = calls[:4]
+    calls.clear()
+    mirror.sync()
+    # уже записанные файлы разделов повторно не пишутся, манифест — последним
+    assert not set(written) & set(calls) and calls[-1].endswith(todo_mirror.MANIFEST)
+    check(table, directory)
+
+
+def test_new_process_compares_checksums(table, tmp_path):
+    directory = str(tmp_path / "mirror")
+    MirrorSync(table, directory).sync()
+    other = TaskTable(id_column=ID_COLUMN)
+    other.reset(list(table.headers), [list(r) for r in table.rows])
+    second = MirrorSync(other, directory)
+    assert second.pending() is None
+    res = second.sync()
+    assert res.full and res.written == 0 and res.unchanged == 32
+    check(other, directory)
+
+
+def test_foreign_sync_forces_full_compare(table, tmp_path):
+    directory = str(tmp_path / "mirror")
+    first = MirrorSync(table, directory)
+    first.sync()
+    other = TaskTable(id_column=ID_COLUMN)
+    other.reset(list(table.headers), [list(r) for r in table.rows])
+    second = MirrorSync(other, directory)
+    second.sync()
+    edit(other, 0, 1, "from second")
+    assert second.sync().written == 1
+    edit(table, 5, 1, "from first")
+    res = first.sync()
+    assert res.full  # манифест обновил другой процесс
+    check(table, directory)
+
+
+def test_growth_repartitions(table, tmp_path):
+    directory = str(tmp_path / "mirror")
+    mirror = MirrorSync(table, directory)
+    mirror.sync()
+    table.extend([["02:00", f"big{k}", ""] for k in range(2000)])
+    assert not mirror.sync().full  # число разделов меняется только при росте вчетверо
+    table.extend([["03:00", f"huge{k}", ""] for k in range(6000)])
+    assert mirror.sync().full
+    assert load_manifest(directory)["partitions"] == 256
+    check(table, directory)
+
+
+def test_needs_id_column():
+    with pytest.raises(ValueError):
+        MirrorSync(TaskTable(["Time"]), "unused")
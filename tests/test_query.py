@@ -0,0 +1,95 @@
+import pytest
+
+from todo_query import QueryEngine, QueryError
+from todo_schema import TypedColumns
+from todo_store import TaskTable
+
+HEADERS = ["Time: ", "TODO list:", "Comments: ", "Priority [int]", "Status [enum:todo|doing|done]"]
+ROWS = [
+    ["09:00", "Купить хлеб", "deploy later", "1", "todo"],
+    ["10:30", "Deploy release", "", "3", "doing"],
+    ["12:00", "Call Bob", "about deploy", "", "done"],
+    ["18:45", "Write report", "weekly", "5", ""],
+]
+
+
+@pytest.fixture
+def engine():
+    table = TaskTable(HEADERS)
+    typed = table.add_listener(TypedColumns())
+    table.reset(list(HEADERS), [list(r) for r in ROWS])
+    return QueryEngine(table, typed)
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("deploy", [0, 1, 2]),
+    ("time >= 09:00 and time < 12:00", [0, 1]),
+    ("Time > 10:30", [2, 3]),
+    ("Comments contains deploy and Priority > 2", []),
+    ("Priority >= 3", [1, 3]),
+    ("Priority != 3", [0, 3]),
+    ("not (Status = done)", [0, 1, 3]),
+    ('"TODO list" startswith Купить', [0]),
+    ("Status = done or Priority = 5", [2, 3]),
+    ("Status > todo", [1, 2]),
+    ("deploy release", [1]),
+])
+def test_find(engine, text, expected):
+    assert engine.find(text) == expected
+
+
+def test_unknown_enum_value_equality(engine):
+    assert engine.find("Status = zzz") == []
+    # пустые значения не считаются отличными от неизвестного
+    assert engine.find("Status != zzz") == [0, 1, 2]
+
+
+@pytest.mark.parametrize("op", ["<", "<=", ">", ">="])
+def test_unknown_enum_value_ordering_is_query_error(engine, op):
+    with pytest.raises(QueryError):
+        engine.find(f"Status {op} zzz")
+
+
+@pytest.mark.parametrize("text", [
+    "Priority > abc",
+    "Nope = 1",
+    "(deploy",
+    "Priority >",
+    "",
+    "time = 25:00",
+])
+def test_errors(engine, text):
+    with pytest.raises(QueryError):
+        engine.find(text)
+
+
+def test_ambiguous_column_prefix(engine):
+    engine.table.add_column("Timer")
+    with pytest.raises(QueryError):
+        engine.find("Tim = 1")
+
+
+def test_uses_time_and_text_indexes(engine):
+    q = engine.compile("time >= 10:00 and Comments contains deploy")
+    assert q.run() == [2]
+    plan = q.explain()
+    assert "index:time" in plan and "index:text" in plan
+
+
+def test_query_follows_table_changes(engine):
+    q = engine.compile("Priority > 2")
+    assert q.run() == [1, 3]
+    engine.table.update(0, ["09:00", "Купить хлеб", "", "9", "todo"])
+    engine.table.delete([1])
+    engine.table.append(["20:00", "New", "", "4", ""])
+    assert q.run() == [0, 2, 3]
+    assert engine.find("time >= 19:00") == [3]
+
+
+def test_refines(engine):
+    assert engine.compile("deploy rel").refines(engine.compile("deploy"))
+    assert not engine.compile("deploy").refines(engine.compile("deploy rel"))
+
+
+def test_universe_limits_scan(engine):
+    assert engine.compile("Priority > 0").run({0, 1}) == [0, 1]
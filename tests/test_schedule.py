@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from todo_schedule import Rule, ReminderScheduler, parse_rule, validate_rule
+from todo_store import TaskTable
+
+HEADERS = ["Time: ", "TODO list:", "Repeat"]
+# понедельник
+MONDAY = datetime(2026, 3, 2, 8, 0)
+
+
+@pytest.fixture
+def clock():
+    return [MONDAY]
+
+
+def make_scheduler(clock, rows):
+    table = TaskTable(HEADERS)
+    scheduler = ReminderScheduler(table, lambda: clock[0])
+    table.reset(list(HEADERS), rows)
+    return table, scheduler
+
+
+def test_parse_rule():
+    assert parse_rule("") is None
+    assert parse_rule("будни") == Rule("weekly", frozenset(range(5)))
+    assert parse_rule("weekly:mon,Wednesday") == Rule("weekly", frozenset({0, 2}))
+    assert parse_rule("every:2h") == Rule("every", interval=120)
+    assert parse_rule("every:24h") == Rule("daily")
+    for bad in ("weekly:", "weekly:xyz", "every:0m", "every:25h", "every:h", "hourly"):
+        assert not validate_rule(bad)
+
+
+def test_every_90m_rolls_over_midnight():
+    rule = parse_rule("every:90m")
+    start = 21 * 60  # 21:00, 22:30, затем снова с 21:00 следующего дня
+    assert rule.next_after(start, datetime(2026, 3, 2, 8, 0)) == datetime(2026, 3, 2, 21, 0)
+    assert rule.next_after(start, datetime(2026, 3, 2, 21, 0)) == datetime(2026, 3, 2, 22, 30)
+    assert rule.next_after(start, datetime(2026, 3, 2, 22, 30)) == datetime(2026, 3, 3, 21, 0)
+    assert rule.next_after(start, datetime(2026, 3, 2, 23, 59)) == datetime(2026, 3, 3, 21, 0)
+    early = 30  # 00:30, 02:00, ..., 23:00
+    assert rule.next_after(early, datetime(2026, 3, 2, 22, 59)) == datetime(2026, 3, 2, 23, 0)
+    assert rule.next_after(early, datetime(2026, 3, 2, 23, 0)) == datetime(2026, 3, 3, 0, 30)
+
+
+def test_weekly_day_selection():
+    rule = parse_rule("weekly:mon,wed")
+    nine = 9 * 60
+    assert rule.next_after(nine, MONDAY) == datetime(2026, 3, 2, 9, 0)
+    assert rule.next_after(nine, datetime(2026, 3, 2, 9, 0)) == datetime(2026, 3, 4, 9, 0)
+    assert rule.next_after(nine, datetime(2026, 3, 5, 12, 0)) == datetime(2026, 3, 9, 9, 0)
+    weekdays = parse_rule("weekdays")
+    assert weekdays.next_after(nine, datetime(2026, 3, 6, 10, 0)) == datetime(2026, 3, 9, 9, 0)
+    every = parse_rule("every:3d")
+    first = every.next_after(nine, MONDAY)
+    assert every.next_after(nine, first) == first + timedelta(days=3)
+
+
+def test_pop_due_reschedules_repeating(clock):
+    table, scheduler = make_scheduler(clock, [
+        ["09:00", "daily", "daily"],
+        ["08:30", "once", ""],
+        ["10:00", "often", "every:30m"],
+    ])
+    assert scheduler.next_due() == (datetime(2026, 3, 2, 8, 30), 1)
+    clock[0] = datetime(2026, 3, 2, 10, 0)
+    fired = scheduler.pop_due()
+    assert fired == [(datetime(2026, 3, 2, 8, 30), 1), (datetime(2026, 3, 2, 9, 0), 0),
+                     (datetime(2026, 3, 2, 10, 0), 2)]
+    assert scheduler.pop_due() == []
+    # разовая задача больше не срабатывает, повторяющиеся — в следующий раз
+    assert scheduler.upcoming(3) == [(datetime(2026, 3, 2, 10, 30), 2), (datetime(2026, 3, 2, 11, 0), 2),
+                                     (datetime(2026, 3, 2, 11, 30), 2)]
+    clock[0] = datetime(2026, 3, 3, 9, 0)
+    fired = scheduler.pop_due()
+    assert fired[-1] == (datetime(2026, 3, 3, 9, 0), 0)
+    assert all(idx == 2 for _, idx in fired[:-1])
+    assert scheduler.next_due()[0] > clock[0] and scheduler.seconds_until_next() > 0
+
+
+def test_delete_renumbers_heap(clock):
+    table, scheduler = make_scheduler(clock, [[f"{9 + i:02d}:00", f"t{i}", "daily"] for i in range(8)])
+    table.delete([0, 1, 4])
+    upcoming = scheduler.upcoming(5)
+    # номера в куче совпадают с новыми номерами строк (idx - число удалённых перед ним)
+    assert [(due.hour, table.rows[idx][1]) for due, idx in upcoming] == [
+        (11, "t2"), (12, "t3"), (14, "t5"), (15, "t6"), (16, "t7")]
+    clock[0] = datetime(2026, 3, 2, 12, 0)
+    assert [table.rows[idx][1] for _, idx in scheduler.pop_due()] == ["t2", "t3"]
+
+
+def test_edit_invalidates_old_entry(clock):
+    table, scheduler = make_scheduler(clock, [["09:00", "a", ""], ["10:00", "b", ""]])
+    table.update(0, ["11:00", "a", ""])
+    assert scheduler.next_due() == (datetime(2026, 3, 2, 10, 0), 1)
+    table.update(1, ["bad", "b", ""])  # без времени — без напоминания
+    table.update(0, ["12:00", "a", "weekly:tue"])
+    assert scheduler.upcoming(5) == [(datetime(2026, 3, 3, 12, 0), 0), (datetime(2026, 3, 10, 12, 0), 0),
+                                     (datetime(2026, 3, 17, 12, 0), 0), (datetime(2026, 3, 24, 12, 0), 0),
+                                     (datetime(2026, 3, 31, 12, 0), 0)]
+    clock[0] = datetime(2026, 3, 2, 23, 0)
+    assert scheduler.pop_due() == []  # старые записи на 09:00 и 11:00 не срабатывают
+    # правка после удаления: поколение сбрасывается вместе с перенумерацией
+    table.append(["13:00", "c", ""])
+    table.delete([1])
+    table.update(1, ["23:30", "c", ""])
+    assert scheduler.next_due() == (datetime(2026, 3, 2, 23, 30), 1)
+
+
+def test_invalid_rule_counted(clock):
+    table, scheduler = make_scheduler(clock, [["09:00", "a", "sometimes"], ["10:00", "b", "daily"]])
+    assert scheduler.invalid == 1
+    assert [idx for _, idx in scheduler.upcoming(2)] == [1, 1]
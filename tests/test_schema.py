@@ -0,0 +1,132 @@
+import pytest
+
+from todo_schema import INT_MAX, INT_MIN, ColumnType, TypedColumns, load_schema, save_schema, type_from_header
+from todo_store import TaskTable
+
+
+def make_table(headers, rows):
+    table = TaskTable(headers)
+    typed = table.add_listener(TypedColumns())
+    table.reset(list(headers), [list(r) for r in rows])
+    return table, typed
+
+
+@pytest.mark.parametrize("spec,text,value", [
+    ("int", " 42 ", 42),
+    ("int", "-7", -7),
+    ("float", "1,5", 1.5),
+    ("time", "9:05", 9 * 60 + 5),
+    ("text", "  abc ", "abc"),
+])
+def test_parse(spec, text, value):
+    assert ColumnType.from_spec(spec).parse(text) == value
+
+
+@pytest.mark.parametrize("spec,text", [("int", "x"), ("int", "1.5"), ("float", "abc"), ("time", "25:00")])
+def test_parse_invalid(spec, text):
+    ct = ColumnType.from_spec(spec)
+    assert ct.parse(text) is None
+    assert not ct.validate(text)
+
+
+def test_empty_is_valid():
+    for spec in ("int", "float", "time", "date", "text"):
+        assert ColumnType.from_spec(spec).validate("")
+
+
+@pytest.mark.parametrize("value", [INT_MAX + 1, INT_MIN - 1, 10 ** 30])
+def test_int_outside_int64_rejected(value):
+    ct = ColumnType("int")
+    assert ct.parse(str(value)) is None
+    assert not ct.validate(str(value))
+
+
+def test_int64_bounds_accepted():
+    ct = ColumnType("int")
+    assert ct.parse(str(INT_MAX)) == INT_MAX
+    assert ct.parse(str(INT_MIN)) == INT_MIN
+    assert not ct.is_null(INT_MIN)
+
+
+def test_validate_row_keeps_table_aligned():
+    table, typed = make_table(["Priority [int]", "TODO list:"], [["1", "a"]])
+    assert typed.validate_row(table.headers, [str(2 ** 63), "b"]) == "Priority [int]"
+    assert typed.validate_row(table.headers, [str(-2 ** 63), "b"]) == "Priority [int]"
+    assert typed.validate_row(table.headers, ["5", "b"]) is None
+    table.append(["5", "b"])
+    assert len(typed.column("Priority [int]").values) == len(table.rows) == 2
+    assert typed.value("Priority [int]", 1) == 5
+
+
+def test_enum_codes_follow_choices():
+    ct = ColumnType.from_spec("enum:low|mid|high")
+    assert ct.spec == "enum:low|mid|high"
+    assert [ct.parse(v) for v in ("high", "low")] == [2, 0]
+    assert ct.format(1) == "mid"
+
+
+def test_declared_enum_rejects_unknown_values():
+    ct = ColumnType.from_spec("enum:todo|done")
+    assert ct.validate("done") and ct.validate("")
+    assert not ct.validate("dnoe")
+    assert ct.parse("dnoe") is None
+    assert ct.spec == "enum:todo|done"  # объявленная схема не меняется
+    table, typed = make_table(["Status [enum:todo|done]"], [["todo"], ["typo"]])
+    assert typed.value("Status [enum:todo|done]", 1) is None
+    assert typed.validate_row(table.headers, ["dnoe"]) == "Status [enum:todo|done]"
+    assert typed.type_for("Status [enum:todo|done]").spec == "enum:todo|done"
+
+
+def test_undeclared_enum_grows():
+    ct = ColumnType.from_spec("enum")
+    assert ct.validate("anything")
+    assert [ct.parse(v) for v in ("b", "a", "b")] == [0, 1, 0]
+    assert ct.spec == "enum:b|a"
+
+
+def test_type_from_header():
+    assert type_from_header("Priority [int]") == "int"
+    assert type_from_header("TODO list:") is None
+
+
+def test_default_type_only_for_base_time_column():
+    table, typed = make_table(["Time: ", "Timezone", "Timer [time]"], [["09:00", "UTC+3", "00:30"]])
+    assert typed.type_for("Time: ").name == "time"
+    assert typed.type_for("Timezone").name == "text"
+    assert typed.type_for("Timer [time]").name == "time"
+    assert typed.validate_row(table.headers, ["10:00", "UTC+3", "00:45"]) is None
+    assert TypedColumns({"Timezone": "time"}).type_for("Timezone").name == "time"
+
+
+def test_default_type_only_for_base_date_column():
+    table, typed = make_table(["Date", "Dateline", "Date added (free text)"], [["2026-03-01", "soon", "вчера"]])
+    assert typed.type_for("Date").name == "date"
+    assert typed.type_for("Dateline").name == "text"
+    assert typed.validate_row(table.headers, ["01.03.2026", "next week", "когда-то"]) is None
+    assert typed.validate_row(table.headers, ["soon", "", ""]) == "Date"
+
+
+def test_typed_columns_follow_table_changes():
+    table, typed = make_table(["Time: ", "Priority [int]"], [["09:00", "3"], ["10:30", ""], ["bad", "1"]])
+    assert typed.value("Time: ", 1) == 10 * 60 + 30
+    assert typed.value("Time: ", 2) is None
+    assert typed.value("Priority [int]", 1) is None
+    table.update(1, ["11:00", "7"])
+    assert typed.value("Priority [int]", 1) == 7
+    table.delete([0])
+    assert list(typed.column("Priority [int]").values)[:1] == [7]
+    table.add_column("Count [int]", "4")
+    assert typed.value("Count [int]", 0) == 4
+
+
+def test_set_type_reparses_column():
+    table, typed = make_table(["N"], [["1"], ["x"]])
+    assert typed.column("N").ctype.name == "text"
+    typed.set_type(table, "N", "int")
+    assert typed.value("N", 0) == 1 and typed.value("N", 1) is None
+
+
+def test_schema_file_roundtrip(tmp_path):
+    filename = str(tmp_path / "tasks.csv")
+    save_schema(filename, {"Priority": "int", "Level": "enum:low|high"})
+    assert load_schema(filename) == {"Priority": "int", "Level": "enum:low|high"}
@@ -0,0 +1,158 @@
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+import todo_computed
+import todo_server
+from todo_computed import ComputedColumns
+from todo_io import read_csv, write_csv
+from todo_schema import TypedColumns, save_computed
+from todo_server import TaskService
+from todo_shared import FileLock, SharedFile
+from todo_store import ID_COLUMN, TaskTable
+
+HEADERS = ["Time: ", "TODO list:", "Comments: "]
+
+
+@pytest.fixture
+def filename(tmp_path):
+    path = str(tmp_path / "tasks.csv")
+    write_csv(path, HEADERS, [["09:00", "a", ""], ["10:00", "b", ""]], "none")
+    return path
+
+
+def other_process(filename):
+    headers, rows = read_csv(filename)
+    table = TaskTable(id_column=ID_COLUMN)
+    table.reset(headers, rows)
+    shared = SharedFile(table, filename)
+    shared.mark_synced()
+    return table, shared
+
+
+def test_save_merges_and_writes(filename):
+    async def run():
+        svc = TaskService(filename)
+        svc.load()
+        table, shared = other_process(filename)
+        table.append(["11:00", "from cli", ""])
+        shared.save(lambda: write_csv(filename, table.headers, table.rows, "none"))
+        svc.add({"TODO list:": "from api"})
+        await svc.save_now()
+        return svc
+
+    svc = asyncio.run(run())
+    names = sorted(r[1] for r in read_csv(filename)[1])
+    assert names == ["a", "b", "from api", "from cli"]
+    assert sorted(r[1] for r in svc.store.rows) == names
+    assert not svc.shared.dirty
+
+
+def test_pull_applies_changes_on_loop(filename, monkeypatch):
+    monkeypatch.setattr(todo_server, "PULL_INTERVAL", 0.01)
+
+    async def run():
+        svc = TaskService(filename)
+        svc.load()
+        loop_thread = threading.get_ident()
+        threads = []
+        svc.feed.subscribe(lambda change: threads.append(threading.get_ident()))
+        table, shared = other_process(filename)
+        table.delete([0])
+        shared.save(lambda: write_csv(filename, table.headers, table.rows, "none"))
+        puller = asyncio.create_task(svc.pull_forever())
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if len(svc.store) == 1:
+                break
+        puller.cancel()
+        return svc, threads, loop_thread
+
+    svc, threads, loop_thread = asyncio.run(run())
+    assert [r[1] for r in svc.store.rows] == ["b"]
+    assert threads and set(threads) == {loop_thread}  # слушатели вызваны в цикле событий
+
+
+def test_loop_not_blocked_by_file_lock(filename):
+    async def run():
+        svc = TaskService(filename)
+        svc.load()
+        svc.add({"TODO list:": "pending"})
+        lock = FileLock(filename)
+        lock.acquire()  # файл занят другим процессом
+        try:
+            save = asyncio.create_task(svc.save_now())
+            ticks = 0
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert not save.done()
+        finally:
+            lock.release()
+        await save
+        return ticks
+
+    assert asyncio.run(run()) == 10
+    assert "pending" in [r[1] for r in read_csv(filename)[1]]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    value = [0]
+    monkeypatch.setitem(todo_computed.FUNCTIONS, "clock", (lambda: value[0], True))
+    return value
+
+
+def test_computed_columns_filled_by_server(filename):
+    write_csv(filename, HEADERS + ["End [time]"], [["09:00", "a", "", ""], ["10:00", "b", "", ""]], "none")
+    save_computed(filename, {"End [time]": "time + 30"})
+
+    async def run():
+        svc = TaskService(filename)
+        svc.load()
+        assert svc.store.rows[0][svc.store.headers.index("End [time]")] == "09:30"
+        idx = svc.add({"Time: ": "11:00", "TODO list:": "c", "End [time]": "23:59"})
+        svc.update(0, {"Time: ": "08:15", "End": "00:00"})
+        await svc.save_now()
+        return svc, idx
+
+    svc, idx = asyncio.run(run())
+    ci = svc.store.headers.index("End [time]")
+    # значения клиента для вычисляемого столбца пропущены, столбец посчитан сервером
+    assert svc.store.rows[idx][ci] == "11:30"
+    assert svc.store.rows[0][ci] == "08:45"
+    headers, rows = read_csv(filename)
+    assert [r[headers.index("End [time]")] for r in rows] == ["08:45", "10:30", "11:30"]
+
+
+def test_volatile_tick_elsewhere_is_not_a_change(filename, clock):
+    write_csv(filename, HEADERS + ["Left [int]"], [["09:00", "a", "", ""], ["10:00", "b", "", ""]], "none")
+    save_computed(filename, {"Left [int]": "time - clock()"})
+
+    async def run():
+        svc = TaskService(filename)
+        svc.load()
+        # окно GUI с тем же файлом: пересчитывает столбец по своим часам и правит одну строку
+        table = TaskTable(id_column=ID_COLUMN)
+        computed = ComputedColumns(table, table.add_listener(TypedColumns()))
+        computed.load(filename)
+        table.reset(*read_csv(filename))
+        shared = SharedFile(table, filename)
+        shared.mark_synced()
+        clock[0] = 5
+        assert computed.tick(datetime.datetime(2026, 1, 1, 10, 0)) == 2
+        table.update(1, ["10:00", "b edited", "", ""])
+        shared.save(lambda: write_csv(filename, table.headers, table.rows, "none"))
+        seq = svc.feed.seq
+        async with svc.io_lock:
+            await svc._sync(save=False)
+        return svc, svc.feed.since(seq)
+
+    svc, changes = asyncio.run(run())
+    assert [r[1] for r in svc.store.rows] == ["a", "b edited"]
+    # слияние касается только правленой строки, а не всех строк с пересчитанным столбцом
+    removed = [r["TODO list:"] for c in changes if c["op"] == "delete" for r in c["removed"]]
+    added = [r["TODO list:"] for c in changes if c["op"] == "insert" for r in c["added"]]
+    assert removed == ["b"] and added == ["b edited"]
@@ -0,0 +1,133 @@
+import os
+
+import pytest
+
+import todo_shared
+from todo_io import read_csv, write_csv
+from todo_shared import FileLock, SharedFile
+from todo_store import ID_COLUMN, TaskTable
+
+HEADERS = ["Time: ", "TODO list:", "Comments: "]
+
+
+@pytest.fixture
+def filename(tmp_path):
+    path = str(tmp_path / "tasks.csv")
+    write_csv(path, HEADERS, [["09:00", "a", ""], ["10:00", "b", ""], ["11:00", "c", ""]], "none")
+    return path
+
+
+def open_shared(filename, id_column=None):
+    headers, rows = read_csv(filename)
+    table = TaskTable(id_column=id_column)
+    table.reset(headers, rows)
+    shared = SharedFile(table, filename)
+    shared.mark_synced()
+    return table, shared
+
+
+def save(table, shared):
+    return shared.save(lambda: write_csv(shared.filename, table.headers, table.rows, "none"))
+
+
+def content(rows):
+    return sorted(tuple(r) for r in rows)
+
+
+def test_pull_without_changes(filename):
+    table, shared = open_shared(filename)
+    assert not shared.dirty
+    assert shared.pull() is None
+
+
+def test_merge_from_log(filename, monkeypatch):
+    t1, s1 = open_shared(filename)
+    t2, s2 = open_shared(filename)
+    csv_reads = []
+    orig = SharedFile._read_csv
+    monkeypatch.setattr(SharedFile, "_read_csv", lambda self, state: csv_reads.append(1) or orig(self, state))
+    t1.append(["12:00", "d", ""])
+    t1.delete([0])
+    assert s1.dirty
+    assert save(t1, s1) is None
+    assert not s1.dirty
+    merged = s2.pull()
+    assert (merged.added, merged.removed) == (1, 1)
+    assert content(t2.rows) == content(t1.rows) == content(read_csv(filename)[1])
+    assert csv_reads == []  # всё взято из журнала изменений
+
+
+def test_both_sides_keep_their_edits(filename):
+    t1, s1 = open_shared(filename)
+    t2, s2 = open_shared(filename)
+    t1.update(1, ["10:30", "b2", "x"])
+    save(t1, s1)
+    t2.add_column("Prio")
+    t2.append(["13:00", "e", "", "1"])
+    merged = save(t2, s2)
+    assert (merged.added, merged.removed) == (1, 1)
+    s1.pull()
+    assert t1.headers == t2.headers
+    assert content(t1.rows) == content(t2.rows) == content(read_csv(filename)[1])
+    assert ("10:30", "b2", "x", "") in content(t2.rows)
+
+
+def test_merge_from_csv_when_log_is_missing(filename):
+    t1, s1 = open_shared(filename)
+    t2, s2 = open_shared(filename)
+    t1.delete([2])
+    t1.append(["14:00", "f", ""])
+    save(t1, s1)
+    os.remove(s1.log.path)
+    merged = s2.pull()
+    assert (merged.added, merged.removed) == (1, 1)
+    assert content(t2.rows) == content(t1.rows)
+
+
+def test_duplicate_rows_counted(filename):
+    t1, s1 = open_shared(filename)
+    t2, s2 = open_shared(filename)
+    t1.append(["09:00", "a", ""])  # вторая копия уже существующей строки
+    save(t1, s1)
+    s2.pull()
+    assert content(t2.rows).count(("09:00", "a", "")) == 2
+
+
+def test_deleted_by_id_keeps_own_edit(filename):
+    t1, s1 = open_shared(filename, ID_COLUMN)
+    save(t1, s1)  # ID записаны в файл
+    t2, s2 = open_shared(filename, ID_COLUMN)
+    t1.delete([0])
+    save(t1, s1)
+    t2.update(0, ["09:00", "a (edited)", ""])
+    s2.pull()
+    # строку, изменённую у себя, слияние не удаляет
+    assert [r[1] for r in t2.rows] == ["a (edited)", "b", "c"]
+
+
+def test_file_lock_times_out(filename):
+    with FileLock(filename):
+        with pytest.raises(TimeoutError):
+            FileLock(filename, timeout=0.1).acquire()
+    with FileLock(filename, timeout=0.1):
+        pass
+
+
+def test_read_changes_does_not_touch_table(filename):
+    t1, s1 = open_shared(filename)
+    t2, s2 = open_shared(filename)
+    t1.append(["15:00", "g", ""])
+    save(t1, s1)
+    before = (t2.version, [list(r) for r in t2.rows], s2.state)
+    with FileLock(filename):
+        changes = s2.read_changes()
+    assert (t2.version, t2.rows, s2.state) == before
+    assert s2.apply_changes(changes).added == 1
+    assert not s2.changed_on_disk()
+
+
+def test_row_key_ignores_column_order_and_empty_cells():
+    key = todo_shared.row_key
+    assert key(["a", "b"], ["1", "2"]) == key(["b", "a"], ["2", "1"])
+    assert key(["a", "b", "c"], ["1", "2", ""]) == key(["a", "b"], ["1", "2"])
+    assert key(["a", "b"], ["1", "2"], {"b"}) == key(["a"], ["1"])
@@ -0,0 +1,126 @@
+"""
+Сводки по таблице без прохода по данным: обновляются на каждой вставке, правке и удалении.
+- Число задач и выполненных (столбец Status).
+- Гистограмма по часам из столбца "Time: " (HH:MM): 24 корзины плюс задачи без времени.
+- Группировка по столбцу (число строк на каждое значение): счётчик заводится при первом
+  запросе столбца одним проходом, дальше только поправляется на изменениях.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from todo_calendar import DONE_STATUSES, STATUS_COLUMN, TIME_COLUMN
+from todo_schema import parse_time
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+HOURS = 24
+
+
+def _cell(row: Sequence[str], ci: Optional[int]) -> str:
+    if ci is None or ci >= len(row):
+        return ""
+    return row[ci]
+
+
+class Aggregates(TableListener):
+    """Счётчики по таблице: правка одной строки меняет O(1) значений."""
+
+    def __init__(self, table: TaskTable):
+        self.table = table
+        self.hours: List[int] = [0] * HOURS
+        self.untimed = 0
+        self.done = 0
+        self._groups: Dict[str, Counter] = {}  # столбец -> значение -> число строк
+        table.add_listener(self)
+
+    # -------------------- подсчёт --------------------
+    def _index(self, header: str) -> Optional[int]:
+        headers = self.table.headers
+        return headers.index(header) if header in headers else None
+
+    def _columns(self):
+        """Номера столбцов времени, статуса и отслеживаемых группировок для текущих заголовков."""
+        groups = [(self.table.headers.index(h), c) for h, c in self._groups.items()]
+        return self._index(TIME_COLUMN), self._index(STATUS_COLUMN), groups
+
+    def _count(self, row: Sequence[str], sign: int, columns) -> None:
+        time_ci, status_ci, groups = columns
+        minute = parse_time(_cell(row, time_ci))
+        if minute is None:
+            self.untimed += sign
+        else:
+            self.hours[minute // 60] += sign
+        if _cell(row, status_ci).strip().lower() in DONE_STATUSES:
+            self.done += sign
+        for ci, counter in groups:
+            key = _cell(row, ci).strip()
+            counter[key] += sign
+            if counter[key] <= 0:
+                del counter[key]
+
+    def _rebuild(self) -> None:
+        self.hours = [0] * HOURS
+        self.untimed = 0
+        self.done = 0
+        self._groups = {h: Counter() for h in self._groups if h in self.table.headers}
+        columns = self._columns()
+        for row in self.table.rows:
+            self._count(row, 1, columns)
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self._rebuild()
+
+    def on_columns(self, table: TaskTable) -> None:
+        self._rebuild()
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        columns = self._columns()
+        for row in table.rows[start:start + count]:
+            self._count(row, 1, columns)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        columns = self._columns()
+        self._count(old_row, -1, columns)
+        self._count(table.rows[idx], 1, columns)
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        columns = self._columns()
+        for row in old_rows:
+            self._count(row, -1, columns)
+
+    # -------------------- доступ --------------------
+    @property
+    def count(self) -> int:
+        return len(self.table.rows)
+
+    def group(self, header: str) -> Counter:
+        """Значение столбца -> число строк. Первый запрос столбца строит счётчик проходом."""
+        counter = self._groups.get(header)
+        if counter is None:
+            if header not in self.table.headers:
+                raise KeyError(header)
+            counter = Counter()
+            ci = self.table.headers.index(header)
+            for row in self.table.rows:
+                counter[_cell(row, ci).strip()] += 1
+            self._groups[header] = counter
+        return counter
+
+    def group_by(self, header: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Группы столбца по убыванию числа строк (пустое значение — '')."""
+        return self.group(header).most_common(limit)
+
+    def busiest_hour(self) -> Optional[int]:
+        if not any(self.hours):
+            return None
+        return max(range(HOURS), key=lambda h: self.hours[h])
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "done": self.done,
+            "untimed": self.untimed,
+            "hours": list(self.hours),
+            "busiest_hour": self.busiest_hour(),
+        }
@@ -0,0 +1,131 @@
+"""
+Архив старых и выполненных задач: горячий файл + холодные разделы.
+- Горячий файл — обычный файл автосохранения с актуальными задачами: только он
+  читается при старте и пишется при сохранении, поэтому их время не растёт с историей.
+- Задачи с датой (столбец Date) старше KEEP_DAYS дней и выполненные задачи, чей день
+  прошёл, переносятся в "<файл>.archive/ГГГГ-ММ.jsonl.gz" — по разделу на месяц.
+- Раздел дописывается новым членом gzip-потока, без перезаписи старых данных; строки
+  хранятся JSON-объектами, так что разделы не зависят от набора столбцов.
+- Разделы читаются только по запросу (поиск по истории) и потоково.
+"""
+import datetime
+import gzip
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from todo_calendar import DATE_COLUMN, CalendarIndex
+from todo_io import fsync_dir
+from todo_metrics import metrics
+from todo_shared import FileLock
+from todo_store import TaskTable
+
+ARCHIVE_SUFFIX = ".archive"
+PARTITION_EXT = ".jsonl.gz"
+# сколько дней задача с датой остаётся в горячем файле
+KEEP_DAYS = 30
+
+
+def partition_of(day: int) -> str:
+    """Порядковый номер дня -> имя раздела 'ГГГГ-ММ'."""
+    d = datetime.date.fromordinal(day)
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def select_for_archive(table: TaskTable, calendar: CalendarIndex, today: int,
+                       keep_days: int = KEEP_DAYS) -> List[int]:
+    """Строки для переноса в архив: старые по дате и выполненные (без даты или с прошедшей датой)."""
+    if not calendar.ensure():
+        # без столбца Date в архив уходят только выполненные задачи
+        return [i for i in range(len(table.rows)) if calendar.done(i)]
+    old = set(calendar.before(today - keep_days))  # читаются только корзины старых дней
+    for i in range(len(table.rows)):
+        if i not in old and calendar.done(i):
+            day = calendar.typed.value(DATE_COLUMN, i)
+            if day is None or day < today:
+                old.add(i)
+    return sorted(old)
+
+
+def move_to_archive(archive: "Archive", table: TaskTable, calendar: CalendarIndex,
+                    indices: List[int], today: int) -> Dict[str, int]:
+    """Дописывает строки в архив и удаляет их из таблицы. Возвращает {раздел: число строк}."""
+    dated = calendar.ensure()
+    days = [calendar.typed.value(DATE_COLUMN, i) if dated else None for i in indices]
+    written = archive.append(table.headers, [table.rows[i] for i in indices], days, today)
+    table.delete(indices)
+    return written
+
+
+class Archive:
+    """Каталог разделов архива рядом с файлом задач."""
+
+    def __init__(self, filename: str):
+        self.directory = filename + ARCHIVE_SUFFIX
+
+    def lock(self) -> FileLock:
+        """Блокировка на время переноса, чтобы два процесса не заархивировали одни строки дважды."""
+        return FileLock(self.directory)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name + PARTITION_EXT)
+
+    def partitions(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(n[:-len(PARTITION_EXT)] for n in names if n.endswith(PARTITION_EXT))
+
+    def append(self, headers: Sequence[str], rows: Sequence[Sequence[str]],
+               days: Sequence[Optional[int]], today: int) -> Dict[str, int]:
+        """
+        Дописывает строки в разделы по месяцу их даты (без даты — по текущему месяцу).
+        Данные сбрасываются на диск до возврата: после этого строки можно удалять из горячего файла.
+        """
+        groups: Dict[str, List[Dict[str, str]]] = {}
+        for row, day in zip(rows, days):
+            name = partition_of(today if day is None else day)
+            groups.setdefault(name, []).append({h: v for h, v in zip(headers, row) if v})
+        os.makedirs(self.directory, exist_ok=True)
+        with metrics.timer("archive.write"):
+            for name, items in groups.items():
+                data = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+                with open(self.path(name), "ab") as f:
+                    with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                        gz.write(data.encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+            fsync_dir(self.directory)
+        return {name: len(items) for name, items in groups.items()}
+
+    def read(self, name: str) -> Iterator[Dict[str, str]]:
+        """Строки раздела по одной; недописанный хвост (сбой во время записи) пропускается."""
+        try:
+            with gzip.open(self.path(name), "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except (EOFError, gzip.BadGzipFile):
+            return
+
+    def load(self, names: Optional[Iterable[str]] = None) -> Tuple[List[str], List[List[str]]]:
+        """Заголовки (объединение) и строки выбранных разделов (по умолчанию — всех)."""
+        headers: List[str] = []
+        seen = set()
+        items: List[Dict[str, str]] = []
+        with metrics.timer("archive.read"):
+            for name in names if names is not None else self.partitions():
+                for item in self.read(name):
+                    for h in item:
+                        if h not in seen:
+                            seen.add(h)
+                            headers.append(h)
+                    items.append(item)
+        return headers, [[item.get(h, "") for h in headers] for item in items]
+
+    def sizes(self) -> List[Tuple[str, int]]:
+        """(раздел, размер файла в байтах)."""
+        return [(name, os.path.getsize(self.path(name))) for name in self.partitions()]
@@ -0,0 +1,168 @@
+"""
+Массовое изменение задач: одна операция над всеми строками, подходящими под фильтр.
+- Операции: set (записать значение), replace (заменить подстроку), shift (сдвинуть
+  время на минуты или дату на дни).
+- Сначала строится план: новые значения всех строк проверяются по типам столбцов;
+  если хоть одно не подходит, таблица не меняется.
+- План применяется за один проход, а сохранение и обновление вида вызывающий код
+  делает один раз на всю операцию, а не на каждую строку.
+"""
+import shlex
+from typing import List, NamedTuple, Sequence, Tuple
+
+from todo_query import QueryEngine
+from todo_schedule import REPEAT_COLUMN, parse_rule
+from todo_schema import format_date, format_time, parse_date, parse_time
+from todo_store import TaskTable
+
+MINUTES_PER_DAY = 24 * 60
+# сколько ошибок проверки показывать пользователю
+ERROR_LIMIT = 5
+
+OPERATIONS_HELP = (
+    'set <столбец> <значение>            — записать значение (Status done, "TODO list:" "созвон")\n'
+    'replace <столбец> <было> <стало>    — заменить подстроку в значениях\n'
+    'shift <столбец> <+/-сдвиг>          — время: +30, -1:15 (минуты); дата: +1, -7 (дни)'
+)
+
+
+class BulkOperation(NamedTuple):
+    kind: str  # set | replace | shift
+    column: str
+    args: Tuple
+
+
+class BulkPlan(NamedTuple):
+    operation: BulkOperation
+    changes: List[Tuple[str, int, str]]  # (ID, номер строки, новое значение)
+    unchanged: int
+    errors: List[Tuple[int, str]]  # (номер строки, причина)
+
+
+def parse_shift(text: str, ctype: str) -> int:
+    """'+30', '-1:15' -> минуты (для времени); '+1', '-7' -> дни (для даты)."""
+    text = text.strip()
+    sign = -1 if text.startswith("-") else 1
+    body = text.lstrip("+-")
+    if ctype == "time" and ":" in body:
+        minutes = parse_time(body)
+        if minutes is None:
+            raise ValueError(f"Неверный сдвиг времени: '{text}'")
+        return sign * minutes
+    if not body.isdigit():
+        raise ValueError(f"Неверный сдвиг: '{text}'")
+    return sign * int(body)
+
+
+def parse_operation(engine: QueryEngine, text: str) -> BulkOperation:
+    """
+    'set Status done', 'replace Comments deploy release', 'shift Time +30'.
+    Имена столбцов — как в запросах (можно сокращать); значения с пробелами — в кавычках.
+    Ошибка — ValueError (для неизвестного столбца — QueryError, его подкласс).
+    """
+    try:
+        words = shlex.split(text)
+    except ValueError as e:
+        raise ValueError(f"Непарные кавычки: {e}")
+    if not words:
+        raise ValueError("Пустая операция")
+    kind, args = words[0].lower(), words[1:]
+    arity = {"set": 2, "replace": 3, "shift": 2}
+    if kind not in arity:
+        raise ValueError(f"Неизвестная операция '{words[0]}' (set, replace, shift)")
+    if len(args) != arity[kind]:
+        raise ValueError(f"Операции {kind} нужно аргументов: {arity[kind]}")
+    column = engine.resolve_column(args[0])
+    if column == engine.table.id_column:
+        raise ValueError("ID задач не меняется")
+    if kind == "replace" and not args[1]:
+        raise ValueError("Пустая подстрока для замены")
+    if kind == "shift":
+        ctype = engine.typed.column(column).ctype.name
+        if ctype not in ("time", "date"):
+            raise ValueError(f"Сдвиг возможен только для столбцов времени и даты ('{column.strip()}': {ctype})")
+        return BulkOperation(kind, column, (parse_shift(args[1], ctype), ctype))
+    return BulkOperation(kind, column, tuple(args[1:]))
+
+
+def _new_value(op: BulkOperation, value: str) -> str:
+    """Новое значение ячейки; не подходит — ValueError с причиной."""
+    if op.kind == "set":
+        return op.args[0]
+    if op.kind == "replace":
+        return value.replace(op.args[0], op.args[1])
+    delta, ctype = op.args
+    if not value.strip():
+        return value  # пустое время/дату не сдвигаем
+    if ctype == "time":
+        minutes = parse_time(value)
+        if minutes is None:
+            raise ValueError(f"не время: '{value}'")
+        shifted = minutes + delta
+        if not 0 <= shifted < MINUTES_PER_DAY:
+            raise ValueError(f"{value} со сдвигом выходит за пределы суток")
+        return format_time(shifted)
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"не дата: '{value}'")
+    return format_date(day + delta)
+
+
+def plan_bulk(engine: QueryEngine, indices: Sequence[int], op: BulkOperation) -> BulkPlan:
+    """Новые строки для indices без изменения таблицы; значения проверяются по типу столбца."""
+    table = engine.table
+    ci = table.headers.index(op.column)
+    ctype = engine.typed.column(op.column).ctype
+    changes: List[Tuple[str, int, str]] = []
+    errors: List[Tuple[int, str]] = []
+    unchanged = 0
+    for idx in indices:
+        row = table.rows[idx]
+        try:
+            value = _new_value(op, row[ci])
+            if ctype.name == "time" and parse_time(value) is not None:
+                value = format_time(parse_time(value))  # 9:5 -> 09:05, как при вводе
+            if not ctype.validate(value):
+                raise ValueError(f"'{value}' — ожидается тип '{ctype.spec}'")
+            if op.column == REPEAT_COLUMN:
+                parse_rule(value)
+        except ValueError as e:
+            errors.append((idx, str(e)))
+            continue
+        if value == row[ci]:
+            unchanged += 1
+            continue
+        changes.append((table.id_of(idx), idx, value))
+    return BulkPlan(op, changes, unchanged, errors)
+
+
+def apply_bulk(table: TaskTable, plan: BulkPlan) -> int:
+    """Применить план (только если в нём нет ошибок). Строки ищутся по ID. Возвращает число изменённых."""
+    if plan.errors:
+        raise ValueError(f"Значения не прошли проверку: {len(plan.errors)}")
+    ci = table.headers.index(plan.operation.column)
+    updates = []
+    for task_id, idx, value in plan.changes:
+        if task_id:
+            idx = table.slot(task_id)
+            if idx is None:
+                continue  # строку успели удалить
+        row = list(table.rows[idx])
+        row[ci] = value
+        updates.append((idx, row))
+    # одно уведомление слушателей на весь пакет
+    return table.update_many(updates)
+
+
+def describe_errors(plan: BulkPlan, limit: int = ERROR_LIMIT) -> str:
+    """Первые ошибки проверки: 'строка 5: ...' (номера с 1)."""
+    lines = [f"строка {idx + 1}: {reason}" for idx, reason in plan.errors[:limit]]
+    if len(plan.errors) > limit:
+        lines.append(f"... и ещё {len(plan.errors) - limit}")
+    return "\n".join(lines)
+
+
+def preview(table: TaskTable, plan: BulkPlan, limit: int = ERROR_LIMIT) -> List[Tuple[int, str, str]]:
+    """Первые изменения как (номер строки, было, стало) по изменяемому столбцу."""
+    ci = table.headers.index(plan.operation.column)
+    return [(idx, table.rows[idx][ci], value) for _, idx, value in plan.changes[:limit]]
@@ -0,0 +1,181 @@
+"""
+Календарь задач: необязательный столбец "Date" вместе с "Time: " даёт полную дату и время.
+- CalendarIndex: корзины по дням (порядковый номер дня -> строки) и отсортированный
+  список дней, поэтому день, неделя, просроченные задачи и очистка старых дней
+  трогают только нужные корзины, а не всю таблицу.
+- Строки без даты в календарь не попадают (задачи "на каждый день", как раньше).
+"""
+import bisect
+import datetime
+from typing import Dict, List, Optional
+
+from todo_schema import DATE_COLUMN, TypedColumns, parse_date
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+TIME_COLUMN = "Time: "
+STATUS_COLUMN = "Status"
+# задачи с таким статусом не считаются просроченными
+DONE_STATUSES = {"done", "готово", "сделано"}
+
+_DAY_WORDS = {"today": 0, "сегодня": 0, "tomorrow": 1, "завтра": 1, "yesterday": -1, "вчера": -1}
+
+
+def parse_day(text: str, today: Optional[datetime.date] = None) -> Optional[int]:
+    """'2024-05-01', '01.05.2024', 'today', 'завтра', '+3', '-7' -> порядковый номер дня или None."""
+    text = text.strip().lower()
+    today = today or datetime.date.today()
+    if not text or text in _DAY_WORDS:
+        return today.toordinal() + _DAY_WORDS.get(text, 0)
+    if text[0] in "+-" and text[1:].isdigit():
+        return today.toordinal() + int(text)
+    return parse_date(text)
+
+
+def week_start(day: int) -> int:
+    """Понедельник недели, в которую попадает день."""
+    return day - datetime.date.fromordinal(day).weekday()
+
+
+class CalendarIndex(TableListener):
+    """День -> строки. Строится лениво, вставки, правки и удаления обновляются без перестройки."""
+
+    def __init__(self, table: TaskTable, typed: TypedColumns):
+        self.table = table
+        self.typed = typed
+        self.dirty = True
+        table.add_listener(self)
+
+    # -------------------- построение --------------------
+    def _day_of(self, i: int) -> Optional[int]:
+        return self.typed.value(DATE_COLUMN, i)
+
+    def _minute_of(self, i: int) -> int:
+        """Минуты от полуночи; строки без времени идут в начале дня."""
+        if TIME_COLUMN not in self.table.headers:
+            return -1
+        m = self.typed.value(TIME_COLUMN, i)
+        return -1 if m is None else m
+
+    def _enabled(self) -> bool:
+        return DATE_COLUMN in self.table.headers and self.typed.column(DATE_COLUMN).ctype.name == "date"
+
+    def ensure(self) -> bool:
+        """Готовит индекс; False — в таблице нет столбца с датой."""
+        if not self._enabled():
+            return False
+        if self.dirty:
+            self.buckets: Dict[int, List[int]] = {}
+            for i in range(len(self.table.rows)):
+                day = self._day_of(i)
+                if day is not None:
+                    self.buckets.setdefault(day, []).append(i)
+            self.days: List[int] = sorted(self.buckets)
+            self.dirty = False
+        return True
+
+    def _add(self, day: int, idx: int) -> None:
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            self.buckets[day] = [idx]
+            bisect.insort(self.days, day)
+        else:
+            bisect.insort(bucket, idx)
+
+    def _remove(self, day: int, idx: int) -> None:
+        bucket = self.buckets.get(day)
+        if not bucket:
+            return
+        pos = bisect.bisect_left(bucket, idx)
+        if pos < len(bucket) and bucket[pos] == idx:
+            del bucket[pos]
+        if not bucket:
+            del self.buckets[day]
+            del self.days[bisect.bisect_left(self.days, day)]
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self.dirty = True
+
+    def on_columns(self, table: TaskTable) -> None:
+        self.dirty = True
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        if self.dirty or not self._enabled():
+            return
+        # удалённые строки — из своих корзин (номера в корзинах пока старые)
+        ci = table.headers.index(DATE_COLUMN)
+        for idx, row in zip(indices, old_rows):
+            day = parse_date(row[ci]) if ci < len(row) else None
+            if day is not None:
+                self._remove(day, idx)
+        # номера после первого удалённого сдвигаются на число удалённых перед ними
+        first = indices.first()
+        for bucket in self.buckets.values():
+            for k in range(bisect.bisect_left(bucket, first), len(bucket)):
+                bucket[k] -= indices.rank(bucket[k])
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if self.dirty or not self._enabled():
+            return
+        for i in range(start, start + count):
+            day = self._day_of(i)
+            if day is not None:
+                self._add(day, i)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        if self.dirty or not self._enabled():
+            return
+        ci = table.headers.index(DATE_COLUMN)
+        old = parse_date(old_row[ci]) if ci < len(old_row) else None
+        new = self._day_of(idx)
+        if old == new:
+            return
+        if old is not None:
+            self._remove(old, idx)
+        if new is not None:
+            self._add(new, idx)
+
+    # -------------------- запросы --------------------
+    def _sorted(self, rows: List[int]) -> List[int]:
+        return sorted(rows, key=lambda i: (self._day_of(i), self._minute_of(i), i))
+
+    def day_range(self, start: int, stop: int) -> List[int]:
+        """Строки с датой в [start, stop) по дате и времени."""
+        if not self.ensure():
+            return []
+        lo = bisect.bisect_left(self.days, start)
+        hi = bisect.bisect_left(self.days, stop)
+        rows: List[int] = []
+        for day in self.days[lo:hi]:
+            rows.extend(self.buckets[day])
+        return self._sorted(rows)
+
+    def day(self, day: int) -> List[int]:
+        return self.day_range(day, day + 1)
+
+    def week(self, day: int) -> List[int]:
+        start = week_start(day)
+        return self.day_range(start, start + 7)
+
+    def before(self, day: int) -> List[int]:
+        """Строки с датой раньше day (для очистки и архивации старых дней)."""
+        if not self.ensure() or not self.days:
+            return []
+        return self.day_range(self.days[0], day)
+
+    def done(self, i: int) -> bool:
+        """Задача выполнена (столбец Status)."""
+        headers = self.table.headers
+        if STATUS_COLUMN not in headers:
+            return False
+        return self.table.rows[i][headers.index(STATUS_COLUMN)].strip().lower() in DONE_STATUSES
+
+    def overdue(self, now: Optional[datetime.datetime] = None) -> List[int]:
+        """Невыполненные задачи с датой и временем раньше now."""
+        now = now or datetime.datetime.now()
+        today = now.date().toordinal()
+        minute = now.hour * 60 + now.minute
+        rows = [i for i in self.before(today) if not self.done(i)]
+        rows.extend(i for i in self.day(today) if 0 <= self._minute_of(i) < minute and not self.done(i))
+        return rows
@@ -0,0 +1,397 @@
+"""
+Вычисляемые столбцы: значение ячейки — выражение над другими столбцами той же строки.
+- Выражение: 'time + duration', 'upper(todo_list)', 'time - now()'. Имена столбцов —
+  в нижнем регистре, без ':' и типа, пробелы -> '_' ('TODO list:' -> todo_list), или
+  col("TODO list:"). Значения приходят разобранными по типу столбца (время — минуты,
+  дата — номер дня), результат форматируется по типу вычисляемого столбца.
+- Разрешены арифметика, сравнения, and/or/not, 'a if cond else b' и функции из FUNCTIONS;
+  свои функции добавляются register_function, целые столбцы на Python — define_function.
+- Значения хранятся в строках таблицы как обычные ячейки (сортировка, поиск, сохранение
+  работают как со всеми столбцами). TaskTable вызывает fill() до уведомления слушателей:
+  пересчитываются только столбцы, у которых изменились входные ячейки строки.
+- Столбцы с now()/today() пересчитываются по tick() — не чаще раза в минуту.
+"""
+import ast
+import datetime
+import functools
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from todo_schema import TypedColumns, format_time, load_computed, save_computed
+from todo_store import TaskTable
+
+MINUTES_PER_DAY = 24 * 60
+# как часто GUI вызывает tick() (мс)
+TICK_MS = 60 * 1000
+# сколько разобранных значений времени/даты помнит каждый входной столбец
+PARSE_CACHE = 4096
+
+Value = object
+
+
+def _now() -> int:
+    t = datetime.datetime.now()
+    return t.hour * 60 + t.minute
+
+
+def _today() -> int:
+    return datetime.date.today().toordinal()
+
+
+# имя -> (функция, зависит от текущего времени)
+FUNCTIONS: Dict[str, Tuple[Callable, bool]] = {
+    "now": (_now, True),
+    "today": (_today, True),
+    "abs": (abs, False),
+    "min": (min, False),
+    "max": (max, False),
+    "round": (round, False),
+    "int": (int, False),
+    "float": (float, False),
+    "str": (str, False),
+    "len": (len, False),
+    "lower": (lambda s: str(s).lower(), False),
+    "upper": (lambda s: str(s).upper(), False),
+    "hours": (lambda m: m / 60, False),
+    "hhmm": (lambda m: format_time(int(m) % MINUTES_PER_DAY), False),
+}
+
+_ALLOWED = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call,
+    ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.USub, ast.UAdd, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+)
+
+
+def register_function(name: str, fn: Callable, volatile: bool = False) -> None:
+    """Функция для выражений; volatile — результат зависит от текущего времени."""
+    FUNCTIONS[name] = (fn, volatile)
+
+
+def ident(header: str) -> str:
+    """'TODO list:' -> 'todo_list', 'Priority [int]' -> 'priority'."""
+    name = re.sub(r"\[[^\]]*\]\s*$", "", header).strip().rstrip(":").strip().lower()
+    return re.sub(r"\W+", "_", name).strip("_")
+
+
+class Expression:
+    """Разобранное и проверенное выражение: входные столбцы и скомпилированный код."""
+
+    def __init__(self, text: str):
+        self.text = text.strip()
+        try:
+            tree = ast.parse(self.text, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Ошибка в выражении: {e.msg}")
+        self.names: Set[str] = set()  # идентификаторы столбцов
+        self.columns: Set[str] = set()  # имена из col("...")
+        self.volatile = False
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED):
+                raise ValueError(f"Недопустимая конструкция в выражении: {type(node).__name__}")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.keywords:
+                    raise ValueError("Можно вызывать только функции по имени, без именованных аргументов")
+                if node.func.id == "col":
+                    if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant):
+                        raise ValueError('col() принимает имя столбца в кавычках: col("TODO list:")')
+                    self.columns.add(str(node.args[0].value))
+                elif node.func.id not in FUNCTIONS:
+                    raise ValueError(f"Неизвестная функция {node.func.id}()")
+                else:
+                    self.volatile = self.volatile or FUNCTIONS[node.func.id][1]
+            elif isinstance(node, ast.Name) and node.id not in FUNCTIONS and node.id != "col":
+                self.names.add(node.id)
+        self.code = compile(tree, "<computed>", "eval")
+
+
+class Definition(NamedTuple):
+    name: str
+    expression: Optional[Expression]  # None — столбец задан функцией Python
+    function: Optional[Callable[[Dict[str, Value]], Value]]
+    inputs: Tuple[str, ...]  # для функции — заголовки входных столбцов
+    volatile: bool
+
+
+class _Step(NamedTuple):
+    ci: int  # индекс вычисляемого столбца
+    inputs: Tuple[int, ...]  # индексы входных столбцов
+    evaluate: Callable[[List[str]], str]
+    volatile: bool
+    signature: tuple  # определение, входы и типы: изменилась — столбец пересчитывается
+
+
+class ComputedColumns:
+    """Определения вычисляемых столбцов таблицы и пересчёт их значений."""
+
+    def __init__(self, table: TaskTable, typed: TypedColumns):
+        self.table = table
+        self.typed = typed
+        self.defs: Dict[str, Definition] = {}
+        self.errors: Dict[str, str] = {}  # столбец -> почему выключен (нет входного столбца, цикл)
+        self._plan: Optional[List[_Step]] = None
+        self._plan_headers: Tuple[str, ...] = ()
+        self._ticking = False
+        self._last_tick = None
+        table.computed = self
+
+    # -------------------- определения --------------------
+    def define(self, name: str, text: str) -> None:
+        """Столбец по выражению; нет столбца — добавляется. Ошибка в выражении — ValueError."""
+        expr = Expression(text)
+        self._set(Definition(name, expr, None, (), expr.volatile))
+
+    def define_function(self, name: str, fn: Callable[[Dict[str, Value]], Value],
+                        inputs: Sequence[str], volatile: bool = False) -> None:
+        """Столбец, который считает fn({заголовок: значение входного столбца})."""
+        self._set(Definition(name, None, fn, tuple(inputs), volatile))
+
+    def _set(self, definition: Definition) -> None:
+        old = self.defs.get(definition.name)
+        self.defs[definition.name] = definition
+        try:
+            self._order()
+        except ValueError:
+            if old is None:
+                del self.defs[definition.name]
+            else:
+                self.defs[definition.name] = old
+            raise
+        if definition.name not in self.table.headers:
+            self.table.add_column(definition.name)  # значения посчитает columns_changed
+        else:
+            self.table.columns_changed()
+
+    def remove(self, name: str) -> bool:
+        """Снять определение: столбец остаётся обычным, со значениями на момент снятия."""
+        if self.defs.pop(name, None) is None:
+            return False
+        self.errors.pop(name, None)
+        self.plan(force=True)
+        return True
+
+    def expressions(self) -> Dict[str, str]:
+        """Определения выражениями (для файла схемы; функции Python не сохраняются)."""
+        return {n: d.expression.text for n, d in self.defs.items() if d.expression is not None}
+
+    def load(self, filename: str) -> None:
+        """Определения из схемы файла данных (вместо текущих); неверные пропускаются с записью в errors."""
+        self.defs, self.errors = {}, {}
+        for name, text in load_computed(filename).items():
+            try:
+                expr = Expression(text)
+            except ValueError as e:
+                self.errors[name] = str(e)
+                continue
+            self.defs[name] = Definition(name, expr, None, (), expr.volatile)
+        try:
+            self._order()
+        except ValueError as e:
+            self.errors["*"] = str(e)
+            self.defs = {}
+        self.plan(force=True)
+
+    def save(self, filename: str) -> None:
+        save_computed(filename, self.expressions())
+
+    # -------------------- план --------------------
+    def _inputs(self, definition: Definition, headers: Sequence[str]) -> List[str]:
+        """Заголовки входных столбцов; KeyError с именем, если столбца нет."""
+        if definition.expression is None:
+            missing = [h for h in definition.inputs if h not in headers]
+            if missing:
+                raise KeyError(missing[0])
+            return list(definition.inputs)
+        by_ident: Dict[str, str] = {}
+        for h in headers:
+            by_ident.setdefault(ident(h), h)
+        out = []
+        for name in sorted(definition.expression.names):
+            if name not in by_ident:
+                raise KeyError(name)
+            out.append(by_ident[name])
+        for name in sorted(definition.expression.columns):
+            if name not in headers:
+                raise KeyError(name)
+            out.append(name)
+        return out
+
+    def _order(self) -> List[str]:
+        """Вычисляемые столбцы в порядке зависимостей; цикл — ValueError."""
+        headers = list(self.table.headers) + [n for n in self.defs if n not in self.table.headers]
+        deps: Dict[str, List[str]] = {}
+        for name, d in self.defs.items():
+            try:
+                deps[name] = [h for h in self._inputs(d, headers) if h in self.defs]
+            except KeyError:
+                deps[name] = []
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str, path: List[str]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError("Циклическая зависимость столбцов: " + " -> ".join(path + [name]))
+            state[name] = 1
+            for dep in deps[name]:
+                visit(dep, path + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self.defs:
+            visit(name, [])
+        return order
+
+    def plan(self, force: bool = False) -> List[_Step]:
+        """Шаги пересчёта; строится заново при смене заголовков (или force — смена определений, типов)."""
+        headers = tuple(self.table.headers)
+        if not force and self._plan is not None and headers == self._plan_headers:
+            return self._plan
+        self.errors = {n: e for n, e in self.errors.items() if n not in self.defs}
+        steps = []
+        for name in self._order():
+            if name not in headers:
+                continue
+            d = self.defs[name]
+            try:
+                inputs = self._inputs(d, headers)
+            except KeyError as e:
+                self.errors[name] = f"нет столбца {e}"
+                continue
+            ci = headers.index(name)
+            if ci in [headers.index(h) for h in inputs]:
+                self.errors[name] = "столбец ссылается на себя"
+                continue
+            signature = (id(d), tuple(inputs), tuple(self.typed.type_for(h).spec for h in inputs + [name]))
+            steps.append(_Step(ci, tuple(headers.index(h) for h in inputs),
+                               self._evaluator(d, name, inputs, headers), d.volatile, signature))
+        self._plan, self._plan_headers = steps, headers
+        return steps
+
+    def _evaluator(self, d: Definition, name: str, inputs: List[str], headers: Sequence[str]):
+        out_type = self.typed.type_for(name)
+
+        def converter(ctype) -> Callable[[str], Value]:
+            # числа, время и дата — разобранными значениями, остальное — текстом;
+            # различных значений времени и дат немного, разбор каждого кэшируется
+            if ctype.name in ("time", "date"):
+                return functools.lru_cache(maxsize=PARSE_CACHE)(ctype.parse)
+            return ctype.parse if ctype.name in ("int", "float") else str
+
+        parsers = [(h, headers.index(h), converter(self.typed.type_for(h))) for h in inputs]
+
+        def fmt(value: Value) -> str:
+            if value is None:
+                return ""
+            if isinstance(value, bool):
+                return "да" if value else "нет"
+            if out_type.name == "time" and isinstance(value, (int, float)):
+                return format_time(int(value) % MINUTES_PER_DAY)
+            if out_type.name in ("date", "time"):
+                return out_type.format(value) if isinstance(value, int) else str(value)
+            if isinstance(value, float):
+                return f"{value:.2f}".rstrip("0").rstrip(".")
+            return str(value)
+
+        if d.expression is None:
+            fn = d.function
+
+            def evaluate(row: List[str]) -> str:
+                try:
+                    return fmt(fn({h: conv(row[i]) for h, i, conv in parsers}))
+                except Exception:
+                    return ""
+            return evaluate
+
+        by_ident = [(ident(h), i, conv) for h, i, conv in parsers if ident(h) in d.expression.names]
+        by_name = {h: (i, conv) for h, i, conv in parsers}
+        code = d.expression.code
+        # одно окружение на столбец: для каждой строки меняются только значения входов
+        current: List[List[str]] = [[]]
+        env: Dict[str, Value] = {k: f for k, (f, _) in FUNCTIONS.items()}
+        env["col"] = lambda h: by_name[h][1](current[0][by_name[h][0]])
+        no_builtins = {"__builtins__": {}}
+
+        def evaluate(row: List[str]) -> str:
+            current[0] = row
+            for key, i, conv in by_ident:
+                env[key] = conv(row[i])
+            try:
+                return fmt(eval(code, no_builtins, env))
+            except Exception:
+                # пустой вход (None в арифметике), деление на ноль — пустая ячейка
+                return ""
+        return evaluate
+
+    # -------------------- пересчёт (вызывает TaskTable) --------------------
+    def fill(self, row: List[str], old: Optional[List[str]]) -> None:
+        """Заполнить вычисляемые ячейки новой (old=None) или изменённой строки."""
+        if not self.defs:
+            return
+        for step in self.plan():
+            if (old is not None and step.ci < len(old) and not (self._ticking and step.volatile)
+                    and all(row[i] == old[i] for i in step.inputs)):
+                row[step.ci] = old[step.ci]  # входы не менялись — значение из кэша строки
+            else:
+                row[step.ci] = step.evaluate(row)
+
+    def fill_all(self) -> None:
+        """Все вычисляемые ячейки всех строк (загрузка файла)."""
+        if self.defs:
+            self._recompute(set(self.defs))
+
+    def columns_changed(self) -> Set[str]:
+        """
+        Изменились столбцы, их типы или определения: пересчитываются только столбцы,
+        у которых поменялись определение, входы или типы (перестановка — ничего).
+        Удалённый вычисляемый столбец забывает определение. Возвращает пересчитанные столбцы.
+        """
+        for name in [n for n in self.defs if n in self._plan_headers and n not in self.table.headers]:
+            del self.defs[name]
+        old = {s.signature for s in (self._plan or [])}
+        changed: Set[int] = set()
+        for step in self.plan(force=True):  # по порядку зависимостей: пересчёт тянет за собой зависимые
+            if step.signature not in old or changed.intersection(step.inputs):
+                changed.add(step.ci)
+        names = {self.table.headers[ci] for ci in changed}
+        if names:
+            self._recompute(names)
+        return names
+
+    def _recompute(self, names: Set[str]) -> None:
+        steps = [s for s in self.plan() if self.table.headers[s.ci] in names]
+        for row in self.table.rows:
+            for step in steps:
+                row[step.ci] = step.evaluate(row)
+
+    def tick(self, now: Optional[datetime.datetime] = None) -> int:
+        """
+        Пересчитать столбцы с now()/today(), если сменилась минута. Изменённые строки
+        обновляются одним TaskTable.update_many (одно уведомление слушателей). Возвращает их число.
+        """
+        steps = [s for s in (self.plan() if self.defs else []) if s.volatile]
+        now = now or datetime.datetime.now()
+        key = now.replace(second=0, microsecond=0)
+        if not steps or key == self._last_tick:
+            return 0
+        self._last_tick = key
+        updates = [(idx, row) for idx, row in enumerate(self.table.rows)
+                   if any(row[s.ci] != s.evaluate(row) for s in steps)]
+        self._ticking = True
+        try:
+            return self.table.update_many(updates)
+        finally:
+            self._ticking = False
+
+    def describe(self) -> List[Tuple[str, str, str]]:
+        """(столбец, выражение, состояние) для вывода пользователю."""
+        self.plan()
+        out = []
+        for name, d in self.defs.items():
+            text = d.expression.text if d.expression is not None else "функция Python"
+            state = self.errors.get(name) or ("пересчёт раз в минуту" if d.volatile else "")
+            out.append((name, text, state))
+        return out
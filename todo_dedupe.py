@@ -0,0 +1,174 @@
+"""
+Поиск и удаление дубликатов задач за линейное время.
+- Ключ строки — хэш нормализованных значений ключевых столбцов (по умолчанию всех,
+  кроме ID): регистр и лишние пробелы не учитываются, время приводится к HH:MM.
+  Хранится 16-байтовый хэш, а не копия значений.
+- DedupeIndex: хэш -> строки с таким ключом. Строится лениво, вставки и правки
+  обновляют только свои записи, поэтому повторный поиск дубликатов не стоит прохода.
+- merge_records добавляет записи из файла потоком, пропуская строки, ключ которых уже
+  есть в таблице или встретился раньше в том же файле.
+"""
+import hashlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from todo_schema import format_time, parse_time
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+# сколько записей файла добавляется в таблицу за раз при слиянии
+MERGE_BATCH = 1000
+
+
+def normalize(value: str) -> str:
+    """Значение для сравнения: без лишних пробелов, без учёта регистра, время — HH:MM."""
+    minutes = parse_time(value)
+    if minutes is not None:
+        return format_time(minutes)
+    return " ".join(value.split()).casefold()
+
+
+def row_hash(row: Sequence[str], columns: Sequence[int]) -> bytes:
+    data = "\x1f".join(normalize(row[ci]) if ci < len(row) else "" for ci in columns)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+def resolve_key(headers: Sequence[str], text: str) -> List[str]:
+    """'Time:, TODO list:' -> столбцы таблицы (пробелы по краям имён не важны). Неизвестный — KeyError."""
+    key = []
+    for name in (n.strip() for n in text.split(",")):
+        if not name:
+            continue
+        col = next((h for h in headers if h.strip() == name), None)
+        if col is None:
+            raise KeyError(name)
+        key.append(col)
+    return key
+
+
+class DedupeIndex(TableListener):
+    """Хэш ключа -> номера строк. Удаление строк сдвигает номера — индекс строится заново при запросе."""
+
+    def __init__(self, table: TaskTable, key: Optional[List[str]] = None):
+        self.table = table
+        self.key = key
+        self.dirty = True
+        table.add_listener(self)
+
+    def set_key(self, key: Optional[List[str]]) -> None:
+        """Ключевые столбцы; None — все, кроме ID."""
+        if key != self.key:
+            self.key = key
+            self.dirty = True
+
+    def key_columns(self) -> List[str]:
+        if self.key is not None:
+            return [h for h in self.key if h in self.table.headers]
+        return [h for h in self.table.headers if h != self.table.id_column]
+
+    def hash_of(self, row: Sequence[str]) -> bytes:
+        """Хэш ключа строки, выровненной по заголовкам таблицы."""
+        self.ensure()
+        return row_hash(row, self._columns)
+
+    def ensure(self) -> None:
+        if not self.dirty:
+            return
+        self._columns = [self.table.headers.index(h) for h in self.key_columns()]
+        self.buckets: Dict[bytes, List[int]] = {}
+        for i, row in enumerate(self.table.rows):
+            self.buckets.setdefault(row_hash(row, self._columns), []).append(i)
+        self.dirty = False
+
+    def _add(self, h: bytes, idx: int) -> None:
+        self.buckets.setdefault(h, []).append(idx)
+
+    def _remove(self, h: bytes, idx: int) -> None:
+        bucket = self.buckets.get(h)
+        if bucket and idx in bucket:
+            bucket.remove(idx)
+            if not bucket:
+                del self.buckets[h]
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self.dirty = True
+
+    def on_columns(self, table: TaskTable) -> None:
+        self.dirty = True
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        self.dirty = True
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if self.dirty:
+            return
+        for i in range(start, start + count):
+            self._add(row_hash(table.rows[i], self._columns), i)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        if self.dirty:
+            return
+        old, new = row_hash(old_row, self._columns), row_hash(table.rows[idx], self._columns)
+        if old != new:
+            self._remove(old, idx)
+            # строки в корзине держатся по возрастанию: первая — оригинал
+            bucket = self.buckets.setdefault(new, [])
+            bucket.append(idx)
+            bucket.sort()
+
+    # -------------------- запросы --------------------
+    def contains(self, row: Sequence[str]) -> bool:
+        return self.hash_of(row) in self.buckets
+
+    def groups(self) -> List[List[int]]:
+        """Группы одинаковых строк (от двух), по первой строке группы."""
+        self.ensure()
+        return sorted((rows for rows in self.buckets.values() if len(rows) > 1), key=lambda g: g[0])
+
+    def extra(self) -> List[int]:
+        """Лишние копии: все строки групп, кроме первой."""
+        return sorted(i for group in self.groups() for i in group[1:])
+
+
+def merge_records(table: TaskTable, index: DedupeIndex,
+                  records: Iterable[Dict[str, str]], batch: int = MERGE_BATCH) -> Tuple[int, int]:
+    """
+    Добавляет записи в таблицу, пропуская дубликаты (и уже имеющиеся, и повторы внутри records).
+    Новые столбцы из записей добавляются в таблицу. Возвращает (добавлено, пропущено).
+    """
+    added = skipped = 0
+    pending: List[Dict[str, str]] = []
+
+    def flush() -> None:
+        nonlocal added, skipped
+        for rec in pending:
+            for h in rec:
+                if h not in table.headers:
+                    table.add_column(h)
+        seen = set()
+        ids = set()
+        rows = []
+        id_ci = table.headers.index(table.id_column) if table.id_column else None
+        for rec in pending:
+            row = [rec.get(h, "") for h in table.headers]
+            h = index.hash_of(row)
+            if h in index.buckets or h in seen:
+                skipped += 1
+                continue
+            seen.add(h)
+            # ID из файла, уже занятый в таблице, — чужая задача: выдаётся новый
+            if id_ci is not None:
+                if table.slot(row[id_ci]) is not None or row[id_ci] in ids:
+                    row[id_ci] = ""
+                ids.add(row[id_ci])
+            rows.append(row)
+        added += table.extend(rows)
+        pending.clear()
+
+    for rec in records:
+        pending.append(rec)
+        if len(pending) >= batch:
+            flush()
+    if pending:
+        flush()
+    return added, skipped
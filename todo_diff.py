@@ -0,0 +1,200 @@
+"""
+Сравнение двух файлов задач (или таблицы с файлом) потоком, в ограниченной памяти.
+- Строки сопоставляются по ID, если он есть в обоих файлах, иначе по ключевым столбцам
+  (по умолчанию — по содержимому общих столбцов, тогда строка может быть только
+  добавлена или удалена).
+- Хэш-соединение по разделам: записи обоих файлов раскладываются по хэшу ключа во
+  временные файлы-разделы (CSV: значения без имён столбцов), затем разделы сравниваются по одному — в памяти держится
+  только один раздел старого файла. Маленькие файлы сравниваются в памяти целиком.
+- Отчёт: добавленные и удалённые столбцы, число добавленных, удалённых и изменённых
+  строк и первые limit изменений с подробностями.
+"""
+import csv
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from todo_dedupe import normalize
+from todo_io import JSON_EXTS, data_ext, iter_records, open_text
+from todo_store import ID_COLUMN
+
+# примерный объём данных на один раздел
+PARTITION_BYTES = 16 * 1024 * 1024
+MAX_PARTITIONS = 256
+# сколько изменений сохраняется в отчёте с подробностями
+DIFF_LIMIT = 200
+
+Record = Dict[str, str]
+
+
+class Change(NamedTuple):
+    kind: str  # added | removed | changed
+    key: str  # ID или значения ключевых столбцов
+    old: Optional[Record]
+    new: Optional[Record]
+    columns: List[str]  # изменённые столбцы (для changed)
+
+
+class FileDiff:
+    """Итог сравнения: столбцы, счётчики по видам изменений и первые изменения."""
+
+    def __init__(self, old_headers: List[str], new_headers: List[str], limit: int = DIFF_LIMIT):
+        self.old_headers = old_headers
+        self.new_headers = new_headers
+        self.added_columns = [h for h in new_headers if h not in old_headers]
+        self.removed_columns = [h for h in old_headers if h not in new_headers]
+        self.counts: Counter = Counter()
+        self.changes: List[Change] = []
+        self.limit = limit
+
+    def add(self, change: Change) -> None:
+        self.counts[change.kind] += 1
+        if len(self.changes) < self.limit:
+            self.changes.append(change)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added_columns or self.removed_columns
+                    or self.counts["added"] or self.counts["removed"] or self.counts["changed"])
+
+    def summary(self) -> str:
+        parts = [f"добавлено строк: {self.counts['added']}", f"удалено: {self.counts['removed']}",
+                 f"изменено: {self.counts['changed']}", f"без изменений: {self.counts['same']}"]
+        if self.added_columns:
+            parts.append("новые столбцы: " + ", ".join(h.strip() for h in self.added_columns))
+        if self.removed_columns:
+            parts.append("удалённые столбцы: " + ", ".join(h.strip() for h in self.removed_columns))
+        return "; ".join(parts)
+
+
+def headers_of(filename: str) -> List[str]:
+    """
+    Столбцы файла: заголовок CSV или, как в read_json, все ключи записей JSON по первому
+    появлению (у записей JSON бывают разные ключи: файл читается отдельным проходом, потоком).
+    """
+    if data_ext(filename) in JSON_EXTS:
+        headers: Dict[str, None] = {}
+        for record in iter_records(filename):
+            headers.update(dict.fromkeys(record))
+        return list(headers)
+    with open_text(filename) as f:
+        return next(csv.reader(f), None) or []
+
+
+class _Partitions:
+    """
+    Записи (ключ, запись), разложенные по разделам: при одном разделе — в памяти, иначе —
+    во временных CSV-файлах (значения столбцов headers по порядку, без имён).
+    """
+
+    def __init__(self, count: int, directory: str, name: str, headers: List[str]):
+        self.count = count
+        self.headers = headers
+        self.memory: List[Tuple[str, Record]] = []
+        self.paths = [os.path.join(directory, f"{name}{i}.csv") for i in range(count)] if count > 1 else []
+        self.files = [open(path, "w", encoding="utf-8", newline="") for path in self.paths]
+        self.writers = [csv.writer(f) for f in self.files]
+
+    def add(self, key: str, record: Record) -> None:
+        if self.count == 1:
+            self.memory.append((key, record))
+            return
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        part = int.from_bytes(digest, "little") % self.count
+        self.writers[part].writerow([key] + [record.get(h, "") for h in self.headers])
+
+    def close(self) -> None:
+        for f in self.files:
+            f.close()
+
+    def read(self, part: int) -> Iterator[Tuple[str, Record]]:
+        if self.count == 1:
+            yield from self.memory
+            return
+        with open(self.paths[part], encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                yield row[0], dict(zip(self.headers, row[1:]))
+
+
+def _key_function(key_columns: Sequence[str], use_id: bool):
+    def key_of(record: Record) -> str:
+        if use_id and record.get(ID_COLUMN):
+            return "id\x1f" + record[ID_COLUMN]
+        return "row\x1f" + "\x1f".join(normalize(record.get(h, "")) for h in key_columns)
+
+    def describe(record: Record) -> str:
+        if use_id and record.get(ID_COLUMN):
+            return record[ID_COLUMN]
+        return " | ".join(v for v in (record.get(h, "") for h in key_columns) if v)
+    return key_of, describe
+
+
+def diff_records(old_headers: List[str], old_records: Iterable[Record],
+                 new_headers: List[str], new_records: Iterable[Record],
+                 key_columns: Optional[Sequence[str]] = None, partitions: int = 1,
+                 limit: int = DIFF_LIMIT) -> FileDiff:
+    """
+    Сравнивает два потока записей. key_columns — столбцы сопоставления строк без ID
+    (по умолчанию все общие, кроме ID). partitions > 1 — раскладка во временные файлы.
+    """
+    result = FileDiff(old_headers, new_headers, limit)
+    common = [h for h in old_headers if h in new_headers and h != ID_COLUMN]
+    use_id = ID_COLUMN in old_headers and ID_COLUMN in new_headers
+    key_of, describe = _key_function(key_columns if key_columns else common, use_id)
+    with tempfile.TemporaryDirectory(prefix="todo-diff-") as directory:
+        old_parts = _Partitions(partitions, directory, "old", old_headers)
+        for record in old_records:
+            old_parts.add(key_of(record), record)
+        old_parts.close()
+        new_parts = _Partitions(partitions, directory, "new", new_headers)
+        for record in new_records:
+            new_parts.add(key_of(record), record)
+        new_parts.close()
+
+        for part in range(partitions):
+            # строки с одинаковым ключом сопоставляются по порядку
+            pending: Dict[str, List[Record]] = {}
+            for key, record in old_parts.read(part):
+                pending.setdefault(key, []).append(record)
+            for key, record in new_parts.read(part):
+                olds = pending.get(key)
+                if not olds:
+                    result.add(Change("added", describe(record), None, record, []))
+                    continue
+                old = olds.pop(0)
+                if not olds:
+                    del pending[key]
+                changed = [h for h in common if old.get(h, "") != record.get(h, "")]
+                if changed:
+                    result.add(Change("changed", describe(record), old, record, changed))
+                else:
+                    result.counts["same"] += 1
+            for key, olds in pending.items():
+                for old in olds:
+                    result.add(Change("removed", describe(old), old, None, []))
+    return result
+
+
+def partitions_for(size: int) -> int:
+    """Число разделов для данных заданного объёма (в байтах)."""
+    return max(1, min(MAX_PARTITIONS, size // PARTITION_BYTES))
+
+
+def diff_files(old_file: str, new_file: str, key_columns: Optional[Sequence[str]] = None,
+               limit: int = DIFF_LIMIT) -> FileDiff:
+    """Сравнение двух файлов задач (CSV/JSON, в том числе сжатых)."""
+    size = os.path.getsize(old_file) + os.path.getsize(new_file)
+    return diff_records(headers_of(old_file), iter_records(old_file),
+                        headers_of(new_file), iter_records(new_file),
+                        key_columns, partitions_for(size), limit)
+
+
+def diff_table(filename: str, headers: List[str], rows: Iterable[Sequence[str]],
+               key_columns: Optional[Sequence[str]] = None, limit: int = DIFF_LIMIT) -> FileDiff:
+    """Что изменится в файле, если записать в него таблицу (файл — старая версия)."""
+    records = (dict(zip(headers, row)) for row in rows)
+    size = os.path.getsize(filename)
+    return diff_records(headers_of(filename), iter_records(filename), list(headers), records,
+                        key_columns, partitions_for(2 * size), limit)
@@ -0,0 +1,234 @@
+"""
+Лента изменений с возрастающими номерами (seq).
+- ChangeFeed: изменения TaskTable внутри процесса (подписчики-функции, история
+  последних изменений). Используется GUI и HTTP-сервером (/changes).
+- FeedLog: журнал "<файл>.feed.jsonl", общий для всех процессов. Каждое сохранение
+  через SharedFile дописывает запись со строками, добавленными и удалёнными с
+  прошлой версии файла, поэтому другие процессы применяют изменения построчно,
+  не перечитывая весь CSV, а команда watch в CLI просто читает хвост журнала.
+"""
+import json
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+FEED_SUFFIX = ".feed.jsonl"
+# больше строк в одной записи не пишем: вместо них — запись "reset" (перечитать файл)
+FEED_MAX_ROWS = 1000
+# при превышении размера журнал сокращается до последней половины записей
+FEED_MAX_BYTES = 4 * 1024 * 1024
+FEED_HISTORY = 1000
+POLL_INTERVAL = 0.5
+
+Change = Dict[str, object]
+
+
+def feed_path(filename: str) -> str:
+    return filename + FEED_SUFFIX
+
+
+def row_dict(headers: List[str], row: List[str]) -> Dict[str, str]:
+    return dict(zip(headers, row))
+
+
+def describe(change: Change) -> List[str]:
+    """Строки для вывода изменения в терминал."""
+    op = change.get("op")
+    head = f"#{change.get('seq')}"
+    if "pid" in change:
+        head += f" (процесс {change['pid']})"
+    if op == "reset":
+        return [f"{head}: таблица заменена целиком"]
+    if op == "columns":
+        return [f"{head}: столбцы: {', '.join(change.get('headers', []))}"]
+    out = []
+    for row in change.get("removed", []):
+        out.append(f"{head} - " + " | ".join(v for v in row.values() if v))
+    for row in change.get("added", []):
+        out.append(f"{head} + " + " | ".join(v for v in row.values() if v))
+    if op == "update":
+        out = [f"{head} ~ " + " | ".join(v for v in change["row"].values() if v)]
+    if op == "updates":
+        out = [f"{head} ~ " + " | ".join(v for v in row.values() if v) for row in change.get("rows", [])]
+        out = out or [f"{head}: изменено строк: {len(change['indices'])}"]
+    return out or [f"{head}: без изменений строк"]
+
+
+class ChangeFeed(TableListener):
+    """Изменения таблицы внутри процесса с номерами и подписками."""
+
+    def __init__(self, table: TaskTable, history: int = FEED_HISTORY):
+        self.seq = 0
+        self.history: deque = deque(maxlen=history)
+        self._subscribers: List[Callable[[Change], None]] = []
+        table.add_listener(self)
+
+    def subscribe(self, callback: Callable[[Change], None]) -> Callable[[], None]:
+        """Подписка на новые изменения; возвращает функцию отписки."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback) if callback in self._subscribers else None
+
+    def since(self, seq: int) -> Optional[List[Change]]:
+        """Изменения после seq; None — часть уже вытеснена из истории (нужно перечитать всё)."""
+        if seq >= self.seq:
+            return []
+        if not self.history or self.history[0]["seq"] > seq + 1:
+            return None
+        return [c for c in self.history if c["seq"] > seq]
+
+    def _emit(self, change: Change) -> None:
+        self.seq += 1
+        change["seq"] = self.seq
+        self.history.append(change)
+        for callback in list(self._subscribers):
+            callback(change)
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        if self.seq or table.rows:
+            self._emit({"op": "reset"})
+
+    def on_columns(self, table: TaskTable) -> None:
+        self._emit({"op": "columns", "headers": list(table.headers)})
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if count > FEED_MAX_ROWS:
+            self._emit({"op": "insert", "index": start, "count": count})
+            return
+        h = table.headers
+        self._emit({"op": "insert", "index": start, "count": count,
+                    "added": [row_dict(h, r) for r in table.rows[start:start + count]]})
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        h = table.headers
+        self._emit({"op": "update", "index": idx, "old": row_dict(h, old_row), "row": row_dict(h, table.rows[idx])})
+
+    def on_update_many(self, table: TaskTable, indices: List[int], old_rows: List[List[str]]) -> None:
+        # одна запись на пакет; строки — только для небольших пакетов
+        change: Change = {"op": "updates", "indices": list(indices)}
+        if len(indices) <= FEED_MAX_ROWS:
+            h = table.headers
+            change["old"] = [row_dict(h, r) for r in old_rows]
+            change["rows"] = [row_dict(h, table.rows[i]) for i in indices]
+        self._emit(change)
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        # всегда — интервалы [начало, конец); номера по одному — только для небольших удалений
+        change: Change = {"op": "delete", "ranges": indices.ranges()}
+        if len(old_rows) <= FEED_MAX_ROWS:
+            change["indices"] = list(indices)
+            change["removed"] = [row_dict(table.headers, r) for r in old_rows]
+        self._emit(change)
+
+
+class FeedLog:
+    """
+    Журнал изменений файла задач (JSON-строки). Запись — только под блокировкой
+    файла данных (её держит SharedFile.save), поэтому seq не повторяются.
+    """
+
+    def __init__(self, filename: str):
+        self.path = feed_path(filename)
+
+    def _tail(self) -> Optional[Change]:
+        """Последняя запись журнала (чтение с конца файла)."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                pos = end
+                data = b""
+                while pos > 0:
+                    step = min(65536, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+                    lines = data.rstrip(b"\n").split(b"\n")
+                    if len(lines) > 1 or pos == 0:
+                        return json.loads(lines[-1]) if lines[-1] else None
+        except (OSError, ValueError):
+            return None
+        return None
+
+    def last_seq(self) -> int:
+        last = self._tail()
+        return int(last["seq"]) if last else 0
+
+    def append(self, record: Change) -> int:
+        record["seq"] = self.last_seq() + 1
+        record.setdefault("pid", os.getpid())
+        record.setdefault("time", round(time.time(), 3))
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            size = f.tell()
+        if size > FEED_MAX_BYTES:
+            self._compact()
+        return record["seq"]
+
+    def _compact(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines[len(lines) // 2:])
+        os.replace(tmp, self.path)
+
+    def _read(self, offset: int) -> Tuple[List[Change], int]:
+        """Полные записи начиная с байта offset и позиция после последней из них."""
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # недописанную строку оставляем на следующий раз
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, offset + end
+
+    def read_since(self, seq: int) -> Tuple[List[Change], bool]:
+        """
+        Записи с номером больше seq и признак полноты: False, если журнал уже
+        сокращён и часть записей после seq потеряна.
+        """
+        try:
+            records, _ = self._read(0)
+        except OSError:
+            return [], seq == 0
+        complete = not records or records[0]["seq"] <= seq + 1
+        return [r for r in records if r["seq"] > seq], complete
+
+    def follow(self, since: int, stop: Callable[[], bool] = lambda: False,
+               poll: float = POLL_INTERVAL) -> Iterator[Change]:
+        """Новые записи по мере появления (как tail -f), пока stop() не вернёт True."""
+        last = since
+        inode = None
+        offset = 0
+        while not stop():
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                time.sleep(poll)
+                continue
+            if st.st_ino != inode or st.st_size < offset:
+                # журнал создан заново или сокращён — читаем с начала
+                inode, offset = st.st_ino, 0
+            if st.st_size == offset:
+                time.sleep(poll)
+                continue
+            try:
+                records, offset = self._read(offset)
+            except OSError:
+                continue
+            if records and records[0]["seq"] > last + 1 and last:
+                yield {"op": "reset", "seq": records[0]["seq"] - 1}
+            for rec in records:
+                if rec["seq"] > last:
+                    last = rec["seq"]
+                    yield rec
@@ -0,0 +1,181 @@
+"""
+Вторичные индексы над TaskTable.
+- TimeIndex: корзины по минутам суток (1440 штук) для столбцов типа time.
+- TextIndex: слово -> множество строк для текстовых столбцов.
+Индексы строятся лениво при первом запросе и дальше обновляются на вставках и
+правках; удаление сдвигает номера строк, поэтому индекс просто помечается устаревшим.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from todo_schema import TypedColumns
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+MINUTES_PER_DAY = 24 * 60
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+class ColumnIndex(TableListener):
+    """Общая часть индексов одного столбца."""
+
+    def __init__(self, table: TaskTable, typed: TypedColumns, header: str):
+        self.table = table
+        self.typed = typed
+        self.header = header
+        self.dirty = True
+
+    def ensure(self) -> None:
+        if self.dirty:
+            self.build()
+            self.dirty = False
+
+    def build(self) -> None:
+        raise NotImplementedError
+
+    def on_reset(self, table: TaskTable) -> None:
+        self.dirty = True
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        self.dirty = True
+
+
+class TimeIndex(ColumnIndex):
+    """Минута суток -> список строк; диапазонный запрос трогает только нужные корзины."""
+
+    def build(self) -> None:
+        self.buckets: List[List[int]] = [[] for _ in range(MINUTES_PER_DAY)]
+        vals = self.typed.column(self.header).values
+        for i, v in enumerate(vals):
+            if 0 <= v < MINUTES_PER_DAY:
+                self.buckets[v].append(i)
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if self.dirty:
+            return
+        vals = self.typed.column(self.header).values
+        for i in range(start, start + count):
+            v = vals[i]
+            if 0 <= v < MINUTES_PER_DAY:
+                self.buckets[v].append(i)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        if self.dirty:
+            return
+        col = self.typed.column(self.header)
+        ci = table.headers.index(self.header)
+        old = col.ctype.parse(old_row[ci]) if ci < len(old_row) else None
+        if old is not None and idx in self.buckets[old]:
+            self.buckets[old].remove(idx)
+        v = col.values[idx]
+        if 0 <= v < MINUTES_PER_DAY:
+            self.buckets[v].append(idx)
+
+    def range(self, lo: Optional[int], hi: Optional[int], lo_incl: bool = True, hi_incl: bool = False) -> Set[int]:
+        """Строки со временем в [lo, hi) (границы настраиваются)."""
+        self.ensure()
+        a = 0 if lo is None else (lo if lo_incl else lo + 1)
+        b = MINUTES_PER_DAY - 1 if hi is None else (hi if hi_incl else hi - 1)
+        res: Set[int] = set()
+        for m in range(max(a, 0), min(b, MINUTES_PER_DAY - 1) + 1):
+            res.update(self.buckets[m])
+        return res
+
+
+class TextIndex(ColumnIndex):
+    """Инвертированный индекс слов столбца (регистр не учитывается)."""
+
+    def build(self) -> None:
+        self.postings: Dict[str, Set[int]] = {}
+        ci = self.table.headers.index(self.header)
+        for i, row in enumerate(self.table.rows):
+            self._add(i, row[ci])
+
+    def _add(self, i: int, text: str) -> None:
+        for tok in tokenize(text):
+            self.postings.setdefault(tok, set()).add(i)
+
+    def _discard(self, i: int, text: str) -> None:
+        for tok in tokenize(text):
+            s = self.postings.get(tok)
+            if s is not None:
+                s.discard(i)
+                if not s:
+                    del self.postings[tok]
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if self.dirty:
+            return
+        ci = table.headers.index(self.header)
+        for i in range(start, start + count):
+            self._add(i, table.rows[i][ci])
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        if self.dirty:
+            return
+        ci = table.headers.index(self.header)
+        old = old_row[ci] if ci < len(old_row) else ""
+        if old != table.rows[idx][ci]:
+            self._discard(idx, old)
+            self._add(idx, table.rows[idx][ci])
+
+    def candidates(self, needle: str) -> Optional[Set[int]]:
+        """
+        Надмножество строк, где столбец содержит needle как подстроку.
+        Берётся самое длинное слово из needle и все слова словаря, которые его содержат.
+        None — если индекс не помогает (в needle нет слов).
+        """
+        words = _WORD_RE.findall(needle.lower())
+        if not words:
+            return None
+        self.ensure()
+        probe = max(words, key=len)
+        res: Set[int] = set()
+        for tok, rows in self.postings.items():
+            if probe in tok:
+                res |= rows
+        return res
+
+
+class IndexSet(TableListener):
+    """Ленивые индексы по столбцам; сбрасываются при смене столбцов."""
+
+    def __init__(self, table: TaskTable, typed: TypedColumns):
+        self.table = table
+        self.typed = typed
+        self._indexes: Dict[str, ColumnIndex] = {}
+        table.add_listener(self)
+
+    def _get(self, header: str, cls) -> ColumnIndex:
+        idx = self._indexes.get(header)
+        if not isinstance(idx, cls):
+            if idx is not None:
+                self.table.remove_listener(idx)
+            idx = cls(self.table, self.typed, header)
+            self.table.add_listener(idx)
+            self._indexes[header] = idx
+        return idx
+
+    def time_index(self, header: str) -> TimeIndex:
+        return self._get(header, TimeIndex)
+
+    def text_index(self, header: str) -> TextIndex:
+        return self._get(header, TextIndex)
+
+    def drop(self, headers: Optional[Iterable[str]] = None) -> None:
+        for h in list(headers if headers is not None else self._indexes):
+            idx = self._indexes.pop(h, None)
+            if idx is not None:
+                self.table.remove_listener(idx)
+
+    def on_reset(self, table: TaskTable) -> None:
+        # при полной замене индексы остаются, но помечаются устаревшими (через свои слушатели)
+        pass
+
+    def on_columns(self, table: TaskTable) -> None:
+        self.drop()
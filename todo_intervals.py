@@ -0,0 +1,180 @@
+"""
+Множество номеров строк как отсортированные непересекающиеся полуинтервалы [start, stop).
+- Диапазон «1-200000» занимает одну пару чисел, а не 200 тысяч элементов множества.
+- Проверка принадлежности и «сколько номеров меньше i» — бинарный поиск по интервалам.
+- compact() собирает последовательность без удалённых номеров срезами промежутков
+  между интервалами: один линейный проход копирования (для array — без Python-цикла).
+"""
+import bisect
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Range = Tuple[int, int]
+
+
+class IntervalSet:
+    """Неизменяемое множество целых: интервалы хранятся в двух отсортированных списках."""
+
+    def __init__(self, ranges: Iterable[Range] = ()):
+        merged: List[List[int]] = []
+        for start, stop in sorted((a, b) for a, b in ranges if a < b):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+        self._starts = [a for a, _ in merged]
+        self._stops = [b for _, b in merged]
+        # _before[j] — сколько номеров в интервалах до j-го
+        self._before = [0] * len(merged)
+        total = 0
+        for j, (a, b) in enumerate(merged):
+            self._before[j] = total
+            total += b - a
+        self._len = total
+
+    @classmethod
+    def of(cls, values: Iterable[int]) -> "IntervalSet":
+        """Из отдельных номеров: подряд идущие склеиваются в интервалы."""
+        ranges: List[Range] = []
+        start = stop = None
+        for v in sorted(set(values)):
+            if v == stop:
+                stop += 1
+                continue
+            if start is not None:
+                ranges.append((start, stop))
+            start, stop = v, v + 1
+        if start is not None:
+            ranges.append((start, stop))
+        return cls(ranges)
+
+    def ranges(self) -> List[Range]:
+        return list(zip(self._starts, self._stops))
+
+    def range_count(self) -> int:
+        return len(self._starts)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self) -> Iterator[int]:
+        for a, b in zip(self._starts, self._stops):
+            yield from range(a, b)
+
+    def __contains__(self, value: int) -> bool:
+        j = bisect.bisect_right(self._starts, value) - 1
+        return j >= 0 and value < self._stops[j]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IntervalSet) and self.ranges() == other.ranges()
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.ranges()})"
+
+    def first(self) -> int:
+        return self._starts[0]
+
+    def rank(self, value: int) -> int:
+        """Сколько номеров множества меньше value (на столько сдвинется строка value после удаления)."""
+        j = bisect.bisect_right(self._starts, value) - 1
+        if j < 0:
+            return 0
+        return self._before[j] + min(value, self._stops[j]) - self._starts[j]
+
+    def clip(self, start: int, stop: int) -> "IntervalSet":
+        """Только номера из [start, stop)."""
+        return IntervalSet((max(a, start), min(b, stop)) for a, b in self.ranges())
+
+    def gaps(self, size: int) -> List[Range]:
+        """Промежутки [0, size) вне множества."""
+        out: List[Range] = []
+        pos = 0
+        for a, b in zip(self._starts, self._stops):
+            if a >= size:
+                break
+            if a > pos:
+                out.append((pos, a))
+            pos = max(pos, b)
+        if pos < size:
+            out.append((pos, size))
+        return out
+
+    def compact(self, seq: Sequence):
+        """Копия seq (list или array) без элементов с номерами из множества."""
+        out = seq[0:0]
+        for a, b in self.gaps(len(seq)):
+            out += seq[a:b]
+        return out
+
+    def renumber(self, size: int) -> array:
+        """Старый номер -> новый после удаления множества (удалённые -> -1)."""
+        out = array("q", [-1]) * size
+        pos = 0
+        for a, b in self.gaps(size):
+            out[a:b] = array("q", range(pos, pos + b - a))
+            pos += b - a
+        return out
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        return IntervalSet(self.ranges() + other.ranges())
+
+    def expand(self, other: "IntervalSet") -> "IntervalSet":
+        """
+        other — номера в последовательности, из которой уже удалено self; результат — те же
+        элементы в нумерации до удаления (интервал other может разойтись на несколько).
+        """
+        if not other:
+            return IntervalSet()
+        size = (self._stops[-1] if self._stops else 0) + other._stops[-1]
+        gaps = self.gaps(size)
+        offsets = []  # номер начала промежутка после удаления
+        pos = 0
+        for g0, g1 in gaps:
+            offsets.append(pos)
+            pos += g1 - g0
+        out: List[Range] = []
+        for a, b in other.ranges():
+            j = bisect.bisect_right(offsets, a) - 1
+            while a < b:
+                g0, g1 = gaps[j]
+                start = g0 + a - offsets[j]
+                stop = min(g1, g0 + b - offsets[j])
+                out.append((start, stop))
+                a += stop - start
+                j += 1
+        return IntervalSet(out)
+
+    def describe(self, base: int = 1, limit: int = 20) -> str:
+        """'1-3, 7' — номера с base (для сообщений пользователю), не больше limit интервалов."""
+        parts = [str(a + base) if b - a == 1 else f"{a + base}-{b - 1 + base}"
+                 for a, b in zip(self._starts[:limit], self._stops[:limit])]
+        if len(self._starts) > limit:
+            parts.append(f"... ещё интервалов: {len(self._starts) - limit}")
+        return ", ".join(parts)
+
+
+def parse_ranges(text: str, size: int, lookup: Callable[[str], Optional[int]] = lambda _: None) -> IntervalSet:
+    """
+    '1,3,5-7' (номера с 1) и ID задач (lookup: ID -> 0-based номер или None) -> 0-based
+    номера интервалами. Неверный ввод — ValueError.
+    """
+    ranges: List[Range] = []
+    for part in (p.strip() for p in text.split(",")):
+        if not part:
+            continue
+        slot = lookup(part)
+        if slot is not None:
+            ranges.append((slot, slot + 1))
+            continue
+        bounds = part.split("-", 1)
+        try:
+            a, b = (int(bounds[0]), int(bounds[1])) if len(bounds) == 2 else (int(part), int(part))
+        except ValueError:
+            raise ValueError(f"Неверный номер: '{part}'")
+        if min(a, b) <= 0 or max(a, b) > size:
+            raise ValueError(f"Номер за пределами: '{part}'")
+        ranges.append((min(a, b) - 1, max(a, b)))
+    return IntervalSet(ranges)
@@ -0,0 +1,347 @@
+"""
+Чтение и запись файлов задач (общие для CLI и GUI).
+Функции бросают исключения; сообщения пользователю показывает вызывающий код.
+
+Запись атомарная: данные пишутся во временный файл рядом и подменяют старый через
+os.replace, поэтому падение посреди записи не оставляет обрезанный файл.
+Сжатые файлы (.csv.gz, .jsonl.gz, .json.xz, .csv.bz2) читаются и пишутся прозрачно,
+по расширению, потоком — без сборки всего файла в памяти.
+
+Уровень надёжности (durability) определяет, когда делается fsync:
+- "none"     — не делается (защита только от падения процесса);
+- "batched"  — групповой fsync всех записанных файлов раз в SYNC_INTERVAL секунд
+               и при выходе, частые автосохранения не ждут диск;
+- "every-op" — fsync данных и каталога при каждой записи.
+"""
+import atexit
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import threading
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
+
+from todo_metrics import metrics
+
+DURABILITY_LEVELS = ("none", "batched", "every-op")
+SYNC_INTERVAL = 1.0
+
+# расширение сжатия -> open модуля сжатия (принимает и имя файла, и открытый файл)
+COMPRESSORS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+CSV_EXTS = (".csv",)
+JSON_EXTS = (".json", ".jsonl")
+# JSON-массив читается кусками такого размера (символов)
+JSON_CHUNK = 1 << 16
+_JSON_WS = re.compile(r"[ \t\r\n]*")
+
+
+def split_compression(filename: str) -> Tuple[str, str]:
+    """'tasks.csv.gz' -> ('tasks.csv', '.gz'); без сжатия — (filename, '')."""
+    root, ext = os.path.splitext(filename)
+    if ext.lower() in COMPRESSORS:
+        return root, ext.lower()
+    return filename, ""
+
+
+def data_ext(filename: str) -> str:
+    """Расширение данных без сжатия: 'tasks.json.xz' -> '.json'."""
+    return os.path.splitext(split_compression(filename)[0])[1].lower()
+
+
+def is_data_file(filename: str, exts: Sequence[str]) -> bool:
+    """Файл с одним из расширений данных, сжатый или нет."""
+    return data_ext(filename) in exts
+
+
+def with_ext(name: str, default: str) -> str:
+    """Имя файла от пользователя: без расширения дописывается default ('tasks' -> 'tasks.csv')."""
+    return name if data_ext(name) in CSV_EXTS + JSON_EXTS else name + default
+
+
+def list_data_files(exts: Sequence[str], directory: str = ".", exclude: Sequence[str] = ()) -> List[str]:
+    """Файлы данных в каталоге; exclude — окончания служебных файлов (журнал изменений)."""
+    files = [f for f in os.listdir(directory) if is_data_file(f, exts) and not f.endswith(tuple(exclude))]
+    files.sort(key=lambda s: s.lower())
+    return files
+
+
+def _text_writer(raw: IO[bytes], compression: str) -> TextIO:
+    if not compression:
+        return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    # закрытие обёртки завершает поток сжатия, но не закрывает raw
+    return COMPRESSORS[compression](raw, "wt", encoding="utf-8", newline="")
+
+
+def open_text(filename: str) -> TextIO:
+    """Открывает файл данных на чтение (с распаковкой по расширению)."""
+    compression = split_compression(filename)[1]
+    opener = COMPRESSORS.get(compression, open)
+    return opener(filename, "rt", encoding="utf-8", newline="")
+
+
+def file_state(filename: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Версия файла на диске: (mtime в нс, размер, inode) или None, если файла нет.
+    Атомарная запись всегда создаёт новый inode, так что версия меняется при каждой записи.
+    """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDWR if os.name == "nt" else os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path: str) -> None:
+    """fsync каталога, чтобы переименование пережило сбой питания (на Windows не нужно)."""
+    if os.name == "nt":
+        return
+    try:
+        _fsync_path(path or ".")
+    except OSError:
+        pass
+
+
+class SyncCommitter:
+    """
+    Групповой fsync: файлы, записанные за интервал, сбрасываются на диск одним проходом
+    в фоновом потоке. Несколько автосохранений одного файла дают один fsync.
+    """
+
+    def __init__(self, interval: float = SYNC_INTERVAL):
+        self.interval = interval
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def schedule(self, filename: str) -> None:
+        with self._lock:
+            self._pending.add(os.path.abspath(filename))
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """Сбросить на диск всё отложенное. Возвращает число файлов."""
+        with self._lock:
+            paths, self._pending = self._pending, set()
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        if not paths:
+            return 0
+        with metrics.timer("io.fsync_batch"):
+            for path in paths:
+                try:
+                    _fsync_path(path)
+                except OSError:
+                    pass  # файл успели удалить
+            for d in {os.path.dirname(p) for p in paths}:
+                fsync_dir(d)
+        metrics.incr("io.fsync_batched_files", len(paths))
+        return len(paths)
+
+
+committer = SyncCommitter()
+atexit.register(committer.flush)
+
+
+def atomic_write(filename: str, write: Callable[[TextIO], None], durability: str = "batched") -> None:
+    """Записать файл через временный файл и os.replace с заданным уровнем надёжности."""
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Неизвестный уровень надёжности: {durability}")
+    directory, base = os.path.split(filename)
+    tmp = os.path.join(directory, f".{base}.{os.getpid()}.tmp")
+    compression = split_compression(filename)[1]
+    with metrics.timer(f"io.write.{durability}"):
+        try:
+            with open(tmp, "wb") as raw:
+                f = _text_writer(raw, compression)
+                write(f)
+                f.flush()
+                if compression:
+                    f.close()
+                else:
+                    f.detach()
+                if durability == "every-op":
+                    raw.flush()
+                    with metrics.timer("io.fsync"):
+                        os.fsync(raw.fileno())
+            os.replace(tmp, filename)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        if durability == "every-op":
+            fsync_dir(directory)
+    if durability == "batched":
+        committer.schedule(filename)
+
+
+def read_csv(filename: str) -> Tuple[List[str], List[List[str]]]:
+    """Заголовки и строки CSV-файла."""
+    with open_text(filename) as f:
+        reader = csv.reader(f)
+        headers = next(reader, None) or []
+        rows = [row for row in reader]
+    return headers, rows
+
+
+def write_csv(filename: str, headers: Sequence[str], rows: Iterable[Sequence[str]],
+              durability: str = "batched") -> None:
+    def write(f: TextIO) -> None:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+    atomic_write(filename, write, durability)
+
+
+def iter_json_array(f: TextIO, chunk_size: int = JSON_CHUNK) -> Iterator[object]:
+    """
+    Элементы JSON-массива по одному: файл читается кусками, каждый элемент разбирается
+    JSONDecoder.raw_decode, так что весь массив в памяти не собирается. Ошибка — ValueError.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more() -> bool:
+        # недоразобранный хвост + следующий кусок; куски растут, если элемент в них не помещается
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        data = f.read(max(chunk_size, len(buf) - pos))
+        eof = not data
+        buf = buf[pos:] + data
+        pos = 0
+        return not eof
+
+    def next_char() -> str:
+        # первый непробельный символ (без сдвига) или "" в конце файла
+        nonlocal pos
+        while True:
+            pos = _JSON_WS.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not more():
+                return ""
+
+    if next_char() != "[":
+        raise json.JSONDecodeError("Ожидается JSON-массив", buf, pos)
+    pos += 1
+
+    def finish() -> None:
+        # после ']' — только пробелы, как у json.load
+        nonlocal pos
+        pos += 1
+        if next_char():
+            raise json.JSONDecodeError("Лишние данные после JSON-массива", buf, pos)
+
+    if next_char() == "]":
+        finish()
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if more():
+                    continue
+                raise
+            # элемент закончен, только если за ним (после пробелов) идёт ',' или ']':
+            # число в конце куска ("1." из "1.5") может продолжаться в следующем
+            stop = _JSON_WS.match(buf, end).end()
+            if (stop == len(buf) or buf[stop] not in ",]") and more():
+                continue
+            break
+        pos = end
+        yield item
+        c = next_char()
+        if c == "]":
+            finish()
+            return
+        if c != ",":
+            raise json.JSONDecodeError("Ожидается ',' или ']'", buf, pos)
+        pos += 1
+
+
+def read_json(filename: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Заголовки (ключи первой записи, затем новые) и строки JSON-файла: массив объектов
+    (.json, разбирается по элементу) или объект на строку (.jsonl, читается построчно).
+    """
+    with open_text(filename) as f:
+        if data_ext(filename) == ".jsonl":
+            items: Iterable[Dict[str, object]] = (json.loads(line) for line in f if line.strip())
+        else:
+            items = iter_json_array(f)
+        headers: List[str] = []
+        seen = set()
+        data = []
+        for item in items:
+            for k in item:
+                if k not in seen:
+                    seen.add(k)
+                    headers.append(k)
+            data.append(item)
+    return headers, [["" if item.get(h) is None else str(item.get(h)) for h in headers] for item in data]
+
+
+def iter_records(filename: str) -> Iterator[Dict[str, str]]:
+    """
+    Записи файла данных по одной как {заголовок: значение}: CSV, JSON Lines и JSON-массив
+    читаются потоком.
+    """
+    with open_text(filename) as f:
+        ext = data_ext(filename)
+        if ext in JSON_EXTS:
+            items: Iterable[Dict[str, object]] = (
+                (json.loads(line) for line in f if line.strip()) if ext == ".jsonl" else iter_json_array(f)
+            )
+            for item in items:
+                yield {k: "" if v is None else str(v) for k, v in item.items()}
+        else:
+            reader = csv.reader(f)
+            headers = next(reader, None) or []
+            for row in reader:
+                yield dict(zip(headers, row))
+
+
+def _json_lines(headers: Sequence[str], rows: Iterable[Sequence[str]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), ensure_ascii=False)
+
+
+def write_json(filename: str, headers: Sequence[str], rows: Iterable[Sequence[str]],
+               durability: str = "batched") -> None:
+    """JSON-массив (объект на строку, без отступов) или .jsonl — пишется потоком."""
+    jsonl = data_ext(filename) == ".jsonl"
+
+    def write(f: TextIO) -> None:
+        if jsonl:
+            for line in _json_lines(headers, rows):
+                f.write(line + "\n")
+            return
+        f.write("[")
+        for n, line in enumerate(_json_lines(headers, rows)):
+            f.write(("\n" if n == 0 else ",\n") + line)
+        f.write("\n]\n")
+
+    atomic_write(filename, write, durability)
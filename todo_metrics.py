@@ -0,0 +1,78 @@
+"""
+Простые метрики процесса: счётчики и время операций.
+Используются, чтобы видеть реальную стоимость записи на диск, загрузки и т.п.
+"""
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List
+
+# сколько последних замеров хранить для перцентилей
+SAMPLES = 1000
+
+
+class Timing:
+    """Число вызовов, суммарное и максимальное время, последние замеры."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        data = sorted(self.samples)
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.timings: Dict[str, Timing] = {}
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def observe(self, name: str, seconds: float) -> None:
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = Timing()
+        timing.add(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def summary(self) -> List[Dict[str, object]]:
+        """Строки для вывода: время в миллисекундах, для счётчиков — только count."""
+        out = []
+        for name in sorted(self.timings):
+            t = self.timings[name]
+            out.append({
+                "name": name,
+                "count": t.count,
+                "total_ms": round(t.total * 1000, 2),
+                "p50_ms": round(t.percentile(0.5) * 1000, 2),
+                "p95_ms": round(t.percentile(0.95) * 1000, 2),
+                "max_ms": round(t.max * 1000, 2),
+            })
+        for name in sorted(self.counters):
+            out.append({"name": name, "count": self.counters[name]})
+        return out
+
+
+# общий экземпляр для всего процесса
+metrics = Metrics()
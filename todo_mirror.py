@@ -0,0 +1,292 @@
+"""
+Зеркало таблицы в общем каталоге: разделы в CSV и JSON Lines + manifest.json с контрольными суммами.
+- Строка попадает в раздел по хэшу своего ID (crc32 % число разделов), поэтому вставка,
+  правка или удаление строки меняют только её раздел, остальные файлы не трогаются.
+- MirrorSync следит за изменениями таблицы (TableListener) и при sync() переписывает
+  только изменённые разделы: время синхронизации зависит от числа правок, а не от размера таблицы.
+- В имени файла раздела — его контрольная сумма (part-0007.3fa1c2d4e5b6.csv). Файлы не
+  перезаписываются на месте: новые пишутся рядом, manifest.json подменяется атомарно
+  последним, старые файлы удаляются после него. По манифесту читатель всегда видит целый снимок.
+- Прерванная синхронизация продолжается следующим sync(): уже записанные файлы находятся
+  по имени и повторно не пишутся. Если изменения с прошлой синхронизации неизвестны (новый
+  процесс, смена столбцов, зеркало обновил другой процесс), разделы сравниваются с манифестом
+  по контрольным суммам — записываются всё равно только отличающиеся.
+"""
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set
+
+from todo_intervals import IntervalSet
+from todo_io import atomic_write, committer
+from todo_metrics import metrics
+from todo_shared import FileLock
+from todo_store import TableListener, TaskTable
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+PART_PREFIX = "part-"
+# форматы файлов раздела (расширения)
+FORMATS = ("csv", "jsonl")
+# строк на раздел в среднем; при росте или уменьшении таблицы вчетверо разделы делятся заново
+PARTITION_ROWS = 2000
+# сколько символов контрольной суммы в имени файла
+NAME_DIGEST = 12
+
+
+class SyncResult(NamedTuple):
+    written: int  # разделов записано
+    unchanged: int  # разделов проверено и совпало с манифестом
+    removed: int  # старых файлов удалено
+    full: bool  # сравнивались все разделы, а не только изменённые
+
+
+def partition_count(rows: int) -> int:
+    """Степень двойки: в среднем не больше PARTITION_ROWS строк на раздел."""
+    n = 1
+    while n * PARTITION_ROWS < rows:
+        n *= 2
+    return n
+
+
+def partition_of(task_id: str, count: int) -> int:
+    return zlib.crc32(task_id.encode("utf-8")) % count
+
+
+def render(fmt: str, headers: Sequence[str], rows: Sequence[Sequence[str]]) -> str:
+    """Содержимое файла раздела: CSV с заголовками или объект на строку."""
+    if fmt == "csv":
+        buf = io.StringIO(newline="")
+        writer = csv.writer(buf)
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return buf.getvalue()
+    return "".join(json.dumps(dict(zip(headers, row)), ensure_ascii=False) + "\n" for row in rows)
+
+
+def checksum(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(directory: str) -> Optional[dict]:
+    """Манифест зеркала или None (нет зеркала, файл повреждён, другая версия)."""
+    try:
+        with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def verify_mirror(directory: str) -> List[str]:
+    """Проверка файлов зеркала по манифесту (читает все файлы). Пустой список — всё сходится."""
+    manifest = load_manifest(directory)
+    if manifest is None:
+        return [f"Нет {MANIFEST} в {directory}"]
+    problems = []
+    for part in manifest["parts"].values():
+        for info in part["files"].values():
+            path = os.path.join(directory, info["name"])
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                problems.append(f"{info['name']}: файла нет")
+                continue
+            if len(data) != info["bytes"] or hashlib.sha256(data).hexdigest() != info["sha256"]:
+                problems.append(f"{info['name']}: не совпадает контрольная сумма")
+    return problems
+
+
+class MirrorSync(TableListener):
+    """Изменённые с прошлой синхронизации разделы и их запись в каталог зеркала."""
+
+    def __init__(self, table: TaskTable, directory: str, formats: Sequence[str] = FORMATS,
+                 durability: str = "batched"):
+        if not table.id_column:
+            raise ValueError("Зеркало делится на разделы по ID: нужна таблица со столбцом ID")
+        self.table = table
+        self.directory = directory
+        self.formats = tuple(formats)
+        self.durability = durability
+        self.count = 0  # число разделов (выбирается при синхронизации)
+        # раздел -> {ID: сколько строк с этим ID}; None — не построено (изменения неизвестны)
+        self._members: Optional[Dict[int, Dict[str, int]]] = None
+        self._dirty: Set[int] = set()
+        self._full = True
+        self._generation = None  # номер манифеста после нашей синхронизации
+        table.add_listener(self)
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self._members = None
+        self._dirty.clear()
+
+    def on_columns(self, table: TaskTable) -> None:
+        # заголовки есть в каждом файле: меняются все разделы
+        self._full = True
+
+    def _touch(self, task_id: str, delta: int) -> None:
+        p = partition_of(task_id, self.count)
+        ids = self._members.setdefault(p, {})
+        n = ids.get(task_id, 0) + delta
+        if n > 0:
+            ids[task_id] = n
+        else:
+            ids.pop(task_id, None)
+        self._dirty.add(p)
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if self._members is None:
+            return
+        ci = table.headers.index(table.id_column)
+        for row in table.rows[start:start + count]:
+            self._touch(row[ci], 1)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        if self._members is not None:
+            self._dirty.add(partition_of(table.id_of(idx), self.count))
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        if self._members is None:
+            return
+        ci = table.headers.index(table.id_column)
+        for row in old_rows:
+            self._touch(row[ci], -1)
+
+    # -------------------- разделы --------------------
+    def _index(self) -> Dict[int, List[List[str]]]:
+        """Все строки по разделам (один проход), заодно строится состав разделов."""
+        ci = self.table.headers.index(self.table.id_column)
+        groups: Dict[int, List[List[str]]] = {}
+        members: Dict[int, Dict[str, int]] = {}
+        for row in self.table.rows:
+            p = partition_of(row[ci], self.count)
+            groups.setdefault(p, []).append(row)
+            ids = members.setdefault(p, {})
+            ids[row[ci]] = ids.get(row[ci], 0) + 1
+        self._members = members
+        return groups
+
+    def _rows_of(self, p: int) -> List[List[str]]:
+        """Строки раздела в порядке таблицы — по ID, без просмотра таблицы."""
+        ids = self._members.get(p, {})
+        if any(n > 1 for n in ids.values()):
+            # один ID у нескольких строк (конфликт правок): такой раздел собирается проходом
+            ci = self.table.headers.index(self.table.id_column)
+            return [r for r in self.table.rows if r[ci] in ids]
+        slots = sorted(self.table.slot(task_id) for task_id in ids)
+        return [self.table.rows[i] for i in slots]
+
+    def _choose_count(self, manifest: dict) -> int:
+        want = partition_count(len(self.table.rows))
+        have = manifest.get("partitions") or 0
+        if have and want // 4 <= have <= want * 4:
+            return have  # разделы делятся заново только при большом изменении размера
+        return want
+
+    # -------------------- синхронизация --------------------
+    def pending(self) -> Optional[int]:
+        """Сколько разделов ждёт записи; None — неизвестно (будет сравнение всех)."""
+        return None if self._full or self._members is None else len(self._dirty)
+
+    def sync(self) -> SyncResult:
+        """Записать изменения в зеркало. Ошибка (OSError, TimeoutError) — следующий вызов продолжит."""
+        os.makedirs(self.directory, exist_ok=True)
+        with FileLock(os.path.join(self.directory, MANIFEST)):
+            with metrics.timer("mirror.sync"):
+                return self._sync()
+
+    def _sync(self) -> SyncResult:
+        manifest = load_manifest(self.directory) or {}
+        headers = list(self.table.headers)
+        count = self._choose_count(manifest)
+        full = (self._full or self._members is None or count != self.count
+                or manifest.get("generation") != self._generation
+                or manifest.get("headers") != headers or manifest.get("formats") != list(self.formats))
+        old_parts: Dict[str, dict] = manifest.get("parts", {}) if manifest.get("partitions") == count else {}
+        if full:
+            self.count = count
+            groups = self._index()
+            todo = range(count)
+            parts: Dict[str, dict] = {}
+        else:
+            groups = {}
+            todo = sorted(self._dirty)
+            parts = dict(old_parts)
+        written = unchanged = 0
+        for p in todo:
+            rows = groups.get(p, []) if full else self._rows_of(p)
+            name = f"{p:04d}"
+            if not rows:
+                parts.pop(name, None)
+                continue
+            # сумма раздела — по первому формату; остальные форматы строятся, только если раздел изменился
+            first = render(self.formats[0], headers, rows)
+            digest = checksum(first)
+            old = old_parts.get(name)
+            if old is not None and old["digest"] == digest:
+                parts[name] = old
+                unchanged += 1
+                continue
+            texts = {fmt: first if fmt == self.formats[0] else render(fmt, headers, rows) for fmt in self.formats}
+            parts[name] = {"rows": len(rows), "digest": digest, "files": self._write(name, digest, texts)}
+            written += 1
+        if (parts != manifest.get("parts") or manifest.get("headers") != headers
+                or manifest.get("partitions") != count or manifest.get("formats") != list(self.formats)):
+            self._write_manifest(manifest, headers, count, parts)
+        else:
+            self._generation = manifest.get("generation")  # зеркало уже совпадает с таблицей
+        removed = self._remove_unused(parts)
+        metrics.incr("mirror.parts_written", written)
+        self._dirty.clear()
+        self._full = False
+        return SyncResult(written, unchanged, removed, full)
+
+    def _write(self, name: str, digest: str, texts: Dict[str, str]) -> Dict[str, dict]:
+        files = {}
+        for fmt, text in texts.items():
+            fname = f"{PART_PREFIX}{name}.{digest[:NAME_DIGEST]}.{fmt}"
+            path = os.path.join(self.directory, fname)
+            # файл с таким именем уже записан прерванной синхронизацией: содержимое то же
+            if not os.path.exists(path):
+                atomic_write(path, lambda f, text=text: f.write(text), self.durability)
+            files[fmt] = {"name": fname, "sha256": checksum(text), "bytes": len(text.encode("utf-8"))}
+        return files
+
+    def _write_manifest(self, manifest: dict, headers: List[str], count: int, parts: Dict[str, dict]) -> None:
+        # файлы разделов — на диск раньше манифеста, который на них ссылается
+        committer.flush()
+        generation = (manifest.get("generation") or 0) + 1
+        data = {
+            "version": MANIFEST_VERSION,
+            "generation": generation,
+            "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+            "headers": headers,
+            "formats": list(self.formats),
+            "partitions": count,
+            "rows": sum(part["rows"] for part in parts.values()),
+            "parts": dict(sorted(parts.items())),
+        }
+        atomic_write(os.path.join(self.directory, MANIFEST),
+                     lambda f: json.dump(data, f, ensure_ascii=False, indent=1), "every-op")
+        self._generation = generation
+
+    def _remove_unused(self, parts: Dict[str, dict]) -> int:
+        """Удалить файлы разделов, на которые манифест больше не ссылается (и недописанные временные)."""
+        used = {info["name"] for part in parts.values() for info in part["files"].values()}
+        removed = 0
+        for fname in os.listdir(self.directory):
+            if fname.lstrip(".").startswith(PART_PREFIX) and fname not in used:
+                try:
+                    os.remove(os.path.join(self.directory, fname))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
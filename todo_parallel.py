@@ -0,0 +1,169 @@
+"""
+Параллельное чтение больших CSV-файлов задач на нескольких ядрах.
+- Файл делится на диапазоны байт по границам записей: граница ставится после перевода
+  строки, перед которым чётное число кавычек, то есть не внутри поля в кавычках
+  (многострочные комментарии не разрываются). Число кавычек в каждом блоке считают
+  сами процессы пула, основной процесс только складывает чётности.
+- Диапазоны разбираются csv.reader в пуле процессов (вместе с нормализацией времени
+  HH:MM), строки собираются в исходном порядке. Процесс возвращает значения одной
+  строкой через разделитель, а не списком списков: передать и разрезать её в основном
+  процессе в несколько раз дешевле, чем распаковывать миллионы мелких объектов.
+- Разбор строгий: неудачная граница или нестандартный CSV дают ошибку, и файл читается
+  обычным read_csv, так что результат всегда совпадает с последовательным чтением.
+- Маленькие и сжатые файлы читаются последовательно: пул там только мешает.
+"""
+import csv
+import gc
+import io
+import os
+from array import array
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from itertools import chain
+from typing import List, Optional, Tuple, Union
+
+from todo_io import open_text, read_csv, split_compression
+from todo_metrics import metrics
+from todo_schema import format_time, parse_time
+
+# файлы меньше этого размера читаются последовательно
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+# примерный размер диапазона на один процесс
+CHUNK_BYTES = 16 * 1024 * 1024
+
+# разделитель значений при передаче строк из процесса пула
+_SEP = "\x00"
+
+Rows = List[List[str]]
+# (число строк, ширина строки или 0, длины строк разной ширины, значения через _SEP)
+Packed = Tuple[int, int, Optional[array], str]
+
+
+def normalize_time(value: str) -> str:
+    """'9:5' -> '09:05', как check_time_format; неверное значение остаётся как есть."""
+    minutes = parse_time(value)
+    return value if minutes is None else format_time(minutes)
+
+
+def _normalize(rows: Rows, time_ci: Optional[int]) -> Rows:
+    if time_ci is not None:
+        for row in rows:
+            if time_ci < len(row):
+                row[time_ci] = normalize_time(row[time_ci])
+    return rows
+
+
+def _read_range(filename: str, start: int, stop: int) -> bytes:
+    with open(filename, "rb") as f:
+        f.seek(start)
+        return f.read(stop - start)
+
+
+def _scan(filename: str, start: int, stop: int) -> Tuple[int, Optional[int], Optional[int]]:
+    """
+    Блок [start, stop): (число кавычек, конец первой строки после чётного числа кавычек
+    от начала блока, то же после нечётного). Концы — абсолютные смещения или None.
+    """
+    data = _read_range(filename, start, stop)
+    ends: List[Optional[int]] = [None, None]
+    quotes = 0
+    pos = 0
+    while ends[0] is None or ends[1] is None:
+        nl = data.find(b"\n", pos)
+        if nl < 0:
+            break
+        quotes += data.count(b'"', pos, nl)
+        if ends[quotes % 2] is None:
+            ends[quotes % 2] = start + nl + 1
+        pos = nl + 1
+    return data.count(b'"'), ends[0], ends[1]
+
+
+def _pack(rows: Rows) -> Packed:
+    lengths = array("I", map(len, rows))
+    width = lengths[0] if lengths and lengths.count(lengths[0]) == len(lengths) else 0
+    return len(rows), width, None if width else lengths, _SEP.join(chain.from_iterable(rows))
+
+
+def _unpack(part: Union[Rows, Packed]) -> Rows:
+    if isinstance(part, list):
+        return part
+    count, width, lengths, joined = part
+    if not count:
+        return []
+    values = joined.split(_SEP) if (width or sum(lengths)) else []
+    if width:
+        return [values[i:i + width] for i in range(0, len(values), width)]
+    rows = []
+    pos = 0
+    for n in lengths:
+        rows.append(values[pos:pos + n])
+        pos += n
+    return rows
+
+
+def _parse(filename: str, start: int, stop: int, skip_header: bool,
+           time_ci: Optional[int]) -> Union[Rows, Packed]:
+    """Разбор диапазона; запись, не закрытая к концу диапазона, — csv.Error."""
+    text = _read_range(filename, start, stop).decode("utf-8")
+    reader = csv.reader(io.StringIO(text, newline=""), strict=True)
+    if skip_header:
+        next(reader, None)
+    rows = _normalize(list(reader), time_ci)
+    # разделитель встретился в данных — передаём как есть
+    return rows if _SEP in text else _pack(rows)
+
+
+def _boundaries(pool: ProcessPoolExecutor, filename: str, size: int, chunks: int) -> List[int]:
+    """Смещения начала диапазонов (первое — 0, последнее — размер файла)."""
+    step = -(-size // chunks)
+    starts = list(range(0, size, step))
+    scans = list(pool.map(_scan, [filename] * len(starts), starts, [min(s + step, size) for s in starts]))
+    bounds = [0]
+    parity = 0
+    for i, (quotes, even_end, odd_end) in enumerate(scans):
+        # перевод строки вне кавычек: общее число кавычек до него от начала файла чётное
+        end = odd_end if parity else even_end
+        if i and end is not None and end < size:
+            bounds.append(end)
+        parity = (parity + quotes) % 2
+    bounds.append(size)
+    return bounds
+
+
+def read_csv_parallel(filename: str, time_column: Optional[str] = None,
+                      workers: Optional[int] = None) -> Tuple[List[str], Rows]:
+    """
+    Заголовки и строки CSV-файла, как read_csv, но большие файлы разбираются в пуле процессов.
+    Значения столбца time_column нормализуются в HH:MM.
+    """
+    size = os.path.getsize(filename)
+    workers = workers or os.cpu_count() or 1
+    if size < PARALLEL_MIN_BYTES or workers < 2 or split_compression(filename)[1]:
+        headers, rows = read_csv(filename)
+        time_ci = headers.index(time_column) if time_column in headers else None
+        return headers, _normalize(rows, time_ci)
+    with open_text(filename) as f:
+        headers = next(csv.reader(f), None) or []
+    time_ci = headers.index(time_column) if time_column in headers else None
+    chunks = max(workers, size // CHUNK_BYTES)
+    try:
+        with metrics.timer("csv.read_parallel"), ProcessPoolExecutor(workers) as pool:
+            bounds = _boundaries(pool, filename, size, chunks)
+            starts, stops = bounds[:-1], bounds[1:]
+            parts = pool.map(_parse, [filename] * len(starts), starts, stops,
+                             [s == 0 for s in starts], [time_ci] * len(starts))
+            rows: Rows = []
+            # сборка создаёт миллионы объектов без циклических ссылок — сборщик мусора только мешает
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for part in parts:
+                    rows.extend(_unpack(part))
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        return headers, rows
+    except (csv.Error, ValueError, OSError, BrokenExecutor):
+        metrics.incr("csv.read_parallel.fallback")
+        headers, rows = read_csv(filename)
+        return headers, _normalize(rows, time_ci)
@@ -0,0 +1,394 @@
+"""
+Язык фильтров для поиска задач.
+
+Примеры:
+    deploy                                   — подстрока в любой ячейке (как раньше)
+    time >= 09:00 and time < 12:00
+    Comments contains "deploy" and Priority > 2
+    not (Status = done) or "TODO list" startswith Купить
+
+Запрос разбирается и компилируется один раз в план: сравнения по времени и
+поиск слов используют индексы (todo_index), остальное — проход по
+типизированным массивам столбца.
+"""
+import operator
+import re
+from itertools import compress, repeat
+from typing import Callable, List, Optional, Set
+
+from todo_index import IndexSet
+from todo_schema import TypedColumns
+from todo_store import TaskTable
+
+
+class QueryError(ValueError):
+    pass
+
+
+_TOKEN_RE = re.compile(r'\s*(?:(?P<str>"(?:[^"\\]|\\.)*")|(?P<op><=|>=|!=|==|=|<|>|~)|(?P<paren>[()])|(?P<word>[^\s()<>=!~"]+))')
+
+_KEYWORDS = {"and", "or", "not", "contains", "startswith"}
+_CMP_OPS = {"=", "==", "!=", "<", "<=", ">", ">=", "~", "contains", "startswith"}
+
+_PY_OPS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _tokenize(text: str) -> List[tuple]:
+    pos = 0
+    out = []
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise QueryError(f"Непонятный символ в запросе: '{text[pos:].strip()[:10]}'")
+        pos = m.end()
+        if m.group("str") is not None:
+            out.append(("str", m.group("str")[1:-1].replace('\\"', '"')))
+        elif m.group("op") is not None:
+            out.append(("op", m.group("op")))
+        elif m.group("paren") is not None:
+            out.append(("paren", m.group("paren")))
+        else:
+            w = m.group("word")
+            if w.lower() in _KEYWORDS:
+                out.append(("kw", w.lower()))
+            else:
+                out.append(("word", w))
+    return out
+
+
+def _norm_col(name: str) -> str:
+    name = re.sub(r"\[[^\]]*\]\s*$", "", name)
+    return name.strip().rstrip(":").strip().lower()
+
+
+# -------------------- узлы плана --------------------
+class Node:
+    def run(self, q: "CompiledQuery", universe: Optional[Set[int]]) -> Set[int]:
+        """Множество подходящих строк; universe — уже отобранные кандидаты (или None = все)."""
+        raise NotImplementedError
+
+    def explain(self) -> str:
+        raise NotImplementedError
+
+
+class AnyText(Node):
+    """Подстрока в любой ячейке (поведение старого поиска)."""
+
+    def __init__(self, needle: str):
+        self.needle = needle.lower()
+
+    def run(self, q, universe):
+        rows = q.table.rows
+        n = self.needle
+        ids = range(len(rows)) if universe is None else universe
+        return {i for i in ids if any(n in c.lower() for c in rows[i])}
+
+    def explain(self):
+        return f"scan(*) contains '{self.needle}'"
+
+
+class Compare(Node):
+    def __init__(self, header: str, op: str, raw: str, value, test: Callable):
+        self.header = header
+        self.op = op
+        self.raw = raw
+        self.value = value
+        self.test = test  # test(i) -> bool
+        self.index_kind = None
+
+    def run(self, q, universe):
+        if universe is None:
+            return q.scan(self)
+        return {i for i in universe if self.test(i)}
+
+    def estimate(self, q) -> Optional[Set[int]]:
+        """Кандидаты по индексу или None, если индекс неприменим."""
+        return q.from_index(self)
+
+    def explain(self):
+        how = f"index:{self.index_kind}" if self.index_kind else "scan"
+        return f"{how}({self.header} {self.op} {self.raw!r})"
+
+
+class And(Node):
+    def __init__(self, parts: List[Node]):
+        self.parts = parts
+
+    def run(self, q, universe):
+        # сначала сравнения, для которых есть индекс: самое узкое множество — кандидаты
+        indexed = []
+        rest = []
+        for p in self.parts:
+            cand = p.estimate(q) if isinstance(p, Compare) else None
+            if cand is not None:
+                indexed.append((len(cand), p, cand))
+            else:
+                rest.append(p)
+        indexed.sort(key=lambda t: t[0])
+        res = universe
+        for _, p, cand in indexed:
+            res = cand if res is None else (res & cand)
+            if p.index_kind == "text":
+                # индекс слов даёт надмножество — уточняем точной проверкой
+                res = {i for i in res if p.test(i)}
+            if not res:
+                return set()
+        for p in rest:
+            res = p.run(q, res)
+            if not res:
+                return set()
+        return res if res is not None else set(range(len(q.table.rows)))
+
+    def explain(self):
+        return "(" + " and ".join(p.explain() for p in self.parts) + ")"
+
+
+class Or(Node):
+    def __init__(self, parts: List[Node]):
+        self.parts = parts
+
+    def run(self, q, universe):
+        res: Set[int] = set()
+        for p in self.parts:
+            res |= And([p]).run(q, universe)
+        return res
+
+    def explain(self):
+        return "(" + " or ".join(p.explain() for p in self.parts) + ")"
+
+
+class Not(Node):
+    def __init__(self, part: Node):
+        self.part = part
+
+    def run(self, q, universe):
+        base = set(range(len(q.table.rows))) if universe is None else set(universe)
+        return base - And([self.part]).run(q, universe)
+
+    def explain(self):
+        return f"not {self.part.explain()}"
+
+
+# -------------------- компиляция --------------------
+def _conjuncts(node: Node) -> List[Node]:
+    return list(node.parts) if isinstance(node, And) else [node]
+
+
+def _implies(a: Node, b: Node) -> bool:
+    """Условие a строже условия b (для поиска подстрок: needle b содержится в needle a)."""
+    if isinstance(a, AnyText) and isinstance(b, AnyText):
+        return b.needle in a.needle
+    if isinstance(a, Compare) and isinstance(b, Compare) and a.header == b.header:
+        if a.op in ("contains", "~") and b.op in ("contains", "~"):
+            return b.value in a.value
+        if a.op == "startswith" and b.op == "startswith":
+            return a.value.startswith(b.value)
+        if a.op == b.op and a.raw == b.raw:
+            return True
+    return False
+
+
+class CompiledQuery:
+    """Скомпилированный запрос, привязанный к таблице и её индексам."""
+
+    def __init__(self, engine: "QueryEngine", text: str, root: Node):
+        self.engine = engine
+        self.table = engine.table
+        self.typed = engine.typed
+        self.text = text
+        self.root = root
+        self.version = engine.table.version
+
+    def run(self, universe: Optional[Set[int]] = None) -> List[int]:
+        """
+        Номера подходящих строк (0-based) в порядке хранения.
+        universe — проверять только эти строки (например, результат предыдущего запроса).
+        """
+        if self.version != self.table.version:
+            # таблица изменилась: план ссылается на старые массивы, перекомпилируем
+            self.root = self.engine.compile(self.text).root
+            self.version = self.table.version
+        return sorted(self.root.run(self, universe))
+
+    def refines(self, previous: "CompiledQuery") -> bool:
+        """
+        True, если результат этого запроса — подмножество результата previous
+        (строку поиска дописали). Тогда можно искать только среди его строк.
+        """
+        mine = _conjuncts(self.root)
+        return all(any(_implies(a, b) for a in mine) for b in _conjuncts(previous.root))
+
+    def explain(self) -> str:
+        return self.root.explain()
+
+    # --- доступ к индексам / сканирование ---
+    def from_index(self, node: Compare) -> Optional[Set[int]]:
+        ctype = self.typed.column(node.header).ctype
+        if ctype.name == "time" and node.op in ("=", "==", "<", "<=", ">", ">="):
+            idx = self.engine.indexes.time_index(node.header)
+            v = node.value
+            node.index_kind = "time"
+            if node.op in ("=", "=="):
+                return idx.range(v, v, True, True)
+            if node.op == "<":
+                return idx.range(None, v, True, False)
+            if node.op == "<=":
+                return idx.range(None, v, True, True)
+            if node.op == ">":
+                return idx.range(v, None, False, True)
+            return idx.range(v, None, True, True)
+        if ctype.name in ("text", "enum") and node.op in ("contains", "~"):
+            cand = self.engine.indexes.text_index(node.header).candidates(node.value)
+            if cand is not None:
+                node.index_kind = "text"
+            return cand
+        return None
+
+    def scan(self, node: Compare) -> Set[int]:
+        """Проход по массиву столбца целиком (без построчного разбора строк)."""
+        col = self.typed.column(node.header)
+        ct = col.ctype
+        vals = col.values
+        if ct.name != "text" and node.op in _PY_OPS:
+            hits = compress(range(len(vals)), map(_PY_OPS[node.op], vals, repeat(node.value)))
+            return {i for i in hits if not ct.is_null(vals[i])}
+        return {i for i in range(len(vals)) if node.test(i)}
+
+
+class QueryEngine:
+    """Компилятор запросов; держит индексы таблицы."""
+
+    def __init__(self, table: TaskTable, typed: TypedColumns):
+        self.table = table
+        self.typed = typed
+        self.indexes = IndexSet(table, typed)
+
+    def resolve_column(self, name: str) -> str:
+        want = _norm_col(name)
+        headers = self.table.headers
+        exact = [h for h in headers if _norm_col(h) == want]
+        if exact:
+            return exact[0]
+        prefix = [h for h in headers if _norm_col(h).startswith(want)]
+        if len(prefix) == 1:
+            return prefix[0]
+        if not prefix:
+            raise QueryError(f"Нет столбца '{name}'")
+        raise QueryError(f"Неоднозначное имя столбца '{name}': {', '.join(prefix)}")
+
+    def compile(self, text: str) -> CompiledQuery:
+        tokens = _tokenize(text)
+        if not tokens:
+            raise QueryError("Пустой запрос")
+        parser = _Parser(self, tokens)
+        root = parser.parse_or()
+        if parser.pos != len(tokens):
+            raise QueryError(f"Лишний фрагмент в запросе: '{tokens[parser.pos][1]}'")
+        return CompiledQuery(self, text, root)
+
+    def find(self, text: str) -> List[int]:
+        return self.compile(text).run()
+
+    def make_compare(self, column: str, op: str, raw: str) -> Compare:
+        header = self.resolve_column(column)
+        col = self.typed.column(header)
+        ct = col.ctype
+        ci = self.table.headers.index(header)
+        rows = self.table.rows
+        vals = col.values
+        if op in ("contains", "~", "startswith"):
+            needle = raw.lower()
+            if op == "startswith":
+                return Compare(header, op, raw, needle, lambda i: rows[i][ci].lower().startswith(needle))
+            return Compare(header, op, raw, needle, lambda i: needle in rows[i][ci].lower())
+        if ct.name == "text":
+            needle = raw.lower()
+            pyop = _PY_OPS[op]
+            return Compare(header, op, raw, needle, lambda i: pyop(vals[i].lower(), needle))
+        if ct.name == "enum":
+            if raw not in ct.choices:
+                if op not in ("=", "==", "!="):
+                    # порядок задан только для значений из списка
+                    raise QueryError(f"Значения '{raw}' нет в списке столбца '{header}' ({ct.spec})")
+                # неизвестное значение: = никогда, != всегда (кроме пустых)
+                const = op == "!="
+                return Compare(header, op, raw, None, lambda i: const and not ct.is_null(vals[i]))
+            value = ct.choices.index(raw)
+        else:
+            value = ct.parse(raw)
+            if value is None:
+                raise QueryError(f"Значение '{raw}' не подходит под тип столбца '{header}' ({ct.spec})")
+        pyop = _PY_OPS[op]
+        return Compare(header, op, raw, value, lambda i: not ct.is_null(vals[i]) and pyop(vals[i], value))
+
+
+class _Parser:
+    def __init__(self, engine: QueryEngine, tokens: List[tuple]):
+        self.engine = engine
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset: int = 0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def take(self):
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def parse_or(self) -> Node:
+        parts = [self.parse_and()]
+        while self.peek() == ("kw", "or"):
+            self.take()
+            parts.append(self.parse_and())
+        return parts[0] if len(parts) == 1 else Or(parts)
+
+    def parse_and(self) -> Node:
+        parts = [self.parse_not()]
+        while True:
+            kind, val = self.peek()
+            if (kind, val) == ("kw", "and"):
+                self.take()
+                parts.append(self.parse_not())
+            elif kind in ("word", "str", "paren") and val != ")" or (kind, val) == ("kw", "not"):
+                # несколько слов подряд — неявное "and"
+                parts.append(self.parse_not())
+            else:
+                break
+        return parts[0] if len(parts) == 1 else And(parts)
+
+    def parse_not(self) -> Node:
+        if self.peek() == ("kw", "not"):
+            self.take()
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        kind, val = self.take()
+        if kind is None:
+            raise QueryError("Неожиданный конец запроса")
+        if (kind, val) == ("paren", "("):
+            node = self.parse_or()
+            if self.take() != ("paren", ")"):
+                raise QueryError("Не хватает закрывающей скобки")
+            return node
+        if kind not in ("word", "str"):
+            raise QueryError(f"Неожиданный фрагмент: '{val}'")
+        nkind, nval = self.peek()
+        if nval in _CMP_OPS and nkind in ("op", "kw"):
+            self.take()
+            vkind, raw = self.take()
+            if vkind not in ("word", "str"):
+                raise QueryError(f"Ожидалось значение после '{nval}'")
+            return self.engine.make_compare(val, nval, raw)
+        return AnyText(val)
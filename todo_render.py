@@ -0,0 +1,132 @@
+"""
+Постраничный вывод таблицы в терминал.
+- Ширины столбцов считаются по выборке строк (или берутся готовыми), а не по всей таблице.
+- Строки печатаются страницами по мере чтения номеров, поэтому память не зависит
+  от размера таблицы. Слишком длинные значения обрезаются.
+- Внешний вид повторяет PrettyTable (рамка из +, -, |).
+"""
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Sequence
+
+try:
+    from wcwidth import wcswidth
+except ImportError:  # wcwidth ставится вместе с prettytable, но может отсутствовать
+    wcswidth = None
+
+PAGE_SIZE = 50
+SAMPLE_SIZE = 500
+MAX_COL_WIDTH = 40
+NUMBER_HEADER = "No."
+
+
+def display_width(text: str) -> int:
+    if text.isascii() and text.isprintable():
+        return len(text)
+    if wcswidth is not None:
+        w = wcswidth(text)
+        if w >= 0:
+            return w
+    return len(text)
+
+
+def truncate(text: str, width: int) -> str:
+    if display_width(text) <= width:
+        return text
+    out = ""
+    for ch in text:
+        if display_width(out + ch) > width - 1:
+            break
+        out += ch
+    return out + "…"
+
+
+def sample_indices(total: int, k: int = SAMPLE_SIZE) -> List[int]:
+    """Начало, конец и равномерная выборка из середины таблицы."""
+    if total <= k:
+        return list(range(total))
+    edge = k // 4
+    step = max(1, (total - 2 * edge) // (k - 2 * edge))
+    mid = range(edge, total - edge, step)
+    return sorted(set(range(edge)) | set(islice(mid, k - 2 * edge)) | set(range(total - edge, total)))
+
+
+def column_widths(headers: Sequence[str], rows: Sequence[Sequence[str]], indices: Iterable[int],
+                  max_width: int = MAX_COL_WIDTH) -> List[int]:
+    """Ширина каждого столбца по заголовку и строкам с номерами indices."""
+    widths = [display_width(h) for h in headers]
+    for i in indices:
+        row = rows[i]
+        for c in range(min(len(row), len(widths))):
+            w = display_width(row[c])
+            if w > widths[c]:
+                widths[c] = w
+    return [min(w, max(max_width, display_width(h))) for w, h in zip(widths, headers)]
+
+
+def separator(widths: Sequence[int]) -> str:
+    return "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+
+
+def format_row(cells: Sequence[str], widths: Sequence[int]) -> str:
+    parts = []
+    for cell, w in zip(cells, widths):
+        cell = truncate(cell, w)
+        pad = w - display_width(cell)
+        left = pad // 2
+        parts.append(" " + " " * left + cell + " " * (pad - left) + " ")
+    return "|" + "|".join(parts) + "|"
+
+
+class TableRenderer:
+    """Печатает строки таблицы страницами, ширины фиксируются один раз на вывод."""
+
+    def __init__(self, headers: Sequence[str], rows: Sequence[Sequence[str]],
+                 widths: Optional[Sequence[int]] = None, number_column: bool = True,
+                 out: Callable[[str], None] = print):
+        self.headers = list(headers)
+        self.rows = rows
+        self.number_column = number_column
+        self.out = out
+        if widths is None:
+            widths = column_widths(self.headers, rows, sample_indices(len(rows)))
+        self.widths = list(widths)
+        if number_column:
+            self.widths.insert(0, max(len(NUMBER_HEADER), len(str(len(rows)))))
+
+    def _cells(self, i: int) -> List[str]:
+        row = list(self.rows[i])
+        row += [""] * (len(self.headers) - len(row))
+        return ([str(i + 1)] if self.number_column else []) + row[:len(self.headers)]
+
+    def header_lines(self) -> List[str]:
+        names = ([NUMBER_HEADER] if self.number_column else []) + self.headers
+        sep = separator(self.widths)
+        return [sep, format_row(names, self.widths), sep]
+
+    def render(self, indices: Iterable[int], page_size: int = PAGE_SIZE,
+               ask_more: Optional[Callable[[int], bool]] = None) -> int:
+        """
+        Печатает строки с номерами indices (0-based) страницами по page_size.
+        ask_more(printed) вызывается между страницами; False — остановиться.
+        Возвращает число напечатанных строк.
+        """
+        it = iter(indices)
+        printed = 0
+        sep = separator(self.widths)
+        while True:
+            page = list(islice(it, page_size))
+            if not page:
+                break
+            if printed and ask_more is not None and not ask_more(printed):
+                break
+            # заголовок повторяется на каждой странице
+            for line in self.header_lines():
+                self.out(line)
+            for i in page:
+                self.out(format_row(self._cells(i), self.widths))
+            printed += len(page)
+            self.out(sep)
+        if printed == 0:
+            for line in self.header_lines():
+                self.out(line)
+        return printed
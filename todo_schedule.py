@@ -0,0 +1,241 @@
+"""
+Повторяющиеся задачи и планировщик напоминаний.
+- Правило повтора хранится в столбце "Repeat" текстом: daily, weekdays,
+  weekly:mon,wed, every:90m / every:2h / every:3d. Пустое значение — разовая задача
+  на дату из столбца "Date" (без даты — на сегодня).
+- Повторы не разворачиваются заранее: для каждой строки в куче лежит только ближайшее
+  срабатывание, следующее вычисляется после того, как текущее наступило.
+- Правка строки не ищет её запись в куче: запись помечается устаревшей (поколение строки)
+  и пропускается при извлечении.
+"""
+import heapq
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from todo_calendar import DATE_COLUMN
+from todo_schema import parse_date, parse_time
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+TIME_COLUMN = "Time: "
+REPEAT_COLUMN = "Repeat"
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DAY_MINUTES = 24 * 60
+_UNITS = {"m": 1, "h": 60, "d": DAY_MINUTES}
+
+Due = Tuple[datetime, int]  # (когда, номер строки)
+
+
+class Rule(NamedTuple):
+    kind: str  # daily | weekly | every
+    days: frozenset = frozenset()  # дни недели (0 — понедельник) для weekly
+    interval: int = 0  # минуты для every
+
+    def next_after(self, minute: int, after: datetime) -> datetime:
+        """Ближайшее срабатывание строго после after для задачи со временем minute (минуты от полуночи)."""
+        day = after.date()
+        if self.kind == "every" and self.interval < DAY_MINUTES:
+            # несколько раз в день: minute, minute + interval, ... до полуночи
+            passed = (after.hour * 60 + after.minute - minute) // self.interval + 1
+            m = minute + max(0, passed) * self.interval
+            if m < DAY_MINUTES:
+                return _at(day, m)
+            return _at(day + timedelta(days=1), minute)
+        # подходящий день найдётся не дальше чем через неделю (или через интервал в днях)
+        while True:
+            ok = True
+            if self.kind == "weekly":
+                ok = day.weekday() in self.days
+            elif self.kind == "every":
+                ok = day.toordinal() % (self.interval // DAY_MINUTES) == 0
+            if ok and _at(day, minute) > after:
+                return _at(day, minute)
+            day += timedelta(days=1)
+
+
+def _at(d: date, minute: int) -> datetime:
+    return datetime.combine(d, time(minute // 60, minute % 60))
+
+
+@lru_cache(maxsize=1024)
+def parse_rule(text: str) -> Optional[Rule]:
+    """Правило из текста; None — без повтора. Неверное правило — ValueError."""
+    text = text.strip().lower()
+    if not text:
+        return None
+    if text in ("daily", "ежедневно"):
+        return Rule("daily")
+    if text in ("weekdays", "будни"):
+        return Rule("weekly", frozenset(range(5)))
+    kind, _, arg = text.partition(":")
+    if kind == "weekly":
+        days = [d.strip()[:3] for d in arg.split(",") if d.strip()]
+        if not days or any(d not in WEEKDAYS for d in days):
+            raise ValueError(f"weekly: ожидаются дни {','.join(WEEKDAYS)}")
+        return Rule("weekly", frozenset(WEEKDAYS.index(d) for d in days))
+    if kind == "every":
+        num, unit = arg[:-1], arg[-1:]
+        if not num.isdigit() or unit not in _UNITS or int(num) < 1:
+            raise ValueError("every: ожидается число и единица m, h или d (every:90m)")
+        interval = int(num) * _UNITS[unit]
+        if interval >= DAY_MINUTES and interval % DAY_MINUTES:
+            raise ValueError("every: интервал больше суток задаётся в днях (every:2d)")
+        return Rule("daily") if interval == DAY_MINUTES else Rule("every", interval=interval)
+    raise ValueError(f"Неизвестное правило повтора '{text}' (daily, weekdays, weekly:mon,wed, every:90m)")
+
+
+def validate_rule(text: str) -> bool:
+    try:
+        parse_rule(text)
+        return True
+    except ValueError:
+        return False
+
+
+class ReminderScheduler(TableListener):
+    """Куча ближайших срабатываний по строкам таблицы."""
+
+    def __init__(self, table: TaskTable, now: Callable[[], datetime] = datetime.now):
+        self.table = table
+        self.now = now
+        self._heap: List[Tuple[datetime, int, int]] = []  # (когда, строка, поколение)
+        self._gen: List[int] = []
+        table.add_listener(self)
+
+    # -------------------- расписание строки --------------------
+    def _next(self, idx: int, after: datetime) -> Optional[datetime]:
+        headers = self.table.headers
+        if TIME_COLUMN not in headers:
+            return None
+        row = self.table.rows[idx]
+        minute = parse_time(row[headers.index(TIME_COLUMN)])
+        if minute is None:
+            return None
+        rule = None
+        if REPEAT_COLUMN in headers:
+            try:
+                rule = parse_rule(row[headers.index(REPEAT_COLUMN)])
+            except ValueError:
+                return None
+        if rule is None:
+            # задача без повтора — в свой день (столбец Date), без даты — сегодня
+            day = after.date()
+            if DATE_COLUMN in headers:
+                ordinal = parse_date(row[headers.index(DATE_COLUMN)])
+                if ordinal is not None:
+                    day = date.fromordinal(ordinal)
+            due = _at(day, minute)
+            return due if due > after else None
+        return rule.next_after(minute, after)
+
+    def _push(self, idx: int, after: datetime) -> None:
+        due = self._next(idx, after)
+        if due is not None:
+            heapq.heappush(self._heap, (due, idx, self._gen[idx]))
+
+    def _rebuild(self) -> None:
+        now = self.now()
+        n = len(self.table.rows)
+        self._gen = [0] * n
+        heap = []
+        for idx in range(n):
+            due = self._next(idx, now)
+            if due is not None:
+                heap.append((due, idx, 0))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    @property
+    def invalid(self) -> int:
+        """Число строк с неверным правилом повтора."""
+        if REPEAT_COLUMN not in self.table.headers:
+            return 0
+        ci = self.table.headers.index(REPEAT_COLUMN)
+        return sum(1 for r in self.table.rows if not validate_rule(r[ci]))
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and heap[0][2] != self._gen[heap[0][1]]:
+            heapq.heappop(heap)
+        # устаревших записей слишком много — пересобираем кучу без них
+        if len(heap) > 2 * len(self._gen) + 64:
+            self._heap = [e for e in heap if e[2] == self._gen[e[1]]]
+            heapq.heapify(self._heap)
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self._rebuild()
+
+    def on_columns(self, table: TaskTable) -> None:
+        self._rebuild()
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        now = self.now()
+        self._gen.extend([0] * count)
+        for idx in range(start, start + count):
+            self._push(idx, now)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        self._gen[idx] += 1
+        self._push(idx, self.now())
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        # номера строк сдвинулись — перенумеровываем записи кучи без пересчёта сроков
+        gen = self._gen
+        entries = []
+        for due, idx, g in self._heap:
+            if idx in indices or g != gen[idx]:
+                continue
+            entries.append((due, idx - indices.rank(idx), 0))
+        self._gen = [0] * len(table.rows)
+        heapq.heapify(entries)
+        self._heap = entries
+
+    # -------------------- доступ --------------------
+    def next_due(self) -> Optional[Due]:
+        self._drop_stale()
+        if not self._heap:
+            return None
+        due, idx, _ = self._heap[0]
+        return due, idx
+
+    def seconds_until_next(self) -> Optional[float]:
+        nxt = self.next_due()
+        if nxt is None:
+            return None
+        return max(0.0, (nxt[0] - self.now()).total_seconds())
+
+    def pop_due(self) -> List[Due]:
+        """Наступившие срабатывания; повторяющиеся задачи сразу получают следующее."""
+        now = self.now()
+        fired = []
+        while True:
+            nxt = self.next_due()
+            if nxt is None or nxt[0] > now:
+                break
+            due, idx = nxt
+            heapq.heappop(self._heap)
+            fired.append((due, idx))
+            self._push(idx, max(due, now))
+        return fired
+
+    def upcoming(self, limit: int = 20, until: Optional[datetime] = None) -> List[Due]:
+        """Ближайшие срабатывания (с повторами), не меняя состояние планировщика."""
+        self._drop_stale()
+        heap = [(due, idx) for due, idx, g in self._heap if g == self._gen[idx]]
+        heapq.heapify(heap)
+        out = []
+        while heap and len(out) < limit:
+            due, idx = heapq.heappop(heap)
+            if until is not None and due > until:
+                break
+            out.append((due, idx))
+            nxt = self._next(idx, due)
+            if nxt is not None:
+                heapq.heappush(heap, (nxt, idx))
+        return out
+
+    def describe(self, idx: int) -> str:
+        """Текст напоминания: значения строки через ' | '."""
+        return " | ".join(v for v in self.table.rows[idx] if v)
@@ -0,0 +1,360 @@
+"""
+Типы пользовательских столбцов и типизированное колоночное хранение.
+- Тип задаётся в заголовке ("Priority [int]") или в файле схемы рядом с таблицей
+  (tasks.csv -> tasks.schema.json: {"Priority": "int", "Status": "enum:todo|done"}).
+- Значения разбираются один раз при загрузке/изменении строки и хранятся в array,
+  поэтому сортировка, фильтры и агрегаты не разбирают строки повторно.
+"""
+import datetime
+import json
+import os
+import re
+from array import array
+from typing import Dict, List, Optional
+
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+# значение "пусто/не разобрано" для числовых массивов
+NULL_INT = -(2 ** 63)
+# допустимые значения int: диапазон int64 без NULL_INT
+INT_MIN = NULL_INT + 1
+INT_MAX = 2 ** 63 - 1
+NULL_FLOAT = float("nan")
+# столбцы, тип которых известен без объявления (остальные столбцы по умолчанию — text)
+TIME_COLUMN = "Time: "
+DATE_COLUMN = "Date"
+
+TYPE_NAMES = ["int", "float", "time", "date", "enum", "text"]
+
+_HEADER_TYPE_RE = re.compile(r"\[(int|float|time|date|enum(?::[^\]]*)?|text)\]\s*$")
+_TIME_RE = re.compile(r"^(\d{1,2}):(\d{1,2})$")
+
+
+def parse_time(text: str) -> Optional[int]:
+    """'HH:MM' -> минуты от полуночи или None."""
+    m = _TIME_RE.match(text.strip())
+    if not m:
+        return None
+    h, mi = map(int, m.groups())
+    if h > 23 or mi > 59:
+        return None
+    return h * 60 + mi
+
+
+def format_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_date(text: str) -> Optional[int]:
+    """'YYYY-MM-DD' или 'DD.MM.YYYY' -> порядковый номер дня или None."""
+    text = text.strip()
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.datetime.strptime(text, fmt).date().toordinal()
+        except ValueError:
+            continue
+    return None
+
+
+def format_date(ordinal: int) -> str:
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+class ColumnType:
+    """Тип столбца: разбор строки в значение и обратно."""
+
+    def __init__(self, name: str, choices: Optional[List[str]] = None):
+        if name not in TYPE_NAMES:
+            raise ValueError(f"Неизвестный тип столбца: {name}")
+        self.name = name
+        self.choices = list(choices or [])
+        # значения enum объявлены (enum:a|b): другие не принимаются; без объявления список растёт
+        self.fixed = bool(self.choices)
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "ColumnType":
+        """'int', 'time', 'enum:low|mid|high' -> ColumnType."""
+        spec = spec.strip()
+        if spec.startswith("enum"):
+            _, _, rest = spec.partition(":")
+            return cls("enum", [c.strip() for c in rest.split("|") if c.strip()])
+        return cls(spec)
+
+    @property
+    def spec(self) -> str:
+        if self.name == "enum" and self.choices:
+            return "enum:" + "|".join(self.choices)
+        return self.name
+
+    @property
+    def numeric(self) -> bool:
+        return self.name != "text"
+
+    def new_storage(self):
+        if self.name == "float":
+            return array("d")
+        if self.name == "text":
+            return []
+        return array("q")
+
+    @property
+    def null(self):
+        if self.name == "float":
+            return NULL_FLOAT
+        if self.name == "text":
+            return ""
+        return NULL_INT
+
+    def parse(self, text: str):
+        """Строка -> значение хранения или None, если не разбирается."""
+        text = "" if text is None else str(text).strip()
+        if self.name == "text":
+            return text
+        if not text:
+            return None
+        if self.name == "int":
+            try:
+                value = int(text)
+            except ValueError:
+                return None
+            # вне int64 значение не поместится в array("q"): такая строка не разбирается
+            return value if INT_MIN <= value <= INT_MAX else None
+        if self.name == "float":
+            try:
+                return float(text.replace(",", "."))
+            except ValueError:
+                return None
+        if self.name == "time":
+            return parse_time(text)
+        if self.name == "date":
+            return parse_date(text)
+        # enum: код = позиция в списке значений, новые значения дописываются в конец
+        if text not in self.choices:
+            if self.fixed:
+                return None
+            self.choices.append(text)
+        return self.choices.index(text)
+
+    def format(self, value) -> str:
+        if value is None or self.is_null(value):
+            return ""
+        if self.name == "time":
+            return format_time(value)
+        if self.name == "date":
+            return format_date(value)
+        if self.name == "enum":
+            return self.choices[value] if 0 <= value < len(self.choices) else ""
+        return str(value)
+
+    def is_null(self, value) -> bool:
+        if self.name == "float":
+            return value != value
+        if self.name == "text":
+            return value == ""
+        return value == NULL_INT
+
+    def validate(self, text: str) -> bool:
+        """Пустое значение допустимо, иначе строка должна разбираться."""
+        text = "" if text is None else str(text).strip()
+        if not text or self.name == "text":
+            return True
+        if self.name == "enum":
+            return not self.fixed or text in self.choices
+        return self.parse(text) is not None
+
+
+def type_from_header(header: str) -> Optional[str]:
+    """Тип, объявленный в заголовке: 'Priority [int]' -> 'int'."""
+    m = _HEADER_TYPE_RE.search(header)
+    return m.group(1) if m else None
+
+
+def schema_path(filename: str) -> str:
+    """tasks.csv -> tasks.schema.json"""
+    base = filename
+    while True:
+        root, ext = os.path.splitext(base)
+        if not ext:
+            break
+        base = root
+    return base + ".schema.json"
+
+
+def _read_schema_file(filename: str) -> dict:
+    path = schema_path(filename)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if "columns" not in data and "computed" not in data:
+        data = {"columns": data}  # старый формат: только типы столбцов
+    return data
+
+
+def _write_schema_key(filename: str, key: str, value: Dict[str, str]) -> None:
+    """Обновляет один раздел файла схемы, остальные разделы сохраняются."""
+    data = _read_schema_file(filename)
+    if not value and key not in data:
+        return
+    data[key] = value
+    with open(schema_path(filename), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_schema(filename: str) -> Dict[str, str]:
+    """Читает схему для файла данных; пустой словарь, если схемы нет."""
+    try:
+        return {str(k): str(v) for k, v in _read_schema_file(filename).get("columns", {}).items()}
+    except AttributeError:
+        return {}
+
+
+def save_schema(filename: str, schema: Dict[str, str]) -> None:
+    """Пишет схему рядом с файлом данных (только если она непустая)."""
+    if schema:
+        _write_schema_key(filename, "columns", schema)
+
+
+def load_computed(filename: str) -> Dict[str, str]:
+    """Определения вычисляемых столбцов (столбец -> выражение) из файла схемы."""
+    try:
+        return {str(k): str(v) for k, v in _read_schema_file(filename).get("computed", {}).items()}
+    except AttributeError:
+        return {}
+
+
+def save_computed(filename: str, exprs: Dict[str, str]) -> None:
+    """Пишет определения вычисляемых столбцов в файл схемы (пустые — только если раздел уже был)."""
+    _write_schema_key(filename, "computed", exprs)
+
+
+class TypedColumn:
+    """Разобранные значения одного столбца + тип."""
+
+    def __init__(self, ctype: ColumnType):
+        self.ctype = ctype
+        self.values = ctype.new_storage()
+
+    def convert(self, text: str):
+        v = self.ctype.parse(text)
+        return self.ctype.null if v is None else v
+
+    def key(self, i: int):
+        """Ключ сортировки: пустые значения всегда в конце."""
+        v = self.values[i]
+        if self.ctype.is_null(v):
+            return (1, 0)
+        if self.ctype.name == "text":
+            return (0, v.lower())
+        return (0, v)
+
+
+class TypedColumns(TableListener):
+    """
+    Слушатель TaskTable, поддерживающий типизированные колонки.
+    schema — явные типы (имя столбца -> spec), остальные определяются по заголовку.
+    """
+
+    def __init__(self, schema: Optional[Dict[str, str]] = None):
+        self.schema: Dict[str, str] = dict(schema or {})
+        self.columns: Dict[str, TypedColumn] = {}
+        self._order: List[str] = []
+
+    def type_for(self, header: str) -> ColumnType:
+        spec = self.schema.get(header) or type_from_header(header)
+        if spec is None:
+            spec = "time" if header == TIME_COLUMN else "date" if header == DATE_COLUMN else "text"
+        return ColumnType.from_spec(spec)
+
+    def set_type(self, table: TaskTable, header: str, spec: str) -> None:
+        """Меняет тип столбца и заново разбирает только этот столбец."""
+        ColumnType.from_spec(spec)  # проверка
+        self.schema[header] = spec
+        self._build_column(table, header)
+        table.columns_changed()
+
+    def _build_column(self, table: TaskTable, header: str) -> None:
+        ci = table.headers.index(header)
+        col = TypedColumn(self.type_for(header))
+        conv = col.convert
+        vals = [conv(r[ci] if ci < len(r) else "") for r in table.rows]
+        if isinstance(col.values, array):
+            col.values.extend(vals)
+        else:
+            col.values = vals
+        self.columns[header] = col
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self.columns = {}
+        self._order = list(table.headers)
+        for h in table.headers:
+            self._build_column(table, h)
+
+    def on_columns(self, table: TaskTable) -> None:
+        # разбираем только новые столбцы, остальные переиспользуем
+        old = self.columns
+        self.columns = {}
+        self._order = list(table.headers)
+        for h in table.headers:
+            if h in old:
+                self.columns[h] = old[h]
+            else:
+                self._build_column(table, h)
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        for ci, h in enumerate(self._order):
+            col = self.columns[h]
+            col.values.extend(col.convert(r[ci]) for r in table.rows[start:start + count])
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        row = table.rows[idx]
+        for ci, h in enumerate(self._order):
+            if ci >= len(old_row) or old_row[ci] != row[ci]:
+                col = self.columns[h]
+                col.values[idx] = col.convert(row[ci])
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        # срезы промежутков между удалёнными интервалами (array копируется без Python-цикла)
+        for col in self.columns.values():
+            col.values = indices.compact(col.values)
+
+    # -------------------- доступ --------------------
+    def column(self, header: str) -> TypedColumn:
+        return self.columns[header]
+
+    def value(self, header: str, row_idx: int):
+        col = self.columns[header]
+        v = col.values[row_idx]
+        return None if col.ctype.is_null(v) else v
+
+    def validate_row(self, headers: List[str], values: List[str]) -> Optional[str]:
+        """Возвращает имя первого столбца с неверным значением или None."""
+        for h, v in zip(headers, values):
+            if h in self.columns and not self.columns[h].ctype.validate(v):
+                return h
+        return None
+
+    def aggregate(self, header: str) -> Dict[str, object]:
+        """count/empty/min/max/sum/avg по разобранным значениям."""
+        col = self.columns[header]
+        ct = col.ctype
+        vals = [v for v in col.values if not ct.is_null(v)]
+        res: Dict[str, object] = {"type": ct.spec, "count": len(vals), "empty": len(col.values) - len(vals)}
+        if not vals or ct.name == "text":
+            return res
+        res["min"] = ct.format(min(vals))
+        res["max"] = ct.format(max(vals))
+        if ct.name in ("int", "float", "time"):
+            total = sum(vals)
+            avg = total / len(vals)
+            if ct.name != "time":
+                res["sum"] = ct.format(total)
+            res["avg"] = format_time(int(round(avg))) if ct.name == "time" else round(avg, 3)
+        return res
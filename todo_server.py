@@ -0,0 +1,626 @@
+"""
+Локальный HTTP/JSON API над тем же файлом задач, что используют CLI и GUI.
+Запуск: python todo_server.py [--host 127.0.0.1] [--port 8765] [--file tasks_autosave.csv]
+
+Маршруты (номер строки — как в колонке No., с 1):
+  GET    /tasks?q=...&sort=Time,-Priority&offset=0&limit=100   список (с фильтром и сортировкой)
+  GET    /tasks?stream=1&...                                   весь результат потоком NDJSON
+  GET    /tasks/N                                              одна строка (N — номер или ID задачи)
+  POST   /tasks                {"Time: ": "09:00", ...}        добавить строку
+  PATCH  /tasks/N              {"Comments: ": "..."}           изменить поля строки
+  DELETE /tasks/N                                              удалить строку
+  POST   /batch                {"ops": [...]}                  несколько изменений за раз
+  GET    /export?format=csv|jsonl                              выгрузка потоком (gzip, если клиент
+                                                                 прислал Accept-Encoding: gzip)
+  GET    /changes?since=SEQ&wait=30                            изменения после SEQ (долгий опрос)
+  GET    /schema, GET /metrics
+
+- Соединения keep-alive, большие ответы отдаются частями (chunked), сервер не
+  держит весь ответ в памяти.
+- GET отдаёт ETag (версия таблицы); If-None-Match даёт 304, If-Match на изменениях — 412.
+- Вычисляемые столбцы (раздел computed файла схемы) сервер считает сам: значения в
+  запросах POST/PATCH для них пропускаются, как и ID.
+- Данные живут в одном TaskTable в памяти; файл синхронизируется через SharedFile,
+  поэтому CLI и GUI видят изменения сервера и наоборот. Блокировка файла, чтение и
+  запись идут в потоке (asyncio.to_thread), чужие изменения применяются к таблице в
+  цикле событий. Пока идёт синхронизация, запросы на изменение ждут её (io_lock),
+  чтение обслуживается как обычно.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import uuid
+import zlib
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from todo_computed import ComputedColumns
+from todo_feed import ChangeFeed
+from todo_io import committer, read_csv, write_csv
+from todo_metrics import metrics
+from todo_query import QueryEngine, QueryError
+from todo_render import NUMBER_HEADER
+from todo_schema import TypedColumns, load_schema, save_schema
+from todo_shared import FileLock, SharedFile
+from todo_sort import SortCache
+from todo_store import ID_COLUMN, TaskTable
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_FILE = "tasks_autosave.csv"
+DURABILITY = "batched"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+STREAM_CHUNK_ROWS = 500
+MAX_BODY = 8 * 1024 * 1024
+MAX_HEADERS = 100
+KEEPALIVE_TIMEOUT = 15.0
+# изменения пишутся на диск одним сохранением не чаще, чем раз в SAVE_DELAY секунд
+SAVE_DELAY = 0.5
+# как часто проверять файл на изменения из CLI/GUI
+PULL_INTERVAL = 2.0
+# дольше этого /changes не ждёт новых изменений
+MAX_WAIT = 60.0
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 411: "Length Required", 412: "Precondition Failed",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = unquote(parts.path)
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+
+    def json(self):
+        try:
+            return json.loads(self.body.decode("utf-8") or "null")
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HttpError(400, f"Некорректный JSON: {e}")
+
+    @property
+    def keep_alive(self) -> bool:
+        conn = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return conn == "keep-alive"
+        return conn != "close"
+
+
+Body = Union[bytes, AsyncIterator[bytes]]
+
+
+class Response:
+    def __init__(self, status: int = 200, body: Body = b"", content_type: str = "application/json",
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.headers.update(headers or {})
+
+
+def json_response(data, status: int = 200, etag: Optional[str] = None) -> Response:
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return Response(status, body, "application/json; charset=utf-8", {"ETag": etag} if etag else None)
+
+
+def error_response(status: int, message: str) -> Response:
+    return json_response({"error": message}, status)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+class TaskService:
+    """Операции над таблицей задач; HTTP о них ничего не знает, кроме HttpError."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.store = TaskTable(id_column=ID_COLUMN)
+        self.typed = self.store.add_listener(TypedColumns())
+        self.computed = ComputedColumns(self.store, self.typed)
+        self.query = QueryEngine(self.store, self.typed)
+        self.sorter = SortCache(self.store, self.typed)
+        self.shared = SharedFile(self.store, filename)
+        self.feed = ChangeFeed(self.store)
+        self.boot = uuid.uuid4().hex[:8]  # ETag не совпадёт с выданным до перезапуска
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_task: Optional[asyncio.Task] = None
+        # синхронизация с файлом и изменения таблицы по запросам не идут одновременно
+        self.io_lock = asyncio.Lock()
+
+    def load(self) -> None:
+        if os.path.exists(self.filename):
+            headers, rows = read_csv(self.filename)
+            self.typed.schema = load_schema(self.filename)
+            self.computed.load(self.filename)
+            self.store.reset(headers or self.store.headers, rows)
+        self.shared.mark_synced()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.boot}-{self.store.version}"'
+
+    # -------------------- синхронизация с файлом --------------------
+    def _write(self) -> None:
+        write_csv(self.filename, self.store.headers, self.store.rows, DURABILITY)
+        save_schema(self.filename, self.typed.schema)
+
+    async def _merge(self) -> None:
+        """Чужие изменения файла (блокировка взята): чтение в потоке, применение к таблице в цикле."""
+        changes = await asyncio.to_thread(self.shared.read_changes)
+        if self.shared.apply_changes(changes) is not None:
+            metrics.incr("server.merges")
+
+    async def _sync(self, save: bool) -> None:
+        """Слить чужие изменения и (save) записать свои; ожидание блокировки и диск — в потоке."""
+        changed = await asyncio.to_thread(self.shared.changed_on_disk)
+        if not changed and not (save and (self.shared.dirty or self.shared.state is None)):
+            return
+        lock = FileLock(self.filename)
+        await asyncio.to_thread(lock.acquire)
+        try:
+            # файл могли изменить, пока ждали блокировку
+            if await asyncio.to_thread(self.shared.changed_on_disk):
+                await self._merge()
+            if save:
+                # io_lock держится: пока поток пишет таблицу, она не меняется
+                await asyncio.to_thread(self.shared.commit, self._write)
+        finally:
+            lock.release()
+
+    async def save_now(self) -> None:
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        async with self.io_lock:
+            try:
+                with metrics.timer("server.save"):
+                    await self._sync(save=True)
+            except (OSError, TimeoutError):
+                metrics.incr("server.save_errors")
+                self.schedule_save()  # попробуем ещё раз
+
+    async def flush(self) -> None:
+        """Записать отложенные изменения (при остановке сервера)."""
+        if self._save_task is not None:
+            await self._save_task
+        if self._save_handle is not None:
+            await self.save_now()
+        await asyncio.to_thread(committer.flush)
+
+    def _start_save(self) -> None:
+        self._save_handle = None
+        self._save_task = asyncio.get_running_loop().create_task(self.save_now())
+
+    def schedule_save(self) -> None:
+        """Несколько изменений подряд дают одну запись файла."""
+        if self._save_handle is None:
+            loop = asyncio.get_running_loop()
+            self._save_handle = loop.call_later(SAVE_DELAY, self._start_save)
+
+    async def pull_forever(self) -> None:
+        while True:
+            await asyncio.sleep(PULL_INTERVAL)
+            async with self.io_lock:
+                # столбцы с now()/today(): пересчёт без правки входных ячеек не сохраняется
+                self.computed.tick()
+                try:
+                    await self._sync(save=False)
+                except (OSError, TimeoutError):
+                    metrics.incr("server.pull_errors")  # повторим в следующий раз
+
+    async def wait_changes(self, since: int, timeout: float):
+        """Изменения после since; если их нет — ждём первое не дольше timeout секунд."""
+        changes = self.feed.since(since)
+        if changes == [] and timeout > 0:
+            fut = asyncio.get_running_loop().create_future()
+            unsubscribe = self.feed.subscribe(lambda change: fut.done() or fut.set_result(None))
+            try:
+                await asyncio.wait_for(fut, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                unsubscribe()
+            changes = self.feed.since(since)
+        return changes
+
+    # -------------------- чтение --------------------
+    def row_dict(self, i: int) -> Dict[str, object]:
+        out: Dict[str, object] = {NUMBER_HEADER: i + 1}
+        out.update(zip(self.store.headers, self.store.rows[i]))
+        return out
+
+    def index_of(self, text: str) -> int:
+        """Номер строки (как в колонке No.) или ID задачи -> индекс строки."""
+        if not text.isdigit():
+            idx = self.store.slot(text)
+            if idx is None:
+                raise HttpError(404, f"Нет задачи с ID {text}")
+            return idx
+        if not 1 <= int(text) <= len(self.store):
+            raise HttpError(404, f"Нет строки с номером {text}")
+        return int(text) - 1
+
+    def select(self, params: Dict[str, str]) -> List[int]:
+        """Номера строк по параметрам q (фильтр) и sort (столбцы через запятую, '-' — по убыванию)."""
+        hits = None
+        try:
+            if params.get("q"):
+                hits = self.query.find(params["q"])
+            keys = []
+            for part in filter(None, (p.strip() for p in params.get("sort", "").split(","))):
+                desc = part.startswith("-")
+                keys.append((self.query.resolve_column(part.lstrip("-+")), desc))
+        except QueryError as e:
+            raise HttpError(400, str(e))
+        perm = self.sorter.order(keys)
+        if perm is None:
+            return hits if hits is not None else list(range(len(self.store)))
+        if hits is None:
+            return list(perm)
+        wanted = set(hits)
+        return [i for i in perm if i in wanted]
+
+    # -------------------- изменения --------------------
+    def row_from_json(self, data, base: Optional[List[str]] = None) -> List[str]:
+        """Строка из JSON-объекта {столбец: значение}; base — текущие значения для PATCH."""
+        if not isinstance(data, dict):
+            raise HttpError(400, "Ожидается объект {столбец: значение}")
+        headers = self.store.headers
+        row = list(base) if base is not None else [""] * len(headers)
+        for key, value in data.items():
+            if key in (NUMBER_HEADER, ID_COLUMN):
+                continue  # ID выдаёт хранилище
+            try:
+                header = self.query.resolve_column(key)
+            except QueryError as e:
+                raise HttpError(400, str(e))
+            if header in self.computed.defs:
+                continue  # значение посчитает ComputedColumns
+            ci = headers.index(header)
+            value = "" if value is None else str(value)
+            ctype = self.typed.column(header).ctype
+            if not ctype.validate(value):
+                raise HttpError(400, f"Значение '{value}' не подходит под тип столбца '{header}' ({ctype.spec})")
+            if value and ctype.name == "time":
+                value = ctype.format(ctype.parse(value))  # 9:5 -> 09:05, как в CLI
+            row[ci] = value
+        return row
+
+    def add(self, data) -> int:
+        idx = self.store.append(self.row_from_json(data))
+        self.schedule_save()
+        return idx
+
+    def update(self, idx: int, data) -> None:
+        self.store.update(idx, self.row_from_json(data, self.store.rows[idx]))
+        self.schedule_save()
+
+    def delete(self, idx: int) -> None:
+        self.store.delete([idx])
+        self.schedule_save()
+
+    def batch(self, ops) -> Dict[str, object]:
+        """
+        Пакет изменений. Номера строк во всех операциях — на момент до пакета.
+        Всё проверяется заранее: при ошибке не применяется ничего.
+        Порядок применения: правки, добавления, затем удаления одним проходом.
+        """
+        if not isinstance(ops, list):
+            raise HttpError(400, "Ожидается {\"ops\": [...]}")
+        updates: Dict[int, List[str]] = {}
+        adds: List[List[str]] = []
+        deletes = set()
+        for n, op in enumerate(ops):
+            if not isinstance(op, dict):
+                raise HttpError(400, f"Операция {n}: ожидается объект")
+            kind = op.get("op")
+            if kind == "add":
+                adds.append(self.row_from_json(op.get("row")))
+            elif kind in ("update", "delete"):
+                idx = self.index_of(str(op.get("id") or op.get("no", "")))
+                if kind == "update":
+                    updates[idx] = self.row_from_json(op.get("row"), updates.get(idx, self.store.rows[idx]))
+                else:
+                    deletes.add(idx)
+            else:
+                raise HttpError(400, f"Операция {n}: неизвестный тип '{kind}' (add, update, delete)")
+        self.store.update_many((idx, row) for idx, row in updates.items() if idx not in deletes)
+        # добавленные строки окажутся в конце, после удаления — с номера first
+        first = len(self.store) - len(deletes) + 1
+        self.store.extend(adds)
+        self.store.delete(deletes)
+        if ops:
+            self.schedule_save()
+        added = list(range(first, first + len(adds)))
+        return {"updated": len(set(updates) - deletes), "deleted": len(deletes),
+                "added": added, "added_ids": [self.store.id_of(n - 1) for n in added]}
+
+
+class TaskServer:
+    def __init__(self, service: TaskService):
+        self.service = service
+
+    # -------------------- HTTP --------------------
+    async def read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Некорректная строка запроса")
+        headers: Dict[str, str] = {}
+        while True:
+            hline = await reader.readline()
+            if hline in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(400, "Слишком много заголовков")
+            name, _, value = hline.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(411, "Нужен Content-Length")
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise HttpError(400, "Некорректный Content-Length")
+        if int(length) > MAX_BODY:
+            raise HttpError(413, "Слишком большое тело запроса")
+        body = await reader.readexactly(int(length)) if int(length) else b""
+        return Request(method.upper(), target, version, headers, body)
+
+    async def send(self, writer: asyncio.StreamWriter, resp: Response, keep_alive: bool, head: bool) -> None:
+        status_line = f"HTTP/1.1 {resp.status} {REASONS.get(resp.status, '')}\r\n"
+        headers = dict(resp.headers)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        streaming = not isinstance(resp.body, bytes)
+        if streaming:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            headers["Content-Length"] = str(len(resp.body))
+        writer.write((status_line + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n").encode("latin-1"))
+        if head:
+            if streaming:
+                await resp.body.aclose()
+            await writer.drain()
+            return
+        if not streaming:
+            writer.write(resp.body)
+            await writer.drain()
+            return
+        async for chunk in resp.body:
+            if chunk:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                # медленный клиент не раздувает буфер: ждём, пока он заберёт данные
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        metrics.incr("http.connections")
+        try:
+            while True:
+                try:
+                    req = await self.read_request(reader)
+                except HttpError as e:
+                    await self.send(writer, error_response(e.status, str(e)), False, False)
+                    break
+                if req is None:
+                    break
+                with metrics.timer(f"http.{req.method}"):
+                    if req.method in ("GET", "HEAD"):
+                        resp = await self.dispatch(req)
+                    else:
+                        async with self.service.io_lock:
+                            resp = await self.dispatch(req)
+                    keep_alive = req.keep_alive
+                    await self.send(writer, resp, keep_alive, req.method == "HEAD")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, req: Request) -> Response:
+        try:
+            return await self.route(req)
+        except HttpError as e:
+            return error_response(e.status, str(e))
+        except Exception as e:  # ошибка в обработчике не должна ронять сервер
+            return error_response(500, f"{type(e).__name__}: {e}")
+
+    # -------------------- маршруты --------------------
+    async def route(self, req: Request) -> Response:
+        svc = self.service
+        parts = [p for p in req.path.split("/") if p]
+        method = "GET" if req.method == "HEAD" else req.method
+        if method == "GET":
+            if_none = req.headers.get("if-none-match")
+            if if_none and _etag_matches(if_none, svc.etag):
+                return Response(304, headers={"ETag": svc.etag})
+        elif "if-match" in req.headers and not _etag_matches(req.headers["if-match"], svc.etag):
+            raise HttpError(412, "Таблица изменилась с момента чтения")
+
+        if parts == ["tasks"]:
+            if method == "GET":
+                return self.list_tasks(req)
+            if method == "POST":
+                idx = svc.add(req.json())
+                return json_response(svc.row_dict(idx), 201, svc.etag)
+        elif len(parts) == 2 and parts[0] == "tasks":
+            idx = svc.index_of(parts[1])
+            if method == "GET":
+                return json_response(svc.row_dict(idx), etag=svc.etag)
+            if method in ("PATCH", "PUT"):
+                svc.update(idx, req.json())
+                return json_response(svc.row_dict(idx), etag=svc.etag)
+            if method == "DELETE":
+                svc.delete(idx)
+                return Response(204, headers={"ETag": svc.etag})
+        elif parts == ["batch"]:
+            if method == "POST":
+                data = req.json()
+                result = svc.batch(data.get("ops") if isinstance(data, dict) else None)
+                return json_response(result, etag=svc.etag)
+        elif parts == ["export"]:
+            if method == "GET":
+                return self.export(req)
+        elif parts == ["changes"]:
+            if method == "GET":
+                return await self.changes(req)
+        elif parts == ["schema"]:
+            if method == "GET":
+                cols = {h: svc.typed.column(h).ctype.spec for h in svc.store.headers}
+                return json_response({"headers": svc.store.headers, "types": cols,
+                                      "computed": svc.computed.expressions()}, etag=svc.etag)
+        elif parts == ["metrics"]:
+            if method == "GET":
+                return json_response(metrics.summary())
+        else:
+            raise HttpError(404, f"Нет маршрута {req.path}")
+        raise HttpError(405, f"Метод {req.method} не поддерживается для {req.path}")
+
+    async def changes(self, req: Request) -> Response:
+        try:
+            since = int(req.query.get("since", 0))
+            wait = min(float(req.query.get("wait", 0)), MAX_WAIT)
+        except ValueError:
+            raise HttpError(400, "since и wait должны быть числами")
+        changes = await self.service.wait_changes(since, wait)
+        if changes is None:
+            # история короче, чем нужно клиенту: перечитать /tasks и продолжить с seq
+            return json_response({"seq": self.service.feed.seq, "reset": True, "changes": []})
+        return json_response({"seq": self.service.feed.seq, "reset": False, "changes": changes})
+
+    def _page_args(self, req: Request) -> Tuple[int, int]:
+        try:
+            offset = int(req.query.get("offset", 0))
+            limit = int(req.query.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            raise HttpError(400, "offset и limit должны быть числами")
+        return max(0, offset), max(0, min(limit, MAX_LIMIT))
+
+    def list_tasks(self, req: Request) -> Response:
+        svc = self.service
+        order = svc.select(req.query)
+        if req.query.get("stream") in ("1", "true"):
+            return self._stream(order, "jsonl")
+        offset, limit = self._page_args(req)
+        page = order[offset:offset + limit]
+        nxt = offset + len(page)
+        return json_response({
+            "total": len(order),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": nxt if nxt < len(order) else None,
+            "rows": [svc.row_dict(i) for i in page],
+        }, etag=svc.etag)
+
+    def export(self, req: Request) -> Response:
+        fmt = req.query.get("format", "csv")
+        if fmt not in ("csv", "jsonl"):
+            raise HttpError(400, "format: csv или jsonl")
+        resp = self._stream(self.service.select(req.query), fmt)
+        if "gzip" in req.headers.get("accept-encoding", "").lower():
+            resp.body = gzip_chunks(resp.body)
+            resp.headers["Content-Encoding"] = "gzip"
+        return resp
+
+    def _stream(self, order: List[int], fmt: str) -> Response:
+        svc = self.service
+        # снимок ссылок на строки: правки во время отдачи не смешивают версии
+        headers = list(svc.store.headers)
+        rows = svc.store.rows
+        snapshot = [(i, rows[i]) for i in order]
+        n = len(headers)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            it = iter(snapshot)
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerow(headers)
+            while True:
+                part = list(islice(it, STREAM_CHUNK_ROWS))
+                if not part:
+                    if fmt == "csv" and buf.tell():
+                        yield buf.getvalue().encode("utf-8")
+                    break
+                if fmt == "csv":
+                    writer.writerows(row[:n] for _, row in part)
+                    data = buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+                else:
+                    data = "".join(json.dumps({NUMBER_HEADER: i + 1, **dict(zip(headers, row))}, ensure_ascii=False)
+                                   + "\n" for i, row in part)
+                yield data.encode("utf-8")
+                await asyncio.sleep(0)  # отдаём управление другим клиентам
+
+        ctype = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson; charset=utf-8"
+        return Response(200, chunks(), ctype, {"ETag": svc.etag})
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Сжатие потока на лету: каждая часть сжимается и сразу отдаётся клиенту."""
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 — формат gzip
+    async for chunk in chunks:
+        data = comp.compress(chunk)
+        if data:
+            yield data
+    yield comp.flush()
+
+
+async def serve(host: str, port: int, filename: str) -> None:
+    service = TaskService(filename)
+    service.load()
+    server = TaskServer(service)
+    srv = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    puller = asyncio.create_task(service.pull_forever())
+    print(f"API задач: http://{host}:{port}/tasks (файл {filename}, строк: {len(service.store)})")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        puller.cancel()
+        await service.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный HTTP API менеджера задач")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.file))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
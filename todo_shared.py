@@ -0,0 +1,378 @@
+"""
+Совместная работа нескольких процессов (CLI и GUI) с одним файлом задач.
+- FileLock: межпроцессная блокировка через файл "<имя>.lock" (fcntl / msvcrt).
+- SharedFile: оптимистичное слияние. Запоминается состояние файла на момент последней
+  синхронизации (mtime/размер и мультимножество строк). Если файл изменили извне,
+  перед записью изменения другой стороны применяются построчно (добавленные строки
+  дописываются, удалённые удаляются), а свои несохранённые изменения сохраняются.
+  Если журнал изменений (todo_feed.FeedLog) покрывает всё с нашей версии файла,
+  изменения берутся из него, без чтения CSV.
+- Вычисляемые столбцы (todo_computed) в ключ строки не входят: их значения (в том числе
+  зависящие от now()/today()) пересчитываются при загрузке и слиянии, а пересчёт без
+  правки исходных ячеек не считается изменением строки.
+- Слияние делится на чтение (read_changes: файл и журнал, таблица не меняется — можно
+  вызывать в другом потоке) и применение к таблице (apply_changes); pull/save делают оба шага.
+"""
+import os
+import time
+from collections import Counter
+from typing import AbstractSet, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from todo_feed import FEED_MAX_ROWS, FeedLog, row_dict
+from todo_intervals import IntervalSet
+from todo_io import file_state, read_csv
+from todo_store import TableListener, TaskTable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT = 10.0
+LOCK_POLL = 0.05
+
+
+class FileLock:
+    """Эксклюзивная блокировка файла между процессами (контекстный менеджер)."""
+
+    def __init__(self, filename: str, timeout: float = LOCK_TIMEOUT):
+        self.path = filename + ".lock"
+        self.timeout = timeout
+        self._fh = None
+
+    def acquire(self) -> None:
+        fh = open(self.path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                self._fh = fh
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    fh.close()
+                    raise TimeoutError(f"Файл {os.path.basename(self.path)} занят другим процессом")
+                time.sleep(LOCK_POLL)
+
+    def release(self) -> None:
+        fh, self._fh = self._fh, None
+        if fh is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            fh.close()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class MergeResult(NamedTuple):
+    added: int
+    removed: int
+    columns: List[str]
+
+    def __str__(self) -> str:
+        parts = []
+        if self.added:
+            parts.append(f"добавлено строк: {self.added}")
+        if self.removed:
+            parts.append(f"удалено строк: {self.removed}")
+        if self.columns:
+            parts.append(f"новые столбцы: {', '.join(self.columns)}")
+        return "Изменения из другого процесса — " + (", ".join(parts) if parts else "без изменений строк")
+
+
+class DiskChanges(NamedTuple):
+    """Изменения файла с последней синхронизации, прочитанные read_changes и ещё не применённые."""
+    state: Optional[tuple]  # file_state файла; None — файл удалён
+    columns: List[str]  # столбцы файла (новые добавятся в таблицу)
+    added: List[Dict[str, str]]
+    removed: Counter  # ключи удалённых строк
+    removed_rows: List[Dict[str, str]]  # удалённые строки целиком (только из журнала: поиск по ID)
+    skip: frozenset  # столбцы, не вошедшие в ключи removed
+    base: Counter  # ключи строк файла после слияния
+    base_skip: frozenset
+    seq: int  # последняя запись журнала
+
+
+def row_key(headers: Sequence[str], row: Sequence[str], skip: AbstractSet[str] = frozenset()) -> int:
+    """
+    Ключ строки, не зависящий от порядка столбцов и пустых столбцов:
+    добавление пустого столбца другой стороной не меняет ключи. Столбцы skip не учитываются.
+    """
+    return hash(frozenset((h, v) for h, v in zip(headers, row) if v and h not in skip))
+
+
+def dict_key(row: Dict[str, str], skip: AbstractSet[str] = frozenset()) -> int:
+    """row_key для строки из журнала изменений ({столбец: значение})."""
+    return hash(frozenset((h, v) for h, v in row.items() if v and h not in skip))
+
+
+class SharedFile(TableListener):
+    """
+    Синхронизация TaskTable с файлом, который могут менять другие процессы.
+    Как слушатель таблицы копит свои несохранённые изменения (добавленные и удалённые
+    строки); при записи они попадают в журнал изменений (FeedLog), откуда другие
+    процессы применяют их построчно.
+    """
+
+    def __init__(self, table: TaskTable, filename: str):
+        self.table = table
+        self.filename = filename
+        self.log = FeedLog(filename)
+        self.state = None
+        self.seq = 0  # последняя учтённая запись журнала
+        self.base: Counter = Counter()  # ключи строк файла на момент последней синхронизации
+        self._base_skip: frozenset = frozenset()  # столбцы, не вошедшие в ключи base
+        self._added: Dict[int, List[Dict[str, str]]] = {}
+        self._removed: List[Dict[str, str]] = []
+        self._pending_reset = False
+        self._headers: List[str] = []
+        self._applying = False  # изменения из чужого процесса — не наши
+        table.add_listener(self)
+
+    def _skip(self) -> frozenset:
+        """Вычисляемые столбцы таблицы: в ключ строки не входят."""
+        computed = self.table.computed
+        return frozenset(computed.defs) if computed is not None else frozenset()
+
+    def _keys(self, headers: Sequence[str], rows: Sequence[Sequence[str]], skip: AbstractSet[str]) -> Counter:
+        return Counter(row_key(headers, r, skip) for r in rows)
+
+    def _clear_pending(self) -> None:
+        self._added = {}
+        self._removed = []
+        self._pending_reset = False
+
+    def mark_synced(self) -> None:
+        """Таблица совпадает с файлом (после загрузки или записи)."""
+        self.state = file_state(self.filename)
+        self.seq = self.log.last_seq()
+        self._base_skip = self._skip()
+        self.base = self._keys(self.table.headers, self.table.rows, self._base_skip)
+        self._headers = list(self.table.headers)
+        self._clear_pending()
+
+    @property
+    def dirty(self) -> bool:
+        """Есть несохранённые изменения строк или столбцов."""
+        return (self._pending_reset or bool(self._removed) or any(self._added.values())
+                or self._headers != self.table.headers)
+
+    def changed_on_disk(self) -> bool:
+        return file_state(self.filename) != self.state
+
+    def pull(self) -> Optional[MergeResult]:
+        """Применить к таблице изменения, сделанные в файле другими процессами."""
+        if not self.changed_on_disk():
+            return None
+        with FileLock(self.filename):
+            return self.apply_changes(self.read_changes())
+
+    def save(self, write: Callable[[], None]) -> Optional[MergeResult]:
+        """
+        Записать таблицу вызовом write() под блокировкой.
+        Если файл изменился с момента последней синхронизации — сначала слить изменения.
+        """
+        with FileLock(self.filename):
+            if not self.changed_on_disk():
+                if not self.dirty and self.state is not None:
+                    return None  # файл уже совпадает с таблицей
+                merged = None
+            else:
+                merged = self.apply_changes(self.read_changes())
+            self.commit(write)
+        return merged
+
+    def commit(self, write: Callable[[], None]) -> None:
+        """
+        Запись таблицы вызовом write() (блокировка файла уже взята, чужие изменения слиты)
+        и запись в журнал. Если файл не изменился — свои изменения остаются несохранёнными.
+        """
+        prev = self.state
+        write()
+        state = file_state(self.filename)
+        if state is None or state == prev:
+            return
+        record = self._pending_record()
+        record.update(prev=prev, state=state)
+        self.log.append(record)
+        self.mark_synced()
+
+    # -------------------- свои изменения --------------------
+    def _pending_record(self) -> Dict[str, object]:
+        added = [r for rows in self._added.values() for r in rows]
+        if self._pending_reset or len(added) + len(self._removed) > FEED_MAX_ROWS:
+            return {"op": "reset"}
+        return {"op": "rows", "added": added, "removed": list(self._removed)}
+
+    def _add(self, headers: List[str], row: List[str]) -> None:
+        self._added.setdefault(row_key(headers, row, self._skip()), []).append(row_dict(headers, row))
+
+    def _remove(self, headers: List[str], row: List[str]) -> None:
+        # удаление своей же несохранённой строки просто отменяет её добавление
+        pending = self._added.get(row_key(headers, row, self._skip()))
+        if pending:
+            pending.pop()
+        else:
+            self._removed.append(row_dict(headers, row))
+
+    def on_reset(self, table: TaskTable) -> None:
+        if not self._applying:
+            self._pending_reset = True
+
+    def on_columns(self, table: TaskTable) -> None:
+        # новые пустые столбцы и перестановка ключи не меняют, удаление столбца — меняет
+        if not self._applying and any(h not in table.headers for h in self._headers):
+            self._pending_reset = True
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if self._applying or self._pending_reset:
+            return
+        for row in table.rows[start:start + count]:
+            self._add(table.headers, row)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        if self._applying or self._pending_reset:
+            return
+        skip = self._skip()
+        if row_key(table.headers, old_row, skip) == row_key(table.headers, table.rows[idx], skip):
+            return  # изменились только вычисляемые столбцы (например, пересчёт now())
+        self._remove(table.headers, old_row)
+        self._add(table.headers, table.rows[idx])
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        if self._applying or self._pending_reset:
+            return
+        for row in old_rows:
+            self._remove(table.headers, row)
+
+    # -------------------- чужие изменения --------------------
+    def read_changes(self) -> DiskChanges:
+        """Прочитать изменения файла под блокировкой; таблица и состояние синхронизации не меняются."""
+        state = file_state(self.filename)
+        if state is None:
+            # файл удалили — наша копия станет новой версией при записи
+            return DiskChanges(None, [], [], Counter(), [], frozenset(), Counter(), self._skip(), self.seq)
+        changes = self._read_log(state)
+        if changes is None:
+            changes = self._read_csv(state)
+        return changes
+
+    def apply_changes(self, changes: DiskChanges) -> Optional[MergeResult]:
+        """Применить прочитанные read_changes изменения к таблице."""
+        self._applying = True
+        try:
+            merged = self._apply(changes)
+        finally:
+            self._applying = False
+        self.state = changes.state
+        self.base = changes.base
+        self._base_skip = changes.base_skip
+        self.seq = changes.seq
+        if not any(merged[:2]) and not merged.columns:
+            return None
+        return merged
+
+    def _read_log(self, state) -> Optional[DiskChanges]:
+        """
+        Построчное слияние по журналу: возможно, если записи журнала непрерывно ведут
+        от нашей версии файла к текущей. Иначе None — нужно читать CSV.
+        """
+        skip = self._skip()
+        if skip != self._base_skip:
+            return None  # ключи base посчитаны по другому набору вычисляемых столбцов
+        records, complete = self.log.read_since(self.seq)
+        if not complete or not records or records[0].get("prev") != list(self.state or []) \
+                or records[-1].get("state") != list(state):
+            return None
+        for prev, rec in zip(records, records[1:]):
+            if rec.get("prev") != prev.get("state"):
+                return None
+        if any(rec.get("op") != "rows" for rec in records):
+            return None
+        added_by_key: Dict[int, List[Dict[str, str]]] = {}
+        removed: Counter = Counter()
+        removed_rows: List[Dict[str, str]] = []
+        for rec in records:
+            for row in rec["removed"]:
+                k = dict_key(row, skip)
+                if added_by_key.get(k):
+                    # строку добавили и удалили в пределах прочитанных записей
+                    added_by_key[k].pop()
+                else:
+                    removed[k] += 1
+                    removed_rows.append(row)
+            for row in rec["added"]:
+                added_by_key.setdefault(dict_key(row, skip), []).append(row)
+        added = [r for rows in added_by_key.values() for r in rows]
+        columns = list(dict.fromkeys(h for row in added for h in row))
+        base = self.base - removed
+        base.update(dict_key(r, skip) for r in added)
+        return DiskChanges(state, columns, added, removed, removed_rows, skip, base, skip, records[-1]["seq"])
+
+    def _read_csv(self, state) -> DiskChanges:
+        """Полное слияние: чтение файла и сравнение мультимножеств строк."""
+        seq = self.log.last_seq()
+        headers, rows = read_csv(self.filename)
+        # сравнение с base — по тем же столбцам, по которым посчитана base
+        skip = self._base_skip
+        disk_rows: Dict[int, List[List[str]]] = {}
+        disk = Counter()
+        for r in rows:
+            k = row_key(headers, r, skip)
+            disk[k] += 1
+            disk_rows.setdefault(k, []).append(r)
+        added = []
+        for k, count in (disk - self.base).items():
+            added.extend(row_dict(headers, r) for r in disk_rows[k][-count:])
+        base_skip = self._skip()
+        base = disk if base_skip == skip else self._keys(headers, rows, base_skip)
+        return DiskChanges(state, headers, added, self.base - disk, [], skip, base, base_skip, seq)
+
+    def _apply(self, changes: DiskChanges) -> MergeResult:
+        table = self.table
+        added, removed, skip = changes.added, changes.removed, changes.skip
+        new_cols = [h for h in changes.columns if h not in table.headers]
+        # столбцы, появившиеся у другой стороны, добавляем себе
+        for h in new_cols:
+            table.add_column(h)
+        self._headers.extend(new_cols)
+        # удалённые другой стороной строки: по ID — сразу, остальные ищем у себя по ключу
+        deleted = 0
+        if removed:
+            want = Counter(removed)
+            drop = set()
+            if table.id_column:
+                for row in changes.removed_rows:
+                    i = table.slot(row.get(table.id_column, ""))
+                    k = dict_key(row, skip)
+                    # строку, которую мы успели изменить у себя, не трогаем
+                    if i is not None and i not in drop and want[k] > 0 \
+                            and row_key(table.headers, table.rows[i], skip) == k:
+                        want[k] -= 1
+                        drop.add(i)
+            if +want:
+                for i, r in enumerate(table.rows):
+                    k = row_key(table.headers, r, skip)
+                    if want.get(k, 0) > 0 and i not in drop:
+                        want[k] -= 1
+                        drop.add(i)
+            deleted = table.delete(drop)
+        # добавленные другой стороной строки дописываем
+        table.extend([[r.get(h, "") for h in table.headers] for r in added])
+        return MergeResult(len(added), deleted, new_cols)
@@ -0,0 +1,208 @@
+"""
+Кэш перестановок сортировки.
+- Порядок строк по набору ключей [(столбец, по_убыванию), ...] хранится как массив
+  номеров строк; сами строки (self.rows / table_of_TODO._rows) не переставляются.
+- Вставка/правка обновляют кэш бинарной вставкой, удаление — сдвигом номеров; большие
+  пакеты вставок и правок сбрасывают порядок (он строится заново при запросе).
+- Правка строки трогает только кэши, в ключах которых есть изменённый столбец.
+"""
+import bisect
+from array import array
+from collections import OrderedDict
+from functools import cmp_to_key
+from typing import List, Optional, Sequence, Tuple
+
+from todo_schema import TypedColumns
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+SortKeys = Tuple[Tuple[str, bool], ...]
+
+# сколько разных порядков держать в памяти одновременно
+MAX_CACHED_ORDERS = 8
+# при массовой вставке дешевле перестроить порядок заново, чем вставлять по одной
+BULK_INSERT_REBUILD = 1000
+
+
+def _base_order(col) -> List[int]:
+    """Номера строк по возрастанию значения столбца, пустые — в конце."""
+    ct = col.ctype
+    vals = col.values
+    n = len(vals)
+    if ct.name == "text":
+        keys = [v.lower() for v in vals]
+    elif ct.name == "float":
+        keys = [float("inf") if v != v else v for v in vals]
+    else:
+        keys = vals
+    order = sorted(range(n), key=keys.__getitem__)
+    # пустые значения (NULL_INT / "" / inf) переносим в конец, сохраняя устойчивость
+    is_null = ct.is_null
+    nulls = [i for i in order if is_null(vals[i])]
+    if nulls:
+        drop = set(nulls)
+        order = [i for i in order if i not in drop] + nulls
+    return order
+
+
+def _ranks(col, order: Sequence[int], desc: bool) -> List[int]:
+    """Плотные ранги строк по готовому порядку; пустые получают наибольший ранг."""
+    vals = col.values
+    is_null = col.ctype.is_null
+    text = col.ctype.name == "text"
+    ranks = [0] * len(vals)
+    rank = 0
+    prev = object()
+    nonnull = 0
+    for i in order:
+        v = vals[i]
+        if is_null(v):
+            break
+        k = v.lower() if text else v
+        if k != prev:
+            rank += 1
+            prev = k
+        ranks[i] = rank
+        nonnull += 1
+    top = rank + 1
+    if desc:
+        for i in order[:nonnull]:
+            ranks[i] = top - ranks[i]
+    for i in order[nonnull:]:
+        ranks[i] = top
+    return ranks
+
+
+class SortCache(TableListener):
+    """Кэш перестановок по наборам ключей с инкрементальным обновлением."""
+
+    def __init__(self, table: TaskTable, typed: TypedColumns):
+        self.table = table
+        self.typed = typed
+        self._orders: "OrderedDict[SortKeys, array]" = OrderedDict()
+        self._cols = {}
+        table.add_listener(self)
+
+    # -------------------- построение --------------------
+    def order(self, keys: Sequence[Tuple[str, bool]]) -> Optional[array]:
+        """Перестановка строк для ключей; None — порядок хранения."""
+        keys = tuple((h, bool(d)) for h, d in keys if h in self.typed.columns)
+        if not keys:
+            return None
+        perm = self._orders.get(keys)
+        if perm is None:
+            perm = self._build(keys)
+            self._orders[keys] = perm
+            while len(self._orders) > MAX_CACHED_ORDERS:
+                self._orders.popitem(last=False)
+        else:
+            self._orders.move_to_end(keys)
+        return perm
+
+    def _build(self, keys: SortKeys) -> array:
+        for h, _ in keys:
+            self._cols[h] = self.typed.column(h)
+        if len(keys) == 1 and not keys[0][1]:
+            return array("q", _base_order(self.typed.column(keys[0][0])))
+        # составной порядок: устойчивые сортировки по рангам, начиная с последнего ключа
+        order = list(range(len(self.table.rows)))
+        for h, desc in reversed(keys):
+            col = self.typed.column(h)
+            base = self._orders.get(((h, False),))
+            if base is None:
+                base = _base_order(col)
+            order.sort(key=_ranks(col, base, desc).__getitem__)
+        return array("q", order)
+
+    def value_range(self, header: str, lo=None, hi=None):
+        """
+        Границы [start, stop) в порядке по возрастанию header для значений lo <= v <= hi
+        (значения уже разобраны типом столбца). Возвращает (перестановка, start, stop).
+        """
+        perm = self.order([(header, False)])
+        col = self.typed.column(header)
+        vals = col.values
+        is_null = col.ctype.is_null
+        # пустые значения лежат в конце перестановки
+        nonnull = bisect.bisect_left(perm, True, key=lambda i: is_null(vals[i]))
+        start = 0 if lo is None else bisect.bisect_left(perm, lo, 0, nonnull, key=vals.__getitem__)
+        stop = nonnull if hi is None else bisect.bisect_right(perm, hi, start, nonnull, key=vals.__getitem__)
+        return perm, start, stop
+
+    # -------------------- сравнение для вставки --------------------
+    def _cmp_key(self, keys: SortKeys):
+        cols = [(self.typed.column(h), desc) for h, desc in keys]
+
+        def cmp(i: int, j: int) -> int:
+            for col, desc in cols:
+                a = col.key(i)
+                b = col.key(j)
+                if a == b:
+                    continue
+                if a[0] != b[0]:
+                    return -1 if a[0] < b[0] else 1  # пустые всегда в конце
+                lt = a[1] < b[1]
+                if desc:
+                    lt = not lt
+                return -1 if lt else 1
+            return 0
+
+        return cmp_to_key(cmp)
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self._orders.clear()
+        self._cols = {}
+
+    def on_columns(self, table: TaskTable) -> None:
+        # сбрасываем только порядки по исчезнувшим столбцам или столбцам со сменённым типом
+        for keys in list(self._orders):
+            for h, _ in keys:
+                if self.typed.columns.get(h) is not self._cols.get(h):
+                    del self._orders[keys]
+                    break
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        if count > BULK_INSERT_REBUILD:
+            self._orders.clear()
+            return
+        for keys, perm in self._orders.items():
+            kf = self._cmp_key(keys)
+            for i in range(start, start + count):
+                bisect.insort_right(perm, i, key=kf)
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        row = table.rows[idx]
+        changed = {h for ci, h in enumerate(table.headers) if ci >= len(old_row) or old_row[ci] != row[ci]}
+        for keys, perm in self._orders.items():
+            if not any(h in changed for h, _ in keys):
+                continue
+            perm.remove(idx)
+            bisect.insort_right(perm, idx, key=self._cmp_key(keys))
+
+    def on_update_many(self, table: TaskTable, indices: List[int], old_rows: List[List[str]]) -> None:
+        changed = []
+        for idx, old_row in zip(indices, old_rows):
+            row = table.rows[idx]
+            changed.append({h for ci, h in enumerate(table.headers) if ci >= len(old_row) or old_row[ci] != row[ci]})
+        for keys in list(self._orders):
+            moved = [idx for idx, hs in zip(indices, changed) if any(h in hs for h, _ in keys)]
+            if not moved:
+                continue
+            if len(moved) > BULK_INSERT_REBUILD:
+                del self._orders[keys]  # построится заново при следующем запросе
+                continue
+            # сначала убираем все изменённые строки: остаток упорядочен по новым значениям
+            drop = set(moved)
+            perm = array("q", (i for i in self._orders[keys] if i not in drop))
+            kf = self._cmp_key(keys)
+            for idx in moved:
+                bisect.insort_right(perm, idx, key=kf)
+            self._orders[keys] = perm
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        # старый номер -> новый (удалённые -> -1), таблица строится срезами
+        renumber = indices.renumber(len(table.rows) + len(indices))
+        for keys in list(self._orders):
+            perm = self._orders[keys]
+            self._orders[keys] = array("q", (n for n in (renumber[p] for p in perm) if n >= 0))
@@ -0,0 +1,152 @@
+"""
+Статистика по столбцам для вывода: максимальная ширина, число пустых значений и
+оценка числа различных значений. Обновляется инкрементально при каждом изменении,
+поэтому терминальный вывод и автоподбор ширины в GUI не сканируют данные.
+"""
+import math
+from collections import Counter
+from typing import Dict, List
+
+from todo_render import MAX_COL_WIDTH, display_width
+from todo_intervals import IntervalSet
+from todo_store import TableListener, TaskTable
+
+# HyperLogLog с 2**8 регистрами: погрешность оценки около 6%
+_HLL_P = 8
+_HLL_M = 1 << _HLL_P
+_HLL_ALPHA = 0.7213 / (1 + 1.079 / _HLL_M)
+
+
+class DistinctSketch:
+    """Оценка числа различных значений (HyperLogLog). Удаления не учитываются."""
+
+    def __init__(self):
+        self.registers = bytearray(_HLL_M)
+
+    def add(self, value: str) -> None:
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        j = h & (_HLL_M - 1)
+        w = h >> _HLL_P
+        rank = (64 - _HLL_P) - w.bit_length() + 1
+        if rank > self.registers[j]:
+            self.registers[j] = rank
+
+    def estimate(self) -> int:
+        z = sum(2.0 ** -r for r in self.registers)
+        e = _HLL_ALPHA * _HLL_M * _HLL_M / z
+        zeros = self.registers.count(0)
+        if e <= 2.5 * _HLL_M and zeros:
+            e = _HLL_M * math.log(_HLL_M / zeros)
+        return int(round(e))
+
+
+class ColumnStat:
+    """Статистика одного столбца."""
+
+    def __init__(self, header: str):
+        self.header_width = display_width(header)
+        self.widths: Counter = Counter()  # ширина значения -> сколько раз встречается
+        self.max_width = 0
+        self.nulls = 0
+        self.count = 0
+        self.sketch = DistinctSketch()
+        self.deleted = 0  # удалений с последней перестройки оценки различных
+
+    def add(self, value: str) -> None:
+        w = display_width(value)
+        self.widths[w] += 1
+        if w > self.max_width:
+            self.max_width = w
+        if not value.strip():
+            self.nulls += 1
+        self.count += 1
+        self.sketch.add(value)
+
+    def remove(self, value: str) -> None:
+        w = display_width(value)
+        self.widths[w] -= 1
+        if self.widths[w] <= 0:
+            del self.widths[w]
+            if w == self.max_width:
+                # максимум ушёл — берём следующий по гистограмме ширин
+                self.max_width = max(self.widths, default=0)
+        if not value.strip():
+            self.nulls -= 1
+        self.count -= 1
+        self.deleted += 1
+
+    @property
+    def display_width(self) -> int:
+        return max(self.header_width, self.max_width)
+
+
+class ColumnStats(TableListener):
+    """Слушатель TaskTable, поддерживающий ColumnStat для каждого столбца."""
+
+    def __init__(self, table: TaskTable):
+        self.table = table
+        self.columns: Dict[str, ColumnStat] = {}
+        table.add_listener(self)
+
+    def _rebuild(self, headers: List[str]) -> None:
+        for h in headers:
+            stat = ColumnStat(h)
+            ci = self.table.headers.index(h)
+            for row in self.table.rows:
+                stat.add(row[ci])
+            self.columns[h] = stat
+
+    # -------------------- TableListener --------------------
+    def on_reset(self, table: TaskTable) -> None:
+        self.columns = {}
+        self._rebuild(table.headers)
+
+    def on_columns(self, table: TaskTable) -> None:
+        # пересчитываются только новые столбцы
+        self.columns = {h: s for h, s in self.columns.items() if h in table.headers}
+        self._rebuild([h for h in table.headers if h not in self.columns])
+
+    def on_insert(self, table: TaskTable, start: int, count: int) -> None:
+        for ci, h in enumerate(table.headers):
+            stat = self.columns[h]
+            for row in table.rows[start:start + count]:
+                stat.add(row[ci])
+
+    def on_update(self, table: TaskTable, idx: int, old_row: List[str]) -> None:
+        row = table.rows[idx]
+        for ci, h in enumerate(table.headers):
+            old = old_row[ci] if ci < len(old_row) else ""
+            if old != row[ci]:
+                self.columns[h].remove(old)
+                self.columns[h].add(row[ci])
+
+    def on_delete(self, table: TaskTable, indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        for ci, h in enumerate(table.headers):
+            stat = self.columns[h]
+            for row in old_rows:
+                stat.remove(row[ci] if ci < len(row) else "")
+
+    # -------------------- доступ --------------------
+    def widths(self, headers: List[str], max_width: int = MAX_COL_WIDTH) -> List[int]:
+        """Ширины столбцов для терминального вывода (с ограничением max_width)."""
+        return [min(self.columns[h].display_width, max(max_width, self.columns[h].header_width)) for h in headers]
+
+    def distinct(self, header: str) -> int:
+        stat = self.columns[header]
+        if stat.deleted > stat.count:
+            # после массовых удалений оценка сильно завышена — перестраиваем
+            self._rebuild([header])
+            stat = self.columns[header]
+        return min(stat.sketch.estimate(), stat.count)
+
+    def summary(self) -> List[Dict[str, object]]:
+        out = []
+        for h in self.table.headers:
+            stat = self.columns[h]
+            out.append({
+                "column": h,
+                "width": stat.max_width,
+                "empty": stat.nulls,
+                "distinct": self.distinct(h),
+            })
+        return out
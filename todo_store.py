@@ -0,0 +1,307 @@
+"""
+Общее хранилище строк задач для CLI и GUI.
+- Строки хранятся как списки строк (как раньше), порядок вставки не меняется.
+- Все изменения идут через методы TaskTable, чтобы производные структуры
+  (типизированные колонки, индексы, статистика) обновлялись инкрементально.
+- Если задан id_column, у каждой строки есть постоянный уникальный ID (хранится в
+  файле как обычный столбец) и словарь ID -> номер строки: поиск, правка и удаление
+  по ID не зависят от сортировки, фильтра и чужих изменений.
+"""
+import hashlib
+import secrets
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from todo_intervals import IntervalSet
+
+DEFAULT_HEADERS = ["Time: ", "TODO list:", "Comments: "]
+ID_COLUMN = "ID"
+# после стольких интервалов удалённых строк словарь ID перестраивается
+TOMBSTONE_RANGES = 4096
+
+
+def new_id() -> str:
+    """Случайный ID из 8 hex-символов; чисто цифровые не выдаются, чтобы не путать с номером строки."""
+    while True:
+        tid = secrets.token_hex(4)
+        if not tid.isdigit():
+            return tid
+
+
+def legacy_id(row: List[str], n: int) -> str:
+    """
+    ID для строки из файла без ID: выводится из содержимого (n — номер повтора такой же
+    строки), поэтому процессы, открывшие один и тот же старый файл, получают одинаковые ID.
+    """
+    digest = hashlib.blake2s("\x1f".join(row).encode("utf-8") + b"#%d" % n, digest_size=4).hexdigest()
+    return digest if not digest.isdigit() else "x" + digest[1:]
+
+
+class TableListener:
+    """Базовый слушатель изменений таблицы. Все методы необязательны."""
+
+    def on_reset(self, table: "TaskTable") -> None:
+        pass
+
+    def on_insert(self, table: "TaskTable", start: int, count: int) -> None:
+        self.on_reset(table)
+
+    def on_update(self, table: "TaskTable", idx: int, old_row: List[str]) -> None:
+        self.on_reset(table)
+
+    def on_update_many(self, table: "TaskTable", indices: List[int], old_rows: List[List[str]]) -> None:
+        """Пакет правок (update_many): indices — номера строк по возрастанию, old_rows — прежние строки."""
+        for idx, old_row in zip(indices, old_rows):
+            self.on_update(table, idx, old_row)
+
+    def on_delete(self, table: "TaskTable", indices: IntervalSet, old_rows: List[List[str]]) -> None:
+        """indices — удалённые номера (старые, по возрастанию), old_rows — строки в том же порядке."""
+        self.on_reset(table)
+
+    def on_columns(self, table: "TaskTable") -> None:
+        self.on_reset(table)
+
+
+class TaskTable:
+    """Заголовки + строки + список слушателей."""
+
+    def __init__(self, headers: Optional[List[str]] = None, rows: Optional[List[List[str]]] = None,
+                 id_column: Optional[str] = None):
+        self.headers: List[str] = list(headers) if headers else list(DEFAULT_HEADERS)
+        self.rows: List[List[str]] = rows if rows is not None else []
+        self.version = 0
+        self._listeners: List[TableListener] = []
+        self.id_column = id_column
+        self._slots: Dict[str, int] = {}  # ID -> номер строки (без учёта _tombstones)
+        # удалённые строки в нумерации _slots: удаление не перенумеровывает словарь,
+        # номер строки = номер в словаре минус число удалённых перед ним
+        self._tombstones = IntervalSet()
+        self._dups: Dict[str, List[int]] = {}  # ID нескольких строк -> их номера в словаре
+        # ComputedColumns (todo_computed) заполняет вычисляемые ячейки до уведомления слушателей
+        self.computed = None
+        if id_column:
+            self._ensure_ids()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # -------------------- слушатели --------------------
+    def add_listener(self, listener: TableListener) -> TableListener:
+        self._listeners.append(listener)
+        listener.on_reset(self)
+        return listener
+
+    def remove_listener(self, listener: TableListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, method: str, *args) -> None:
+        self.version += 1
+        for listener in list(self._listeners):
+            getattr(listener, method)(self, *args)
+
+    # -------------------- ID строк --------------------
+    def _ensure_ids(self) -> None:
+        """Столбец ID и ID у всех строк (после загрузки), словарь строится заново."""
+        if self.id_column not in self.headers:
+            self.headers.append(self.id_column)
+            for row in self.rows:
+                row.append("")
+        ci = self.headers.index(self.id_column)
+        seen: Dict[str, int] = {}
+        for row in self.rows:
+            if not row[ci]:
+                key = "\x1f".join(row)
+                seen[key] = seen.get(key, 0) + 1
+                row[ci] = legacy_id(row, seen[key])
+        self._reindex()
+
+    def _index_from(self, start: int) -> None:
+        """Строки с start — в словарь ID (start — конец таблицы или 0 при полной перестройке)."""
+        ci = self.headers.index(self.id_column)
+        # новые строки — после всех удалённых, их номер в словаре больше на число удалённых
+        shift = len(self._tombstones)
+        for i in range(start, len(self.rows)):
+            row = self.rows[i]
+            pos = i + shift
+            if not row[ci]:
+                tid = new_id()
+                while tid in self._slots:
+                    tid = new_id()
+                row[ci] = tid
+            elif row[ci] in self._slots:
+                # один ID у двух строк: обе версии строки после конфликта правок в разных окнах
+                self._dups.setdefault(row[ci], [self._slots[row[ci]]]).append(pos)
+            self._slots[row[ci]] = pos
+
+    def _reindex(self) -> None:
+        self._slots, self._tombstones, self._dups = {}, IntervalSet(), {}
+        self._index_from(0)
+
+    def slot(self, task_id: str) -> Optional[int]:
+        """Номер строки по ID или None."""
+        pos = self._slots.get(task_id)
+        if pos is None or not self._tombstones:
+            return pos
+        return pos - self._tombstones.rank(pos)
+
+    def id_of(self, idx: int) -> str:
+        if not self.id_column:
+            return ""
+        return self.rows[idx][self.headers.index(self.id_column)]
+
+    # -------------------- строки --------------------
+    def _fit(self, row: Iterable) -> List[str]:
+        """Приводит строку к длине заголовков, значения — к str."""
+        vals = ["" if v is None else str(v) for v in row]
+        n = len(self.headers)
+        if len(vals) < n:
+            vals.extend([""] * (n - len(vals)))
+        return vals[:n]
+
+    def reset(self, headers: List[str], rows: List[List[str]]) -> None:
+        """Полная замена содержимого (загрузка файла, импорт)."""
+        self.headers = list(headers)
+        n = len(self.headers)
+        # список строк принимается как есть (без копии), неровные строки выравниваются на месте
+        for i, r in enumerate(rows):
+            if len(r) != n or not all(isinstance(v, str) for v in r):
+                rows[i] = self._fit(r)
+        self.rows = rows
+        if self.id_column:
+            self._ensure_ids()
+        if self.computed is not None:
+            self.computed.fill_all()
+        self._notify("on_reset")
+
+    def clear(self) -> None:
+        self.reset(self.headers, [])
+
+    def _new_row(self, row: Iterable) -> List[str]:
+        vals = self._fit(row)
+        if self.computed is not None:
+            self.computed.fill(vals, None)
+        return vals
+
+    def append(self, row: Iterable) -> int:
+        self.rows.append(self._new_row(row))
+        idx = len(self.rows) - 1
+        if self.id_column:
+            self._index_from(idx)
+        self._notify("on_insert", idx, 1)
+        return idx
+
+    def extend(self, rows: Iterable[Iterable]) -> int:
+        start = len(self.rows)
+        self.rows.extend(self._new_row(r) for r in rows)
+        count = len(self.rows) - start
+        if count:
+            if self.id_column:
+                self._index_from(start)
+            self._notify("on_insert", start, count)
+        return count
+
+    def update(self, idx: int, row: Iterable) -> None:
+        old = self.rows[idx]
+        new = self._fit(row)
+        if self.id_column:
+            ci = self.headers.index(self.id_column)
+            new[ci] = old[ci]  # ID строки не меняется
+        if self.computed is not None:
+            self.computed.fill(new, old)
+        self.rows[idx] = new
+        self._notify("on_update", idx, old)
+
+    def update_many(self, updates: Iterable[Tuple[int, Iterable]]) -> int:
+        """
+        Правка многих строк (пары номер -> новая строка) с одним уведомлением слушателей.
+        Для повторного номера берётся последняя строка. Возвращает число изменённых строк.
+        """
+        new_rows = dict(updates)
+        if not new_rows:
+            return 0
+        indices = sorted(new_rows)
+        ci = self.headers.index(self.id_column) if self.id_column else None
+        old_rows = []
+        for idx in indices:
+            old = self.rows[idx]
+            new = self._fit(new_rows[idx])
+            if ci is not None:
+                new[ci] = old[ci]
+            if self.computed is not None:
+                self.computed.fill(new, old)
+            self.rows[idx] = new
+            old_rows.append(old)
+        self._notify("on_update_many", indices, old_rows)
+        return len(indices)
+
+    def delete(self, indices: Union[IntervalSet, Iterable[int]]) -> int:
+        """
+        Удаляет строки по 0-based индексам (или интервалам). Строки сдвигаются одним
+        проходом срезов, диапазон не разворачивается в отдельные номера. Возвращает число удалённых.
+        """
+        if not isinstance(indices, IntervalSet):
+            indices = IntervalSet.of(indices)
+        removed = indices.clip(0, len(self.rows))
+        if not removed:
+            return 0
+        old_rows = [r for a, b in removed.ranges() for r in self.rows[a:b]]
+        self.rows[:] = removed.compact(self.rows)
+        if self.id_column:
+            ci = self.headers.index(self.id_column)
+            # удалённые строки — в нумерации словаря; остальные записи словаря не трогаются
+            dead = self._tombstones.expand(removed)
+            for pos, r in zip(dead, old_rows):
+                tid = r[ci]
+                copies = self._dups.get(tid)
+                if copies is None:
+                    del self._slots[tid]
+                    continue
+                # у ID осталась другая копия: словарь указывает на последнюю
+                copies.remove(pos)
+                self._slots[tid] = copies[-1]
+                if len(copies) == 1:
+                    del self._dups[tid]
+            self._tombstones = self._tombstones.union(dead)
+            if self._tombstones.range_count() > TOMBSTONE_RANGES:
+                self._reindex()
+        self._notify("on_delete", removed, old_rows)
+        return len(removed)
+
+    # -------------------- столбцы --------------------
+    def _columns_notify(self, added: Iterable[str] = ()) -> None:
+        # вычисляемые столбцы пересчитаны заново: если это не только что добавленные
+        # столбцы, значения существующих изменились — слушатели перестраиваются целиком
+        if self.computed is not None and self.computed.columns_changed() - set(added):
+            self._notify("on_reset")
+        else:
+            self._notify("on_columns")
+
+    def add_column(self, name: str, default: str = "") -> None:
+        self.headers.append(name)
+        for row in self.rows:
+            row.append(default)
+        self._columns_notify([name])
+
+    def columns_changed(self) -> None:
+        """Сообщить слушателям, что изменилось описание столбцов (например, тип)."""
+        self._columns_notify()
+
+    def delete_columns(self, names: Iterable[str]) -> List[str]:
+        removed = [n for n in names if n in self.headers and n != self.id_column]
+        if not removed:
+            return []
+        keep = [i for i, h in enumerate(self.headers) if h not in removed]
+        self.headers = [self.headers[i] for i in keep]
+        for j, row in enumerate(self.rows):
+            self.rows[j] = [row[i] if i < len(row) else "" for i in keep]
+        self._columns_notify()
+        return removed
+
+    def reorder_columns(self, order: List[str]) -> None:
+        if sorted(order) != sorted(self.headers):
+            raise ValueError("Неверный порядок столбцов")
+        pos = [self.headers.index(h) for h in order]
+        self.headers = list(order)
+        for j, row in enumerate(self.rows):
+            self.rows[j] = [row[i] if i < len(row) else "" for i in pos]
+        self._columns_notify()
@@ -0,0 +1,104 @@
+"""
+Сторож главного потока GUI: находит обработчики, из-за которых «зависает» окно.
+- Главный поток по таймеру (heartbeat) отмечает, что цикл событий жив; задержка
+  сверх интервала таймера — время, на которое цикл событий был занят.
+- Фоновый поток проверяет отметки. Если главный поток молчит дольше порога, поток
+  снимает его стек (sys._current_frames) и повторяет снимки, пока зависание длится.
+- Когда главный поток оживает, в журнал (JSON Lines) пишется событие: время, длительность
+  и самый частый стек среди снимков — то место, где главный поток провёл больше всего времени.
+Сторож не зависит от Qt: beat() вызывается таймером GUI.
+"""
+import datetime
+import json
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from todo_metrics import metrics
+
+# зависание — главный поток молчит дольше этого (секунды)
+STALL_THRESHOLD = 0.25
+# период heartbeat-таймера главного потока (секунды)
+HEARTBEAT_INTERVAL = 0.1
+# сколько кадров стека (ближайших к месту остановки) сохраняется
+STACK_DEPTH = 25
+STALL_LOG = "todo_stalls.jsonl"
+
+
+def format_stack(frame) -> Tuple[str, ...]:
+    """Стек кадра как строки 'файл:строка функция', от внешнего вызова к месту остановки."""
+    summary = traceback.extract_stack(frame)[-STACK_DEPTH:]
+    return tuple(f"{fs.filename}:{fs.lineno} {fs.name}" for fs in summary)
+
+
+class StallWatchdog:
+    """Фоновый поток, который следит за heartbeat главного потока."""
+
+    def __init__(self, log_path: str = STALL_LOG, threshold: float = STALL_THRESHOLD,
+                 interval: float = HEARTBEAT_INTERVAL):
+        self.log_path = log_path
+        self.threshold = threshold
+        self.interval = interval
+        self.main_ident = threading.main_thread().ident
+        self.stalls: List[dict] = []  # события этого запуска
+        self._last = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def beat(self) -> None:
+        """Вызывается таймером в главном потоке."""
+        now = time.monotonic()
+        metrics.observe("gui.loop_latency", max(0.0, now - self._last - self.interval))
+        self._last = now
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._last = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _sample(self) -> Optional[Tuple[str, ...]]:
+        frame = sys._current_frames().get(self.main_ident)
+        return format_stack(frame) if frame is not None else None
+
+    def _run(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            last = self._last
+            if time.monotonic() - last - self.interval < self.threshold:
+                continue
+            # главный поток занят: снимаем стек, пока не придёт следующий heartbeat
+            samples: Counter = Counter()
+            while self._last == last and not self._stop.is_set():
+                stack = self._sample()
+                if stack:
+                    samples[stack] += 1
+                self._stop.wait(poll)
+            if self._last != last:
+                self._report(self._last - last - self.interval, samples)
+
+    def _report(self, duration: float, samples: Counter) -> None:
+        metrics.observe("gui.stall", duration)
+        stack, hits = samples.most_common(1)[0] if samples else ((), 0)
+        event = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration * 1000, 1),
+            "samples": sum(samples.values()),
+            "hot_samples": hits,
+            "stack": list(stack),
+        }
+        self.stalls.append(event)
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            metrics.incr("gui.stall.log_failed")
@@ -5,19 +5,26 @@
 - Поддержка автосохранения, CSV/JSON, добавления столбцов, поиска, простых анимаций.
 - Небольшие оптимизации для минимального потребления ресурсов.
 """
-import csv
-import json
+import bisect
+import datetime
+import multiprocessing
 import os
 import re
 import sys
-from typing import List, Set
+import threading
+import time
+from array import array
+from typing import List
 
-from PyQt6.QtCore import QPoint, QPropertyAnimation, Qt, QTimer
-from PyQt6.QtGui import QBrush, QColor, QFont
+from PyQt6.QtCore import (
+    QAbstractProxyModel, QAbstractTableModel, QModelIndex, QObject, QPoint, QPropertyAnimation, Qt, QTimer, pyqtSignal,
+)
+from PyQt6.QtGui import QBrush, QColor, QFont, QFontMetrics
 from PyQt6.QtWidgets import (
     QAbstractItemView,
     QApplication,
     QCheckBox,
+    QComboBox,
     QDialog,
     QDialogButtonBox,
     QFileDialog,
@@ -34,16 +41,59 @@ from PyQt6.QtWidgets import (
     QMenu,
     QMessageBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QStyle,
+    QSystemTrayIcon,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
+from todo_aggregates import HOURS, Aggregates
+from todo_archive import Archive, move_to_archive, select_for_archive
+from todo_bulk import OPERATIONS_HELP, apply_bulk, describe_errors, parse_operation, plan_bulk, preview
+from todo_calendar import CalendarIndex
+from todo_computed import TICK_MS, ComputedColumns
+from todo_dedupe import DedupeIndex, merge_records, resolve_key
+from todo_diff import FileDiff, diff_files, diff_table
+from todo_feed import FEED_SUFFIX, ChangeFeed
+from todo_intervals import IntervalSet, parse_ranges
+from todo_io import (
+    CSV_EXTS,
+    JSON_EXTS,
+    committer,
+    iter_records,
+    list_data_files,
+    read_csv,
+    read_json,
+    split_compression,
+    write_csv,
+    write_json,
+)
+from todo_metrics import metrics
+from todo_mirror import MirrorSync, verify_mirror
+from todo_parallel import read_csv_parallel
+from todo_query import QueryEngine, QueryError
+from todo_schedule import REPEAT_COLUMN, ReminderScheduler, parse_rule
+from todo_schema import TYPE_NAMES, TypedColumns, load_schema, save_schema
+from todo_shared import SharedFile
+from todo_sort import SortCache
+from todo_stats import ColumnStats
+from todo_store import ID_COLUMN, TaskTable
+from todo_watchdog import HEARTBEAT_INTERVAL, StallWatchdog
+
 # Lightweight styling
 APP_TITLE = "Task Manager (PyQt6) — Enhanced"
 AUTOSAVE = True
 AUTOSAVE_FILE = "tasks_autosave.csv"
+# надёжность автосохранения: "none", "batched" (групповой fsync раз в секунду), "every-op"
+DURABILITY = "batched"
+
+# каталог зеркала: таблица в CSV и JSON по разделам, после изменений переписываются только
+# изменённые разделы (или запуск с --mirror <каталог>); None — зеркала нет
+MIRROR_DIR = None
+
+# сторож зависаний главного потока: журнал todo_stalls.jsonl (или запуск с --watchdog)
+WATCHDOG = False
 
 # default font sizes
 DEFAULT_FONT_POINT = 11
@@ -52,6 +102,27 @@ ITEM_FONT_POINT = 11
 
 BASIC_COLUMNS = ["Time: ", "TODO list:", "Comments: "]
 
+# предел ширины столбца при автоподборе (px)
+AUTOFIT_MAX_WIDTH = 480
+# задержка поиска при наборе текста (мс)
+SEARCH_DEBOUNCE_MS = 250
+# как часто проверять файл автосохранения на изменения из других процессов (мс)
+SHARED_POLL_MS = 2000
+# таймер напоминаний перезаводится не реже, чем раз в час (смена часов, сон компьютера)
+REMINDER_MAX_WAIT_MS = 60 * 60 * 1000
+# фильтры диалогов файлов: сжатые варианты открываются и сохраняются так же
+CSV_FILTER = "CSV Files (*.csv *.csv.gz *.csv.xz *.csv.bz2)"
+JSON_FILTER = "JSON Files (*.json *.jsonl *.json.gz *.jsonl.gz *.json.xz *.jsonl.xz *.json.bz2)"
+# виды по столбцу Date: (название, ключ)
+CALENDAR_VIEWS = [("Все дни", "all"), ("Сегодня", "day"), ("Неделя", "week"), ("Просроченные", "overdue")]
+# ширина панели сводки (px) и длина столбика гистограммы (символов)
+SUMMARY_WIDTH = 240
+SUMMARY_BAR = 16
+# сколько групп показывать по столбцу (самые частые значения)
+SUMMARY_LIMIT = 100
+# автозагрузка при запуске: строк, добавляемых в таблицу за один проход цикла событий
+LOAD_BATCH = 10000
+
 def check_time_format(time_str):
     """Проверяет формат времени 'HH:MM' (0-23, 0-59). Возвращает нормализованную строку или False."""
     if not isinstance(time_str, str):
@@ -67,12 +138,219 @@ def check_time_format(time_str):
     return f"{h:02d}:{mi:02d}"
 
 
+class TaskTableModel(QAbstractTableModel):
+    """
+    Модель над TaskTable: колонка No. + столбцы данных.
+    Порядок отображения задаётся перестановкой (order), self.rows физически не переставляется.
+    """
+
+    def __init__(self, store: TaskTable, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.order = None  # массив номеров строк или None (порядок хранения)
+        self.sort_keys = []  # [(столбец, по_убыванию), ...] для стрелок в заголовке
+        self.highlight = {}  # номер строки -> QColor (подсветка новых строк)
+        self._fg = QBrush(QColor(255, 255, 255))  # текст белый для тёмной темы
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store.headers) + 1
+
+    def row_at(self, view_row: int) -> int:
+        """Строка отображения -> индекс в self.rows."""
+        return self.order[view_row] if self.order is not None else view_row
+
+    def view_row_of(self, row: int) -> int:
+        """Индекс в self.rows -> строка отображения."""
+        if self.order is None:
+            return row
+        try:
+            return self.order.index(row)
+        except ValueError:
+            return -1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self.row_at(index.row())
+        c = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if c == 0:
+                return str(r + 1)  # номер строки в хранилище, не зависит от сортировки
+            row = self.store.rows[r]
+            return row[c - 1] if c - 1 < len(row) else ""
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._fg
+        if role == Qt.ItemDataRole.BackgroundRole:
+            color = self.highlight.get(r)
+            return QBrush(color) if color is not None else None
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            if section == 0:
+                return "No."
+            if section - 1 >= len(self.store.headers):
+                return None
+            h = self.store.headers[section - 1]
+            for n, (key, desc) in enumerate(self.sort_keys, start=1):
+                if key == h:
+                    arrow = "▼" if desc else "▲"
+                    return f"{h} {arrow}{n if len(self.sort_keys) > 1 else ''}"
+            return h
+        return super().headerData(section, orientation, role)
+
+    def set_order(self, order, keys):
+        """Сменить порядок без пересоздания данных (переключение сортировки)."""
+        self.layoutAboutToBeChanged.emit()
+        self.order = order
+        self.sort_keys = list(keys)
+        self.layoutChanged.emit()
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, self.columnCount() - 1)
+
+    def reset(self, order, keys):
+        self.beginResetModel()
+        self.order = order
+        self.sort_keys = list(keys)
+        self.endResetModel()
+
+    def apply_changes(self, changes, order, keys):
+        """
+        Применить изменения из ленты без сброса модели: выделение и прокрутка сохраняются.
+        Смена столбцов или полная замена таблицы — обычный сброс.
+        """
+        if changes is None or any(c["op"] in ("reset", "columns") for c in changes):
+            self.reset(order, keys)
+            return
+        if any(c["op"] == "delete" for c in changes):
+            self.highlight = {}  # номера строк сдвинулись
+        self.layoutAboutToBeChanged.emit()
+        self.order = order
+        self.sort_keys = list(keys)
+        self.layoutChanged.emit()
+
+    def row_changed(self, row: int):
+        v = self.view_row_of(row)
+        if v >= 0:
+            self.dataChanged.emit(self.index(v, 0), self.index(v, self.columnCount() - 1))
+
+
+class TaskFilterProxy(QAbstractProxyModel):
+    """
+    Фильтр поверх TaskTableModel: показывает только строки из множества hits.
+    Видимые строки — массив номеров строк модели; скрытие строк виджетом не используется.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hits = None  # множество индексов в self.rows или None (без фильтра)
+        self._rows = None  # массив строк исходной модели или None (все)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.layoutAboutToBeChanged.connect(lambda *_: self.layoutAboutToBeChanged.emit())
+        model.layoutChanged.connect(self._on_source_layout)
+        model.dataChanged.connect(self._on_source_data)
+        model.headerDataChanged.connect(self.headerDataChanged)
+        self._rebuild()
+
+    def _rebuild(self):
+        src = self.sourceModel()
+        if self.hits is None or src is None:
+            self._rows = None
+            return
+        hits = self.hits
+        if src.order is None:
+            n = len(src.store.rows)
+            self._rows = array("q", sorted(h for h in hits if h < n))
+        else:
+            self._rows = array("q", (v for v, r in enumerate(src.order) if r in hits))
+
+    def set_hits(self, hits):
+        self.beginResetModel()
+        self.hits = hits
+        self._rebuild()
+        self.endResetModel()
+
+    def _on_source_reset(self):
+        self._rebuild()
+        self.endResetModel()
+
+    def _on_source_layout(self, *_):
+        self._rebuild()
+        self.layoutChanged.emit()
+
+    def _on_source_data(self, top_left, bottom_right, roles=()):
+        for sv in range(top_left.row(), bottom_right.row() + 1):
+            v = self.proxy_row(sv)
+            if v >= 0:
+                self.dataChanged.emit(self.index(v, top_left.column()), self.index(v, bottom_right.column()))
+
+    # -------------------- отображение строк --------------------
+    def source_row(self, row: int) -> int:
+        return self._rows[row] if self._rows is not None else row
+
+    def proxy_row(self, source_row: int) -> int:
+        if source_row < 0 or self._rows is None:
+            return source_row
+        pos = bisect.bisect_left(self._rows, source_row)
+        return pos if pos < len(self._rows) and self._rows[pos] == source_row else -1
+
+    def visible_count(self) -> int:
+        return self.rowCount()
+
+    # -------------------- QAbstractProxyModel --------------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return len(self._rows) if self._rows is not None else self.sourceModel().rowCount()
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount()) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(proxy_index.row()), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        v = self.proxy_row(source_index.row())
+        return self.index(v, source_index.column()) if v >= 0 else QModelIndex()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        return None
+
+
 class RowDialog(QDialog):
-    def __init__(self, headers, values=None, parent=None, font=None):
+    def __init__(self, headers, values=None, parent=None, font=None, typed=None, computed=()):
         super().__init__(parent)
         self.setWindowTitle("Заполните поля")
         self.values = None
         self._headers = headers
+        self._typed = typed
         layout = QFormLayout(self)
 
         self.edits = []
@@ -80,6 +358,13 @@ class RowDialog(QDialog):
             le = QLineEdit()
             if values and i < len(values):
                 le.setText(str(values[i]))
+            if h == ID_COLUMN:
+                # ID выдаёт хранилище и не меняет
+                le.setReadOnly(True)
+                le.setPlaceholderText("выдаётся автоматически")
+            elif h in computed:
+                le.setReadOnly(True)
+                le.setPlaceholderText("вычисляется")
             layout.addRow(h, le)
             self.edits.append(le)
 
@@ -101,10 +386,129 @@ class RowDialog(QDialog):
             QMessageBox.warning(self, "Ошибка", "Неверный формат времени. Ожидается HH:MM (00-23, 00-59).")
             return
         vals[0] = norm
+        # проверка типизированных столбцов
+        if self._typed is not None:
+            bad = self._typed.validate_row(self._headers, vals)
+            if bad:
+                spec = self._typed.column(bad).ctype.spec
+                QMessageBox.warning(self, "Ошибка", f"Неверное значение в столбце '{bad}' (тип {spec}).")
+                return
+        if REPEAT_COLUMN in self._headers:
+            try:
+                parse_rule(vals[self._headers.index(REPEAT_COLUMN)])
+            except ValueError as e:
+                QMessageBox.warning(self, "Ошибка", str(e))
+                return
         self.values = vals
         super().accept()
 
 
+class HistoryDialog(QDialog):
+    """Просмотр и поиск по архиву: разделы читаются только при открытии диалога."""
+
+    def __init__(self, archive: Archive, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("История (архив)")
+        self.resize(900, 500)
+        self.archive = archive
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.partition_combo = QComboBox()
+        self.partition_combo.addItem("Все разделы", None)
+        for name in reversed(archive.partitions()):
+            self.partition_combo.addItem(name, name)
+        self.partition_combo.currentIndexChanged.connect(self.load)
+        top.addWidget(self.partition_combo)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("фильтр, как в основном поиске")
+        self.search_input.returnPressed.connect(self.on_search)
+        top.addWidget(self.search_input)
+        btn_search = QPushButton("Найти")
+        btn_search.clicked.connect(self.on_search)
+        top.addWidget(btn_search)
+        layout.addLayout(top)
+
+        self.store = TaskTable([])
+        self.typed = self.store.add_listener(TypedColumns())
+        self.query = QueryEngine(self.store, self.typed)
+        self.model = TaskTableModel(self.store, self)
+        self.proxy = TaskFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+        self.load()
+
+    def load(self, _=None):
+        name = self.partition_combo.currentData()
+        headers, rows = self.archive.load(None if name is None else [name])
+        self.store.reset(headers, rows)
+        self.model.reset(None, [])
+        self.on_search()
+
+    def on_search(self):
+        q = self.search_input.text().strip()
+        if not q:
+            self.proxy.set_hits(None)
+            self.status.setText(f"Задач в архиве: {len(self.store.rows)}")
+            return
+        try:
+            found = set(self.query.find(q))
+        except QueryError as e:
+            self.status.setText(f"Ошибка в запросе: {e}")
+            return
+        self.proxy.set_hits(found)
+        self.status.setText(f"Результатов: {self.proxy.visible_count()}")
+
+
+class DiffDialog(QDialog):
+    """Отчёт сравнения файлов: сводка и первые изменения. С confirm — кнопки «Сохранить»/«Отмена»."""
+
+    KINDS = {"added": "+ добавлена", "removed": "- удалена", "changed": "~ изменена"}
+
+    def __init__(self, result: FileDiff, title: str, confirm: bool = False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(900, 450)
+        layout = QVBoxLayout(self)
+        summary = QLabel(result.summary())
+        summary.setWordWrap(True)
+        layout.addWidget(summary)
+
+        self.store = TaskTable(["Изменение", "Задача", "Столбцы", "Было", "Стало"])
+        rows = []
+        for change in result.changes:
+            cols = change.columns
+            old = " | ".join(change.old.get(h, "") for h in cols) if cols else ""
+            new = " | ".join(change.new.get(h, "") for h in cols) if cols else ""
+            rows.append([self.KINDS[change.kind], change.key, ", ".join(h.strip() for h in cols), old, new])
+        self.store.reset(self.store.headers, rows)
+        self.model = TaskTableModel(self.store, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        total = result.counts["added"] + result.counts["removed"] + result.counts["changed"]
+        if total > len(rows):
+            layout.addWidget(QLabel(f"Показаны первые {len(rows)} из {total} изменений"))
+
+        if confirm:
+            btns = QDialogButtonBox(QDialogButtonBox.StandardButton.Save | QDialogButtonBox.StandardButton.Cancel)
+            btns.accepted.connect(self.accept)
+            btns.rejected.connect(self.reject)
+        else:
+            btns = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+            btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+
 class ColumnDeleteDialog(QDialog):
     """Диалог для выбора (множественного) удаляемых столбцов (кроме базовых)."""
 
@@ -185,15 +589,64 @@ class ReorderDialog(QDialog):
         self.accept()
 
 
+class AutoloadReader(QObject):
+    """
+    Чтение файла автосохранения в фоновом потоке: разбор CSV, схема и ID строк.
+    Результат передаётся в главный поток сигналом (очередь событий Qt).
+    """
+
+    finished = pyqtSignal(object)  # (заголовки, строки, схема) или исключение
+
+    def start(self, filename: str) -> None:
+        threading.Thread(target=self._run, args=(filename,), name="autoload", daemon=True).start()
+
+    def _run(self, filename: str) -> None:
+        try:
+            with metrics.timer("gui.autoload_read"):
+                hdrs, rows = read_csv_parallel(filename, BASIC_COLUMNS[0])
+                schema = load_schema(filename)
+                # выравнивание строк и ID из содержимого — здесь, а не в главном потоке;
+                # ID те же, что дала бы загрузка всего файла сразу
+                table = TaskTable(id_column=ID_COLUMN)
+                table.reset(hdrs or list(BASIC_COLUMNS), rows)
+            self.finished.emit((table.headers, table.rows, schema))
+        except Exception as e:
+            self.finished.emit(e)
+
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, started: float = None):
         super().__init__()
+        # время запуска для замеров до первой отрисовки и до готовности к работе
+        self._started = time.perf_counter() if started is None else started
+        self._first_paint = False
+        self._loading = False
+        self._pending = None  # строки автосохранения, ещё не добавленные в таблицу
         self.setWindowTitle(APP_TITLE)
         self.resize(1000, 650)
 
-        # реальные заголовки данных (без номера)
-        self.headers = ["Time: ", "TODO list:", "Comments: "]
-        self.rows = []  # list of lists
+        # реальные заголовки данных (без номера) и строки живут в общем хранилище
+        self.store = TaskTable(BASIC_COLUMNS, id_column=ID_COLUMN)
+        self.typed = self.store.add_listener(TypedColumns())
+        self.query = QueryEngine(self.store, self.typed)
+        self.sorter = SortCache(self.store, self.typed)
+        self.col_stats = ColumnStats(self.store)
+        # счётчики для панели сводки обновляются на каждом изменении, панель их только читает
+        self.aggregates = Aggregates(self.store)
+        self.sort_keys = []  # [(столбец, по_убыванию), ...], Shift+клик добавляет ключ
+        self._search_hits = None  # множество индексов строк, подходящих под поиск
+        self._last_query = None  # последний выполненный запрос (для уточнения поиска)
+        # файл автосохранения могут одновременно менять другие окна CLI и GUI
+        self.shared = SharedFile(self.store, AUTOSAVE_FILE)
+        # лента изменений: чужие изменения применяются к модели построчно
+        self.feed = ChangeFeed(self.store)
+        self.scheduler = ReminderScheduler(self.store)
+        self.calendar = CalendarIndex(self.store, self.typed)
+        self.dup_index = DedupeIndex(self.store)
+        self.computed = ComputedColumns(self.store, self.typed)
+        self.archive = Archive(AUTOSAVE_FILE)
+        self.mirror = None
+        self.watchdog = None
 
         # анимации и шрифты
         self.animations_enabled = True
@@ -201,26 +654,50 @@ class MainWindow(QMainWindow):
         self.header_font_point = HEADER_FONT_POINT
         self.item_font_point = ITEM_FONT_POINT
 
+        # напоминания: один таймер на ближайшее срабатывание, без опроса
+        self._reminder_timer = QTimer(self)
+        self._reminder_timer.setSingleShot(True)
+        self._reminder_timer.timeout.connect(self.on_reminder_timer)
+        # столбцы с now()/today() пересчитываются раз в минуту
+        self._computed_timer = QTimer(self)
+        self._computed_timer.setInterval(TICK_MS)
+        self._computed_timer.timeout.connect(self.on_computed_tick)
+        self._computed_timer.start()
+        self._tray = None
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self._tray = QSystemTrayIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation), self)
+            self._tray.show()
+
         # инициализация UI
         self._init_ui()
 
-        # автозагрузка
+        # автозагрузка: окно показывается сразу, файл читается в фоне
         if AUTOSAVE and os.path.exists(AUTOSAVE_FILE):
-            try:
-                self.load_from_csv(AUTOSAVE_FILE)
-            except Exception:
-                pass
+            self.start_autoload()
+        else:
+            self._arm_reminders()
+            metrics.observe("gui.time_to_interactive", time.perf_counter() - self._started)
+        if AUTOSAVE:
+            # проверка дешёвая (stat файла), строки перечитываются только при изменении
+            self._shared_timer = QTimer(self)
+            self._shared_timer.setInterval(SHARED_POLL_MS)
+            self._shared_timer.timeout.connect(self.on_pull_changes)
+            self._shared_timer.start()
+
+    @property
+    def headers(self) -> List[str]:
+        return self.store.headers
+
+    @property
+    def rows(self) -> List[List[str]]:
+        return self.store.rows
 
     # -------------------- новые вспомогательные методы --------------------
     def list_csv_files(self) -> List[str]:
-        files = [f for f in os.listdir(".") if f.lower().endswith(".csv")]
-        files.sort(key=lambda s: s.lower())
-        return files
+        return list_data_files(CSV_EXTS)
 
     def list_json_files(self) -> List[str]:
-        files = [f for f in os.listdir(".") if f.lower().endswith(".json")]
-        files.sort(key=lambda s: s.lower())
-        return files
+        return list_data_files(JSON_EXTS, exclude=[FEED_SUFFIX])
 
     def show_open_menu(self, widget):
         menu = QMenu(self)
@@ -276,32 +753,22 @@ class MainWindow(QMainWindow):
         self._after_change()
 
     def _export_csv_to_json_prompt(self, csv_filename):
-        # предлагается имя по умолчанию: same base .json
-        default = os.path.splitext(csv_filename)[0] + ".json"
-        save_fname, _ = QFileDialog.getSaveFileName(self, "Экспорт JSON", default, "JSON Files (*.json)")
+        # предлагается имя по умолчанию: same base .json (сжатие сохраняется: .csv.gz -> .json.gz)
+        base, compression = split_compression(csv_filename)
+        default = os.path.splitext(base)[0] + ".json" + compression
+        save_fname, _ = QFileDialog.getSaveFileName(self, "Экспорт JSON", default, JSON_FILTER)
         if not save_fname:
             return
         try:
             # прочитать CSV и записать JSON
-            data = []
-            with open(csv_filename, "r", encoding="utf-8") as f:
-                rdr = csv.reader(f)
-                hdr = next(rdr, [])
-                for row in rdr:
-                    entry = {h: (row[i] if i < len(row) else "") for i, h in enumerate(hdr)}
-                    data.append(entry)
-            with open(save_fname, "w", encoding="utf-8") as jf:
-                json.dump(data, jf, ensure_ascii=False, indent=2)
+            hdr, rows = read_csv(csv_filename)
+            write_json(save_fname, hdr, rows, "every-op")
             QMessageBox.information(self, "Экспорт", f"Экспортировано {csv_filename} → {os.path.basename(save_fname)}")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка при экспорте: {e}")
 
     # -------------------- конец новых вспомогательных методов --------------------
 
-    def _display_headers(self) -> List[str]:
-        """Возвращает заголовки для отображения (включая колонку номера)."""
-        return ["No."] + list(self.headers)
-
     def _init_ui(self):
         cw = QWidget()
         vbox = QVBoxLayout(cw)
@@ -317,6 +784,8 @@ class MainWindow(QMainWindow):
         btn_export = QPushButton("Экспорт JSON")
         btn_import = QPushButton("Импорт JSON")
         btn_refresh = QPushButton("Обновить")
+        btn_autofit = QPushButton("Ширина")
+        btn_autofit.setToolTip("Подогнать ширину столбцов под содержимое")
 
         top.addWidget(btn_add)
         top.addWidget(btn_edit)
@@ -327,6 +796,7 @@ class MainWindow(QMainWindow):
         top.addWidget(btn_export)
         top.addWidget(btn_import)
         top.addWidget(btn_refresh)
+        top.addWidget(btn_autofit)
         top.addStretch()
 
         # управление шрифтом и анимацией
@@ -345,31 +815,51 @@ class MainWindow(QMainWindow):
         search_layout = QHBoxLayout()
         search_layout.addWidget(QLabel("Поиск:"))
         self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('текст или фильтр: time >= 09:00 and Comments contains "deploy"')
+        self.search_input.returnPressed.connect(self.on_search)
+        # поиск при наборе: запускается после паузы в SEARCH_DEBOUNCE_MS
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self.on_search)
+        self.search_input.textChanged.connect(lambda _: self._search_timer.start())
         search_layout.addWidget(self.search_input)
         btn_search = QPushButton("Найти")
         btn_reset = QPushButton("Сброс")
         search_layout.addWidget(btn_search)
         search_layout.addWidget(btn_reset)
+        # календарный вид по столбцу Date: читаются только корзины нужных дней
+        self.view_combo = QComboBox()
+        for title, key in CALENDAR_VIEWS:
+            self.view_combo.addItem(title, key)
+        self.view_combo.currentIndexChanged.connect(self.on_view_changed)
+        search_layout.addWidget(self.view_combo)
         vbox.addLayout(search_layout)
 
-        # таблица (колонки будут устанавливаться в refresh_table)
-        self.table = QTableWidget(0, len(self._display_headers()))
-        self.table.setHorizontalHeaderLabels(self._display_headers())
+        # таблица: представление над моделью (клик по заголовку — сортировка)
+        self.model = TaskTableModel(self.store, self)
+        self.proxy = TaskFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionsClickable(True)
+        self.table.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
 
         # Тёмная тема для таблицы: фон, линии сетки, цвет текста и выделение
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #2b2b2b;
                 color: #ffffff;
                 gridline-color: #444444;
                 selection-background-color: #3a7bd5;
                 selection-color: #ffffff;
             }
-            QTableWidget::item {
+            QTableView::item {
                 background-color: transparent;
             }
             QHeaderView::section {
@@ -380,7 +870,24 @@ class MainWindow(QMainWindow):
             }
         """)
 
-        vbox.addWidget(self.table)
+        # панель сводки справа от таблицы: задачи по часам или по значениям столбца
+        self.summary_panel = QWidget()
+        self.summary_panel.setFixedWidth(SUMMARY_WIDTH)
+        summary_layout = QVBoxLayout(self.summary_panel)
+        summary_layout.setContentsMargins(0, 0, 0, 0)
+        self.summary_title = QLabel("")
+        summary_layout.addWidget(self.summary_title)
+        self.summary_combo = QComboBox()
+        self.summary_combo.currentIndexChanged.connect(lambda _: self.update_summary())
+        summary_layout.addWidget(self.summary_combo)
+        self.summary_list = QListWidget()
+        summary_layout.addWidget(self.summary_list)
+        self._summary_headers = None
+
+        table_layout = QHBoxLayout()
+        table_layout.addWidget(self.table)
+        table_layout.addWidget(self.summary_panel)
+        vbox.addLayout(table_layout)
 
         # контекстное меню
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -406,13 +913,18 @@ class MainWindow(QMainWindow):
         btn_import.clicked.connect(lambda _, b=btn_import: self.show_import_menu(b))
         btn_export.clicked.connect(lambda _, b=btn_export: self.show_export_menu(b))
         btn_refresh.clicked.connect(self.refresh_table)
+        # кнопки, меняющие таблицу или файл, выключены, пока идёт автозагрузка
+        self._edit_buttons = [btn_add, btn_edit, btn_delete, btn_add_col, btn_save, btn_open, btn_import]
+        btn_autofit.clicked.connect(self.on_autofit_columns)
         btn_search.clicked.connect(self.on_search)
-        btn_reset.clicked.connect(self.refresh_table)
+        btn_reset.clicked.connect(self.on_search_reset)
         btn_inc_font.clicked.connect(lambda: self.change_font(1))
         btn_dec_font.clicked.connect(lambda: self.change_font(-1))
         self.chk_animate.stateChanged.connect(self.toggle_animations)
 
     def show_context_menu(self, pos: QPoint):
+        if self._loading:
+            return
         menu = QMenu(self)
         menu.addAction("Добавить строку", lambda: self.on_add())
         menu.addAction("Редактировать выбранную", lambda: self.on_edit())
@@ -422,7 +934,7 @@ class MainWindow(QMainWindow):
 
         # удаление столбцов и порядок через подменю
         sub_del_cols = menu.addMenu("Удалить столбцы...")
-        removable = [h for h in self.headers if h not in BASIC_COLUMNS]
+        removable = [h for h in self.headers if h not in BASIC_COLUMNS and h != ID_COLUMN]
         if removable:
             for col in sorted(removable, key=str.lower):
                 sub_del_cols.addAction(col, lambda checked=False, c=col: self._delete_column_by_name(c))
@@ -431,6 +943,9 @@ class MainWindow(QMainWindow):
             act.setEnabled(False)
 
         menu.addAction("Порядок столбцов...", lambda: self.on_reorder_columns_dialog())
+        menu.addAction("Тип столбца...", lambda: self.on_column_type_dialog())
+        menu.addAction("Вычисляемый столбец...", lambda: self.on_computed_column_dialog())
+        menu.addAction("Подогнать ширину столбцов", lambda: self.on_autofit_columns())
         menu.addSeparator()
 
         # Open submenu
@@ -463,33 +978,61 @@ class MainWindow(QMainWindow):
             a = export_menu.addAction("Нет .csv файлов")
             a.setEnabled(False)
 
+        menu.addAction("Изменить найденные...", lambda: self.on_bulk_edit())
+        menu.addAction("Добавить из файла (без дубликатов)...", lambda: self.on_merge_file())
+        menu.addAction("Сравнить с файлом...", lambda: self.on_diff_file())
+        menu.addAction("Найти дубликаты...", lambda: self.on_find_duplicates())
+        menu.addAction("Удалить дубликаты", lambda: self.on_remove_duplicates())
+
         menu.addSeparator()
         menu.addAction("Сохранить...", lambda: self.on_save())
         menu.addAction("Обновить", lambda: self.refresh_table())
+        menu.addAction("История (архив)...", lambda: self.on_history())
+        menu.addAction("Зеркало в каталог...", lambda: self.on_mirror_dialog())
+        if self.mirror is not None:
+            menu.addAction("Проверить зеркало", lambda: self.on_verify_mirror())
+            menu.addAction("Выключить зеркало", lambda: self.set_mirror(None))
+        menu.addAction("Статистика записи", lambda: self.on_io_stats())
+        menu.addAction("Показать/скрыть сводку", lambda: self.toggle_summary())
         menu.exec(self.table.viewport().mapToGlobal(pos))
 
     def _delete_column_by_name(self, col_name: str):
-        if col_name in BASIC_COLUMNS:
-            QMessageBox.information(self, "Удаление столбца", "Нельзя удалить базовые столбцы.")
+        if col_name in BASIC_COLUMNS or col_name == ID_COLUMN:
+            QMessageBox.information(self, "Удаление столбца", "Нельзя удалить базовые столбцы и ID.")
             return
         if QMessageBox.question(self, "Подтверждение", f"Удалить столбец '{col_name}'?") != QMessageBox.StandardButton.Yes:
             return
-        idx = self.headers.index(col_name)
-        del self.headers[idx]
-        for r in range(len(self.rows)):
-            if idx < len(self.rows[r]):
-                del self.rows[r][idx]
+        self.store.delete_columns([col_name])
         self._after_change()
         self.refresh_table()
 
     def apply_fonts(self):
+        """Меняет только стиль (шрифты и высоту строк), ячейки не пересоздаются."""
         font = QFont()
         font.setPointSize(self.base_font_point)
         self.setFont(font)
         header_font = QFont()
         header_font.setPointSize(self.header_font_point)
         self.table.horizontalHeader().setFont(header_font)
-        self.refresh_table(animate=False)
+        item_font = QFont()
+        item_font.setPointSize(self.item_font_point)
+        self.table.setFont(item_font)
+        self.table.verticalHeader().setDefaultSectionSize(QFontMetrics(item_font).height() + 8)
+
+    def on_autofit_columns(self):
+        """Ширина столбцов по кэшированной статистике (макс. ширина значения), без прохода по данным."""
+        fm = QFontMetrics(self.table.font())
+        header_fm = QFontMetrics(self.table.horizontalHeader().font())
+        char_w = fm.horizontalAdvance("0")
+        pad = 24
+        header = self.table.horizontalHeader()
+        no_width = max(header_fm.horizontalAdvance("No."), char_w * len(str(len(self.rows))))
+        header.resizeSection(0, no_width + pad)
+        for c, h in enumerate(self.headers, start=1):
+            stat = self.col_stats.columns[h]
+            # запас под стрелку сортировки в заголовке
+            width = max(header_fm.horizontalAdvance(h + " ▲0"), stat.max_width * char_w) + pad
+            header.resizeSection(c, min(width, AUTOFIT_MAX_WIDTH))
 
     def change_font(self, delta: int):
         self.base_font_point = max(8, self.base_font_point + delta)
@@ -502,37 +1045,17 @@ class MainWindow(QMainWindow):
 
     def refresh_table(self, animate: bool = True):
         animate = animate and self.animations_enabled
-        disp_headers = self._display_headers()
-        self.table.setColumnCount(len(disp_headers))
-        self.table.setHorizontalHeaderLabels(disp_headers)
-        self.table.setRowCount(len(self.rows))
-
-        for r, row in enumerate(self.rows):
-            # номер в первой колонке
-            no_item = QTableWidgetItem(str(r + 1))
-            no_item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
-            fno = no_item.font()
-            fno.setPointSize(self.item_font_point)
-            no_item.setFont(fno)
-            # текст белый для тёмной темы
-            no_item.setForeground(QBrush(QColor(255, 255, 255)))
-            self.table.setItem(r, 0, no_item)
-
-            # данные в остальных колонках
-            for c in range(len(self.headers)):
-                txt = str(row[c]) if c < len(row) else ""
-                it = QTableWidgetItem(txt)
-                it.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
-                f = it.font()
-                f.setPointSize(self.item_font_point)
-                it.setFont(f)
-                # текст белый для тёмной темы
-                it.setForeground(QBrush(QColor(255, 255, 255)))
-                # очистить фон (на случай старых подсветок)
-                it.setBackground(QBrush(QColor(43, 43, 43)))
-                self.table.setItem(r, c + 1, it)  # смещение на 1 из-за номера
-
-        self.status.setText(f"Строк: {len(self.rows)}")
+        # сортировка по исчезнувшим столбцам сбрасывается; порядок берётся из кэша
+        self.sort_keys = [(h, d) for h, d in self.sort_keys if h in self.headers]
+        self.model.reset(self.sorter.order(self.sort_keys), self.sort_keys)
+        if self._search_hits is not None:
+            # номера строк могли сдвинуться — перезапускаем поиск
+            self.on_search()
+        self._arm_reminders()
+        self.update_summary()
+
+        if self._search_hits is None:
+            self.status.setText(f"Строк: {len(self.rows)}")
 
         # простая анимация появления таблицы
         if animate:
@@ -548,14 +1071,43 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
 
+    def on_header_clicked(self, section: int):
+        """Клик — сортировка по столбцу (повторный клик меняет направление), Shift+клик — доп. ключ."""
+        if section == 0:
+            keys = []  # No. — исходный порядок
+        else:
+            h = self.headers[section - 1]
+            keys = list(self.sort_keys)
+            pos = next((i for i, (k, _) in enumerate(keys) if k == h), None)
+            if QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier:
+                if pos is None:
+                    keys.append((h, False))
+                else:
+                    keys[pos] = (h, not keys[pos][1])
+            elif pos is not None and len(keys) == 1:
+                keys = [(h, not keys[0][1])]
+            else:
+                keys = [(h, False)]
+        self.sort_keys = keys
+        self.model.set_order(self.sorter.order(keys), keys)
+        if keys:
+            desc = ", ".join(f"{h.strip()} {'↓' if d else '↑'}" for h, d in keys)
+            self.status.setText(f"Сортировка: {desc}")
+        else:
+            self.status.setText(f"Строк: {len(self.rows)}")
+
     def highlight_new_row(self, row_index: int):
-        if not (0 <= row_index < self.table.rowCount()):
+        """Подсветка строки по индексу в self.rows (не зависит от сортировки)."""
+        if not (0 <= row_index < len(self.rows)):
             return
+        view_row = self.proxy.proxy_row(self.model.view_row_of(row_index))
+        if view_row >= 0:
+            self.table.scrollTo(self.proxy.index(view_row, 0))
         duration = 600
         steps = 8
         interval = max(20, duration // steps)
         start_color = QColor(255, 250, 180)
-        end_color = QColor(255, 255, 255)
+        end_color = QColor(43, 43, 43)
         step = 0
 
         def tick():
@@ -565,17 +1117,12 @@ class MainWindow(QMainWindow):
             r = int(start_color.red() * (1 - t) + end_color.red() * t)
             g = int(start_color.green() * (1 - t) + end_color.green() * t)
             b = int(start_color.blue() * (1 - t) + end_color.blue() * t)
-            color = QColor(r, g, b)
-            brush = QBrush(color)
-            for c in range(self.table.columnCount()):
-                item = self.table.item(row_index, c)
-                if item:
-                    item.setBackground(brush)
-                    # текст остаётся белым чтобы был читаем на тёмном фоне
-                    item.setForeground(QBrush(QColor(255, 255, 255)))
+            self.model.highlight[row_index] = QColor(r, g, b)
             step += 1
             if step > steps:
                 timer.stop()
+                self.model.highlight.pop(row_index, None)
+            self.model.row_changed(row_index)
 
         timer = QTimer(self)
         timer.timeout.connect(tick)
@@ -583,23 +1130,31 @@ class MainWindow(QMainWindow):
 
     # функции добавления/редактирования остаются прежними
     def on_add(self):
-        dlg = RowDialog(self.headers, parent=self, font=QFont("", self.base_font_point))
+        dlg = RowDialog(self.headers, parent=self, font=QFont("", self.base_font_point), typed=self.typed,
+                        computed=self.computed.defs)
         if dlg.exec() and dlg.values:
-            self.rows.append(dlg.values)
+            self.store.append(dlg.values)
             self._after_change()
             self.refresh_table()
             self.highlight_new_row(len(self.rows) - 1)
 
     def on_edit(self):
-        sel = self.table.currentRow()
-        if sel < 0:
+        current = self.table.currentIndex()
+        if not current.isValid():
             QMessageBox.information(self, "Редактировать", "Выберите строку для редактирования.")
             return
-        # sel соответствует индексу в self.rows (номер в колонке No. = sel+1)
+        # строка представления -> индекс в self.rows; дальше строку держим по ID
+        sel = self._row_at_view(current.row())
+        task_id = self.store.id_of(sel)
         cur = self.rows[sel]
-        dlg = RowDialog(self.headers, values=cur, parent=self, font=QFont("", self.base_font_point))
+        dlg = RowDialog(self.headers, values=cur, parent=self, font=QFont("", self.base_font_point), typed=self.typed,
+                        computed=self.computed.defs)
         if dlg.exec() and dlg.values:
-            self.rows[sel] = dlg.values
+            sel = self.store.slot(task_id)
+            if sel is None:
+                QMessageBox.information(self, "Редактировать", "Строку уже удалили в другом окне.")
+                return
+            self.store.update(sel, dlg.values)
             self._after_change()
             self.refresh_table()
 
@@ -607,15 +1162,12 @@ class MainWindow(QMainWindow):
         """Удаляет выбранные строки (если выбраны) или вызывает мульти-удаление по номерам."""
         sels = self.table.selectionModel().selectedRows()
         if sels:
-            nums = sorted({idx.row() + 1 for idx in sels})
-            if QMessageBox.question(self, "Удалить", f"Удалить выбранные строки: {', '.join(map(str, nums))}?") == QMessageBox.StandardButton.Yes:
-                for idx in sorted([n - 1 for n in nums], reverse=True):
-                    try:
-                        del self.rows[idx]
-                    except Exception:
-                        pass
+            rows = IntervalSet.of(self._row_at_view(idx.row()) for idx in sels)
+            ids = [self.store.id_of(i) for i in rows]
+            if QMessageBox.question(self, "Удалить", f"Удалить выбранные строки: {rows.describe()}?") == QMessageBox.StandardButton.Yes:
+                # номера могли сдвинуться, пока был открыт вопрос, — удаляем по ID
+                self.store.delete(i for i in map(self.store.slot, ids) if i is not None)
                 self._after_change()
-                self.refresh_table()
             return
         # если ничего не выбрано, открыть диалог ввода номеров
         self.on_delete_multi()
@@ -625,7 +1177,7 @@ class MainWindow(QMainWindow):
         if not self.rows:
             QMessageBox.information(self, "Удалить", "Таблица пуста.")
             return
-        prompt = "Введите номера строк для удаления (например: 1,3,5-7). Номера соответствуют колонке 'No.' сверху."
+        prompt = "Введите номера строк для удаления (например: 1,3,5-7) или ID задач. Номера соответствуют колонке 'No.' сверху."
         text, ok = QInputDialog.getText(self, "Удалить строки", prompt)
         if not ok or not text.strip():
             return
@@ -638,49 +1190,16 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Удалить", "Нет валидных номеров для удаления.")
             return
         # подтверждение
-        nums = sorted(indices)
-        if QMessageBox.question(self, "Подтверждение удаления", f"Удалить строки: {', '.join(map(str, nums))}?") != QMessageBox.StandardButton.Yes:
+        if QMessageBox.question(self, "Подтверждение удаления", f"Удалить строки: {indices.describe()}?") != QMessageBox.StandardButton.Yes:
             return
-        # удаляем в обратном порядке по индексам (1-based -> 0-based)
-        for idx in sorted(indices, reverse=True):
-            try:
-                del self.rows[idx - 1]
-            except Exception:
-                pass
+        # диапазон удаляется интервалом, без разворачивания в номера
+        self.store.delete(indices)
         self._after_change()
-        self.refresh_table()
 
-    def _parse_indices(self, text: str, max_index: int) -> Set[int]:
-        """Парсит строку с номерами и диапазонами, возвращает множество 1-based индексов.
+    def _parse_indices(self, text: str, max_index: int) -> IntervalSet:
+        """Парсит строку с номерами (с 1), диапазонами и ID, возвращает 0-based индексы интервалами.
            Выбрасывает ValueError при некорректном вводе."""
-        text = text.strip()
-        parts = [p.strip() for p in text.split(",") if p.strip()]
-        result: Set[int] = set()
-        for part in parts:
-            if "-" in part:
-                bounds = part.split("-", 1)
-                if len(bounds) != 2:
-                    raise ValueError(f"Неверный диапазон: '{part}'")
-                try:
-                    a = int(bounds[0])
-                    b = int(bounds[1])
-                except ValueError:
-                    raise ValueError(f"Неверный номер в диапазоне: '{part}'")
-                if a <= 0 or b <= 0 or a > max_index or b > max_index:
-                    raise ValueError(f"Номер за пределами: '{part}'")
-                if a > b:
-                    a, b = b, a
-                for i in range(a, b + 1):
-                    result.add(i)
-            else:
-                try:
-                    n = int(part)
-                except ValueError:
-                    raise ValueError(f"Неверный номер: '{part}'")
-                if n <= 0 or n > max_index:
-                    raise ValueError(f"Номер за пределами: '{part}'")
-                result.add(n)
-        return result
+        return parse_ranges(text, max_index, self.store.slot)
 
     def on_add_column(self):
         text, ok = QInputDialog.getText(self, "Добавить столбец", "Название нового столбца:")
@@ -690,30 +1209,23 @@ class MainWindow(QMainWindow):
         if not col_name:
             QMessageBox.information(self, "Добавить столбец", "Имя столбца не может быть пустым.")
             return
-        self.headers.append(col_name)
-        for i in range(len(self.rows)):
-            self.rows[i].append("")
+        if col_name in self.headers:
+            QMessageBox.information(self, "Добавить столбец", "Такой столбец уже есть.")
+            return
+        self.store.add_column(col_name)
         self._after_change()
         self.refresh_table()
 
     def on_delete_columns_dialog(self):
         # список доступных для удаления (за исключением базовых)
-        removable = [h for h in self.headers if h not in BASIC_COLUMNS]
+        removable = [h for h in self.headers if h not in BASIC_COLUMNS and h != ID_COLUMN]
         if not removable:
             QMessageBox.information(self, "Удалить столбцы", "Нет дополнительных столбцов для удаления.")
             return
         dlg = ColumnDeleteDialog(removable, parent=self)
         if dlg.exec() and dlg.result:
-            to_remove = dlg.result
-            # удаляем по именам
-            for col in to_remove:
-                if col in self.headers and col not in BASIC_COLUMNS:
-                    idx = self.headers.index(col)
-                    # удалить столбец из headers и все строки
-                    del self.headers[idx]
-                    for r in range(len(self.rows)):
-                        if idx < len(self.rows[r]):
-                            del self.rows[r][idx]
+            to_remove = [c for c in dlg.result if c not in BASIC_COLUMNS]
+            self.store.delete_columns(to_remove)
             self._after_change()
             self.refresh_table()
 
@@ -726,29 +1238,101 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Ошибка", "Неверный порядок столбцов.")
                 return
             # перестроить rows согласно новому порядку
-            old_headers = list(self.headers)
-            new_rows = []
-            for row in self.rows:
-                new_row = []
-                for col_name in new_order:
-                    old_idx = old_headers.index(col_name)
-                    val = row[old_idx] if old_idx < len(row) else ""
-                    new_row.append(val)
-                new_rows.append(new_row)
-            self.headers = list(new_order)
-            self.rows = new_rows
+            self.store.reorder_columns(list(new_order))
             self._after_change()
             self.refresh_table()
 
+    def on_column_type_dialog(self):
+        """Объявить тип столбца (int, float, time, date, enum, text)."""
+        col, ok = QInputDialog.getItem(self, "Тип столбца", "Столбец:", list(self.headers), 0, False)
+        if not ok or not col:
+            return
+        current = self.typed.column(col).ctype.spec
+        items = list(TYPE_NAMES)
+        if current not in items:
+            items.insert(0, current)
+        spec, ok = QInputDialog.getItem(
+            self, "Тип столбца", "Тип (для enum можно ввести enum:a|b|c):", items, items.index(current), True
+        )
+        if not ok or not spec.strip():
+            return
+        try:
+            self.typed.set_type(self.store, col, spec.strip())
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        if AUTOSAVE:
+            try:
+                save_schema(AUTOSAVE_FILE, self.typed.schema)
+            except Exception:
+                pass
+        self.status.setText(f"Тип столбца '{col}': {spec.strip()}")
+
+    def on_computed_column_dialog(self):
+        """Задать, изменить или снять (пустое выражение) определение вычисляемого столбца."""
+        current = "\n".join(f"{name} = {text}" + (f"  ({state})" if state else "")
+                            for name, text, state in self.computed.describe())
+        name, ok = QInputDialog.getText(self, "Вычисляемый столбец",
+                                        (current + "\n\n" if current else "") + "Столбец (новый будет добавлен):")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if name == ID_COLUMN:
+            QMessageBox.information(self, "Вычисляемый столбец", "ID задач не вычисляется.")
+            return
+        old = self.computed.expressions().get(name, "")
+        text, ok = QInputDialog.getText(
+            self, "Вычисляемый столбец",
+            "Выражение: имена столбцов в нижнем регистре, пробелы -> _ (todo_list), или col(\"TODO list:\").\n"
+            "Функции: now(), today(), hours(), hhmm(), upper(), lower(), len(), round(), min(), max().\n"
+            "Пусто — снять определение (значения останутся):", text=old)
+        if not ok:
+            return
+        text = text.strip()
+        try:
+            if text:
+                with metrics.timer("computed.define"):
+                    self.computed.define(name, text)
+            elif not self.computed.remove(name):
+                return
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        if AUTOSAVE:
+            try:
+                self.computed.save(AUTOSAVE_FILE)
+            except Exception:
+                pass
+        self._after_change()
+        if name in self.computed.errors:
+            self.status.setText(f"Столбец '{name}' не вычисляется: {self.computed.errors[name]}")
+        else:
+            self.status.setText(f"Столбец '{name}': " + (text or "определение снято"))
+
     def on_save(self):
-        fname, _ = QFileDialog.getSaveFileName(self, "Сохранить CSV", "", "CSV Files (*.csv)")
+        # о перезаписи спрашивает диалог сравнения ниже, со списком изменений
+        fname, _ = QFileDialog.getSaveFileName(self, "Сохранить CSV", "", CSV_FILTER,
+                                               options=QFileDialog.Option.DontConfirmOverwrite)
         if not fname:
             return
-        self.save_to_csv(fname)
+        if os.path.exists(fname) and os.path.abspath(fname) != os.path.abspath(AUTOSAVE_FILE):
+            try:
+                result = diff_table(fname, self.headers, self.rows)
+            except Exception as e:
+                result = None
+                if QMessageBox.question(self, "Сохранить", f"Не удалось сравнить с файлом ({e}). Перезаписать?") \
+                        != QMessageBox.StandardButton.Yes:
+                    return
+            if result is not None and not result.empty:
+                title = f"Перезаписать {os.path.basename(fname)}?"
+                if not DiffDialog(result, title, confirm=True, parent=self).exec():
+                    return
+        # явное сохранение пользователем сразу сбрасывается на диск
+        self.save_to_csv(fname, "every-op")
         QMessageBox.information(self, "Сохранено", f"Сохранено в {os.path.basename(fname)}")
 
     def on_open(self):
-        fname, _ = QFileDialog.getOpenFileName(self, "Открыть CSV", "", "CSV Files (*.csv)")
+        fname, _ = QFileDialog.getOpenFileName(self, "Открыть CSV", "", CSV_FILTER)
         if not fname:
             return
         ok = self.load_from_csv(fname)
@@ -759,20 +1343,125 @@ class MainWindow(QMainWindow):
         self.refresh_table()
 
     def on_export(self):
-        fname, _ = QFileDialog.getSaveFileName(self, "Экспорт JSON", "", "JSON Files (*.json)")
+        fname, _ = QFileDialog.getSaveFileName(self, "Экспорт JSON", "", JSON_FILTER)
         if not fname:
             return
         self.export_json(fname)
         QMessageBox.information(self, "Экспорт", f"Экспортировано в {os.path.basename(fname)}")
 
     def on_import(self):
-        fname, _ = QFileDialog.getOpenFileName(self, "Импорт JSON", "", "JSON Files (*.json)")
+        fname, _ = QFileDialog.getOpenFileName(self, "Импорт JSON", "", JSON_FILTER)
         if not fname:
             return
         self.import_json(fname)
         self._after_change()
         QMessageBox.information(self, "Импорт", f"Импортировано из {os.path.basename(fname)}")
 
+    def on_diff_file(self):
+        """Сравнить файл с текущей таблицей или два выбранных файла между собой."""
+        names, _ = QFileDialog.getOpenFileNames(self, "Сравнить (один файл — с таблицей, два — между собой)",
+                                                "", f"{CSV_FILTER};;{JSON_FILTER}")
+        if not names:
+            return
+        try:
+            if len(names) == 1:
+                result = diff_table(names[0], self.headers, self.rows)
+                title = f"{os.path.basename(names[0])} → текущая таблица"
+            else:
+                result = diff_files(names[0], names[1])
+                title = f"{os.path.basename(names[0])} → {os.path.basename(names[1])}"
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Ошибка при сравнении: {e}")
+            return
+        if result.empty:
+            QMessageBox.information(self, "Сравнение", "Различий нет.")
+            return
+        DiffDialog(result, title, parent=self).exec()
+
+    def on_merge_file(self):
+        """Добавить задачи из CSV/JSON к текущим, пропуская уже имеющиеся (файл читается потоком)."""
+        fname, _ = QFileDialog.getOpenFileName(self, "Добавить из файла", "", f"{CSV_FILTER};;{JSON_FILTER}")
+        if not fname:
+            return
+        self.dup_index.set_key(None)
+        try:
+            added, skipped = merge_records(self.store, self.dup_index, iter_records(fname))
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Ошибка при чтении файла: {e}")
+            return
+        self._after_change()
+        self.status.setText(f"Добавлено: {added}, пропущено дубликатов: {skipped}")
+
+    def on_find_duplicates(self):
+        """Показать только повторяющиеся строки (ключ — выбранные столбцы или все, кроме ID)."""
+        text, ok = QInputDialog.getText(self, "Найти дубликаты",
+                                        "Столбцы ключа через запятую (пусто — все):")
+        if not ok:
+            return
+        try:
+            self.dup_index.set_key(resolve_key(self.headers, text) or None)
+        except KeyError as e:
+            QMessageBox.warning(self, "Дубликаты", f"Столбец {e} не найден")
+            return
+        groups = self.dup_index.groups()
+        if not groups:
+            QMessageBox.information(self, "Дубликаты", "Дубликатов нет.")
+            return
+        hits = {i for group in groups for i in group}
+        self._last_query = None
+        self._search_hits = hits
+        self.proxy.set_hits(hits)
+        self.status.setText(f"Групп дубликатов: {len(groups)}, лишних копий: {len(hits) - len(groups)}")
+
+    def on_remove_duplicates(self):
+        """Удалить лишние копии по текущему ключу поиска дубликатов, оставив первую."""
+        extra = self.dup_index.extra()
+        if not extra:
+            QMessageBox.information(self, "Дубликаты", "Дубликатов нет.")
+            return
+        key = ", ".join(h.strip() for h in self.dup_index.key_columns())
+        if QMessageBox.question(self, "Удалить дубликаты",
+                                f"Удалить лишних копий: {len(extra)} (ключ: {key})?") == QMessageBox.StandardButton.Yes:
+            self.store.delete(extra)
+            self.on_search_reset()
+            self._after_change()
+            self.status.setText(f"Удалено дубликатов: {len(extra)}")
+
+    def on_bulk_edit(self):
+        """Одна операция над всеми строками текущего поиска: одна проверка, одно обновление, одно автосохранение."""
+        if self._search_hits is None:
+            QMessageBox.information(self, "Изменить найденные", "Сначала найдите задачи поиском.")
+            return
+        if not self._search_hits:
+            QMessageBox.information(self, "Изменить найденные", "Поиск ничего не нашёл.")
+            return
+        text, ok = QInputDialog.getText(self, "Изменить найденные",
+                                        f"Найдено задач: {len(self._search_hits)}. Операция:\n{OPERATIONS_HELP}")
+        if not ok or not text.strip():
+            return
+        try:
+            op = parse_operation(self.query, text)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", f"Ошибка в операции: {e}")
+            return
+        plan = plan_bulk(self.query, sorted(self._search_hits), op)
+        if plan.errors:
+            QMessageBox.warning(self, "Ничего не изменено",
+                                f"Не подходят значения в строках ({len(plan.errors)}):\n{describe_errors(plan)}")
+            return
+        if not plan.changes:
+            QMessageBox.information(self, "Изменить найденные", "Значения уже такие, менять нечего.")
+            return
+        sample = "\n".join(f"{idx + 1}: {old} → {new}" for idx, old, new in preview(self.store, plan))
+        if QMessageBox.question(self, "Изменить найденные",
+                                f"Изменить задач: {len(plan.changes)} (без изменений: {plan.unchanged})?\n\n{sample}"
+                                ) != QMessageBox.StandardButton.Yes:
+            return
+        with metrics.timer("bulk.apply"):
+            done = apply_bulk(self.store, plan)
+        self._after_change()
+        self.status.setText(f"Изменено задач: {done}")
+
     # wrapper actions used in context menu
     def on_action_save(self):
         self.on_save()
@@ -787,52 +1476,335 @@ class MainWindow(QMainWindow):
         self.on_import()
 
     def on_search(self):
-        q = self.search_input.text().strip().lower()
+        self._search_timer.stop()
+        q = self.search_input.text().strip()
+        view = self._calendar_rows()
         if not q:
-            for r in range(self.table.rowCount()):
-                self.table.setRowHidden(r, False)
-            self.status.setText(f"Строк: {len(self.rows)}")
+            self._last_query = None
+            self._search_hits = view
+            self.proxy.set_hits(view)
+            if view is None:
+                self.status.setText(f"Строк: {len(self.rows)}")
+            else:
+                self.status.setText(f"{self.view_combo.currentText()}: {len(view)}")
+            return
+        try:
+            compiled = self.query.compile(q)
+        except QueryError as e:
+            self.status.setText(f"Ошибка в запросе: {e}")
+            return
+        # строку поиска дописали, а таблица не менялась — ищем только среди прошлых результатов
+        prev = self._last_query
+        universe = None
+        if (
+            prev is not None
+            and self._search_hits is not None
+            and prev.version == self.store.version
+            and compiled.refines(prev)
+        ):
+            universe = self._search_hits
+        found = set(compiled.run(universe))
+        if view is not None:
+            found &= view
+        self._last_query = compiled
+        self._search_hits = found
+        self.proxy.set_hits(found)
+        self.status.setText(f"Результатов: {self.proxy.visible_count()}")
+
+    def _calendar_rows(self):
+        """Строки выбранного календарного вида или None (все строки)."""
+        key = self.view_combo.currentData()
+        if key == "all":
+            return None
+        if not self.calendar.ensure():
+            return set()
+        today = datetime.date.today().toordinal()
+        if key == "day":
+            return set(self.calendar.day(today))
+        if key == "week":
+            return set(self.calendar.week(today))
+        return set(self.calendar.overdue())
+
+    def on_view_changed(self, _=None):
+        # результаты прошлого поиска относились к другому виду — ищем заново
+        self._last_query = None
+        self.on_search()
+        if self.view_combo.currentData() != "all" and not self.calendar.ensure():
+            self.status.setText("Нет столбца 'Date' (дата задачи, YYYY-MM-DD)")
+
+    def _row_at_view(self, view_row: int) -> int:
+        """Строка представления (после фильтра и сортировки) -> индекс в self.rows."""
+        return self.model.row_at(self.proxy.source_row(view_row))
+
+    def on_search_reset(self):
+        self.view_combo.blockSignals(True)
+        self.view_combo.setCurrentIndex(0)
+        self.view_combo.blockSignals(False)
+        self.search_input.clear()
+        self._search_hits = None
+        self._last_query = None
+        self.proxy.set_hits(None)
+        self.refresh_table()
+
+    def set_mirror(self, directory):
+        """Включить зеркало в каталог (None — выключить)."""
+        if self.mirror is not None:
+            self.store.remove_listener(self.mirror)
+        self.mirror = MirrorSync(self.store, directory, durability=DURABILITY) if directory else None
+        if self.mirror is None:
+            self.status.setText("Зеркало выключено")
+
+    def sync_mirror(self):
+        """Записать в зеркало разделы, изменённые с прошлой синхронизации."""
+        if self.mirror is None or self._loading:
+            return None
+        try:
+            return self.mirror.sync()
+        except (OSError, TimeoutError) as e:
+            # недописанные разделы допишет следующая синхронизация
+            self.status.setText(f"Зеркало не обновлено: {e}")
+            return None
+
+    def on_mirror_dialog(self):
+        directory = QFileDialog.getExistingDirectory(self, "Каталог зеркала",
+                                                     self.mirror.directory if self.mirror is not None else "")
+        if not directory:
+            return
+        self.set_mirror(directory)
+        result = self.sync_mirror()
+        if result is not None:
+            self.status.setText(f"Зеркало {directory}: записано разделов {result.written}, "
+                                f"без изменений {result.unchanged}")
+
+    def on_verify_mirror(self):
+        problems = verify_mirror(self.mirror.directory)
+        if problems:
+            QMessageBox.warning(self, "Зеркало", "\n".join(problems[:20]))
+        else:
+            QMessageBox.information(self, "Зеркало", "Файлы зеркала совпадают с манифестом.")
+
+    def on_io_stats(self):
+        lines = [f"Надёжность автосохранения: {DURABILITY}"]
+        for item in metrics.summary():
+            if "total_ms" in item:
+                lines.append(f"{item['name']}: {item['count']} раз, p50 {item['p50_ms']} мс, "
+                             f"p95 {item['p95_ms']} мс, макс {item['max_ms']} мс")
+            else:
+                lines.append(f"{item['name']}: {item['count']}")
+        if self.watchdog is not None and self.watchdog.stalls:
+            lines.append(f"Последние зависания (журнал {self.watchdog.log_path}):")
+            for event in self.watchdog.stalls[-5:]:
+                where = event["stack"][-1] if event["stack"] else "?"
+                lines.append(f"{event['time']}: {event['duration_ms']} мс — {where}")
+        QMessageBox.information(self, "Статистика записи", "\n".join(lines))
+
+    def update_summary(self):
+        """Панель сводки из счётчиков Aggregates: читаются только корзины, не строки."""
+        if self.summary_panel.isHidden():
+            return
+        headers = [h for h in self.headers if h != ID_COLUMN]
+        if headers != self._summary_headers:
+            current = self.summary_combo.currentData()
+            self.summary_combo.blockSignals(True)
+            self.summary_combo.clear()
+            self.summary_combo.addItem("По часам", None)
+            for h in headers:
+                self.summary_combo.addItem(f"По столбцу {h.strip()}", h)
+            pos = self.summary_combo.findData(current)
+            self.summary_combo.setCurrentIndex(max(pos, 0))
+            self.summary_combo.blockSignals(False)
+            self._summary_headers = headers
+        agg = self.aggregates
+        col = self.summary_combo.currentData()
+        if col is None:
+            items = [(f"{h:02d}:00", agg.hours[h]) for h in range(HOURS) if agg.hours[h]]
+            if agg.untimed:
+                items.append(("без времени", agg.untimed))
+        else:
+            items = [(value or "(пусто)", n) for value, n in agg.group_by(col, SUMMARY_LIMIT)]
+        top = max((n for _, n in items), default=0)
+        self.summary_title.setText(f"Задач: {agg.count}, выполнено: {agg.done}")
+        self.summary_list.clear()
+        for label, n in items:
+            bar = "█" * max(1, round(n * SUMMARY_BAR / top))
+            self.summary_list.addItem(f"{label}  {bar} {n}")
+
+    def toggle_summary(self):
+        self.summary_panel.setVisible(self.summary_panel.isHidden())
+        self.update_summary()
+
+    def archive_old(self):
+        """Перенести старые и выполненные задачи из файла автосохранения в архив."""
+        today = datetime.date.today().toordinal()
+        if not AUTOSAVE or not select_for_archive(self.store, self.calendar, today):
+            return
+        try:
+            # под блокировкой архива: другой процесс не перенесёт те же строки второй раз
+            with self.archive.lock():
+                self.on_pull_changes()
+                indices = select_for_archive(self.store, self.calendar, today)
+                if not indices:
+                    return
+                written = move_to_archive(self.archive, self.store, self.calendar, indices, today)
+                self._after_change()
+            self.status.setText(f"Перенесено в архив: {sum(written.values())}. Строк: {len(self.rows)}")
+        except (OSError, TimeoutError) as e:
+            self.status.setText(f"Не удалось перенести задачи в архив: {e}")
+
+    def on_history(self):
+        if not self.archive.partitions():
+            QMessageBox.information(self, "История", "Архив пуст.")
+            return
+        HistoryDialog(self.archive, self).exec()
+
+    def start_watchdog(self):
+        """Heartbeat-таймер главного потока и фоновый сторож, который снимает стек при зависании."""
+        self.watchdog = StallWatchdog()
+        self._heartbeat = QTimer(self)
+        self._heartbeat.timeout.connect(self.watchdog.beat)
+        self._heartbeat.start(int(HEARTBEAT_INTERVAL * 1000))
+        self.watchdog.start()
+
+    def _arm_reminders(self):
+        """Завести таймер на ближайшее срабатывание (после любого изменения таблицы)."""
+        wait = self.scheduler.seconds_until_next()
+        if wait is None:
+            self._reminder_timer.stop()
+            return
+        self._reminder_timer.start(min(int(wait * 1000) + 1, REMINDER_MAX_WAIT_MS))
+
+    def on_reminder_timer(self):
+        fired = self.scheduler.pop_due()
+        if fired:
+            text = "\n".join(f"{due:%H:%M}  {self.scheduler.describe(idx)}" for due, idx in fired[:10])
+            if len(fired) > 10:
+                text += f"\n... и ещё {len(fired) - 10}"
+            if self._tray is not None:
+                self._tray.showMessage("Напоминание", text)
+            else:
+                QApplication.beep()
+            self.status.setText("Напоминание: " + text.splitlines()[0])
+            for _, idx in fired:
+                self.highlight_new_row(idx)
+        self._arm_reminders()
+
+    def on_computed_tick(self):
+        # пока идёт загрузка или открыт диалог, номера строк не должны меняться
+        if self._loading or QApplication.activeModalWidget() is not None:
             return
-        for r in range(self.table.rowCount()):
-            match = False
-            for c in range(1, self.table.columnCount()):  # пропускаем колонку No.
-                it = self.table.item(r, c)
-                if it and q in it.text().lower():
-                    match = True
-                    break
-            self.table.setRowHidden(r, not match)
-        visible = sum(1 for r in range(self.table.rowCount()) if not self.table.isRowHidden(r))
-        self.status.setText(f"Результатов: {visible}")
+        seq = self.feed.seq
+        with metrics.timer("computed.tick"):
+            changed = self.computed.tick()
+        if changed:
+            self.model.apply_changes(self.feed.since(seq), self.sorter.order(self.sort_keys), self.sort_keys)
+            self.update_summary()
 
     def _after_change(self):
         self.refresh_table()
-        if AUTOSAVE:
-            try:
-                self.save_to_csv(AUTOSAVE_FILE)
-            except Exception:
-                pass
+        self.save_to_csv_autosave()
+
+    def _show_merge(self, merged, seq: int):
+        """Показать изменения других процессов, применённые после записи ленты seq."""
+        if merged is None:
+            return
+        self.sort_keys = [(h, d) for h, d in self.sort_keys if h in self.headers]
+        self.model.apply_changes(self.feed.since(seq), self.sorter.order(self.sort_keys), self.sort_keys)
+        if self._search_hits is not None:
+            self.on_search()
+        self._arm_reminders()
+        self.update_summary()
+        self.status.setText(f"{merged}. Строк: {len(self.rows)}")
+
+    def on_pull_changes(self):
+        # пока открыт диалог, номера строк не должны сдвигаться
+        if self._loading or QApplication.activeModalWidget() is not None:
+            return
+        try:
+            seq = self.feed.seq
+            self._show_merge(self.shared.pull(), seq)
+        except (OSError, TimeoutError):
+            pass  # повторим при следующей проверке
 
     # CSV / JSON utils (не включают колонку No.)
-    def save_to_csv(self, filename: str):
+    def save_to_csv(self, filename: str, durability: str = DURABILITY):
         try:
-            with open(filename, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(self.headers)
-                for row in self.rows:
-                    w.writerow(row)
+            write_csv(filename, self.headers, self.rows, durability)
+            save_schema(filename, self.typed.schema)
+            self.computed.save(filename)
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка при сохранении: {e}")
 
+    # -------------------- автозагрузка --------------------
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._first_paint:
+            self._first_paint = True
+            # таймер срабатывает после того, как цикл событий отрисует окно
+            QTimer.singleShot(0, lambda: metrics.observe("gui.first_paint", time.perf_counter() - self._started))
+
+    def _set_loading(self, loading: bool):
+        self._loading = loading
+        for btn in self._edit_buttons:
+            btn.setEnabled(not loading)
+
+    def start_autoload(self):
+        """Чтение автосохранения в фоне; строки появляются в таблице порциями по LOAD_BATCH."""
+        self._set_loading(True)
+        self.status.setText(f"Загрузка {AUTOSAVE_FILE}...")
+        # определения нужны до первой порции: значения заполняются при добавлении строк
+        self.computed.load(AUTOSAVE_FILE)
+        self._reader = AutoloadReader(self)
+        self._reader.finished.connect(self._on_autoload_read)
+        self._reader.start(AUTOSAVE_FILE)
+
+    def _on_autoload_read(self, result):
+        if isinstance(result, Exception):
+            self._set_loading(False)
+            self._arm_reminders()
+            self.status.setText(f"Строк: {len(self.rows)}")
+            QMessageBox.warning(self, "Ошибка", f"Ошибка при загрузке: {result}")
+            return
+        hdrs, rows, schema = result
+        self.typed.schema = schema
+        self.store.reset(hdrs, rows[:LOAD_BATCH])
+        self.refresh_table()
+        metrics.observe("gui.first_rows", time.perf_counter() - self._started)
+        self._pending = (rows, LOAD_BATCH)
+        self._load_next_batch()
+
+    def _load_next_batch(self):
+        rows, pos = self._pending
+        if pos < len(rows):
+            # порция за проход цикла событий: окно между порциями отвечает (прокрутка, поиск)
+            with metrics.timer("gui.autoload_batch"):
+                self.store.extend(rows[pos:pos + LOAD_BATCH])
+                self.model.apply_changes([], self.sorter.order(self.sort_keys), self.sort_keys)
+            self._pending = (rows, pos + LOAD_BATCH)
+            self.status.setText(f"Загрузка: {len(self.rows)} из {len(rows)}")
+            QTimer.singleShot(0, self._load_next_batch)
+            return
+        self._pending = None
+        # таблица совпадает с файлом — дальше подтягиваются только чужие изменения
+        self.shared.mark_synced()
+        self._set_loading(False)
+        self.refresh_table(animate=False)
+        elapsed = time.perf_counter() - self._started
+        metrics.observe("gui.time_to_interactive", elapsed)
+        if self._search_hits is None:
+            self.status.setText(f"Строк: {len(self.rows)} (загружено за {elapsed:.2f} с)")
+        self.archive_old()
+
     def load_from_csv(self, filename: str) -> bool:
         if not os.path.exists(filename):
             return False
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                r = csv.reader(f)
-                hdrs = next(r, None)
-                if hdrs:
-                    self.headers = hdrs
-                self.rows = [row for row in r]
+            # большие файлы разбираются на всех ядрах, время нормализуется в HH:MM
+            hdrs, rows = read_csv_parallel(filename, BASIC_COLUMNS[0])
+            hdrs = hdrs or list(self.headers)
+            # схема читается до разбора, чтобы значения разбирались один раз
+            self.typed.schema = load_schema(filename)
+            self.computed.load(filename)
+            self.store.reset(hdrs, rows)
             self.refresh_table()
             return True
         except Exception as e:
@@ -841,12 +1813,7 @@ class MainWindow(QMainWindow):
 
     def export_json(self, filename: str):
         try:
-            data = []
-            for row in self.rows:
-                entry = {h: (row[i] if i < len(row) else "") for i, h in enumerate(self.headers)}
-                data.append(entry)
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            write_json(filename, self.headers, self.rows, "every-op")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка при экспорте: {e}")
 
@@ -855,43 +1822,59 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Файл не найден")
             return
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not data:
+            keys, rows = read_json(filename)
+            if not rows:
                 QMessageBox.information(self, "Импорт", "JSON пуст.")
                 return
-            keys = list(data[0].keys())
-            self.headers = keys
-            self.rows = [[item.get(k, "") for k in keys] for item in data]
+            self.typed.schema = load_schema(filename)
+            self.computed.load(filename)
+            self.store.reset(keys, rows)
             self.refresh_table()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка при импорте: {e}")
 
     def save_to_csv_autosave(self):
-        if AUTOSAVE:
+        """Автосохранение под блокировкой файла со слиянием чужих изменений."""
+        # недогруженная таблица затёрла бы файл
+        if AUTOSAVE and not self._loading:
             try:
-                self.save_to_csv(AUTOSAVE_FILE)
-            except Exception:
-                pass
+                seq = self.feed.seq
+                self._show_merge(self.shared.save(lambda: self.save_to_csv(AUTOSAVE_FILE)), seq)
+            except (OSError, TimeoutError) as e:
+                self.status.setText(f"Автосохранение не выполнено: {e}")
+        self.sync_mirror()
 
 
 def main():
+    # исполняемый файл pyinstaller: процесс пула разбора CSV не должен открывать окно
+    multiprocessing.freeze_support()
     try:
         QApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling, True)
     except Exception:
         pass
 
+    started = time.perf_counter()
     app = QApplication(sys.argv)
-    win = MainWindow()
+    win = MainWindow(started)
+    if WATCHDOG or "--watchdog" in sys.argv[1:]:
+        win.start_watchdog()
+    mirror_dir = sys.argv[sys.argv.index("--mirror") + 1] if "--mirror" in sys.argv[1:-1] else MIRROR_DIR
+    if mirror_dir:
+        win.set_mirror(mirror_dir)
     win.show()
     try:
         rc = app.exec()
     except Exception as e:
         print("Ошибка в приложении:", e)
         rc = 1
+    if win.watchdog is not None:
+        win.watchdog.stop()
     try:
-        if AUTOSAVE:
-            win.save_to_csv(AUTOSAVE_FILE)
+        # окно закрыто до конца автозагрузки — файл не перезаписывается неполной таблицей
+        if AUTOSAVE and not win._loading:
+            win.shared.save(lambda: win.save_to_csv(AUTOSAVE_FILE))
+        win.sync_mirror()
+        committer.flush()
     except Exception:
         pass
     sys.exit(rc)